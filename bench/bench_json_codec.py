@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Benchmark the JSON backends decoding the fixtures of a configuration
+
+Usage (from the repository root):
+
+    PYTHONPATH=src python bench/bench_json_codec.py [--repeat N] [file-or-directory ...]
+
+By default the files in config and config/output are decoded, as they are and repeated
+in an array of 10000 copies, to show the difference on large responses too
+'''
+
+# system imports
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+# local imports
+from apitestframework.utils.json_codec import BACKENDS, JsonCodec
+
+DEFAULT_PATHS = ['config', os.path.join('config', 'output')]
+COPIES = 10000
+
+def get_documents(paths):
+    documents = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path]
+        for name in files:
+            with open(name, 'rb') as f:
+                content = f.read()
+            documents.append((os.path.basename(name), content))
+            documents.append(('{} x{}'.format(os.path.basename(name), COPIES), b'[' + b','.join([content.strip()] * COPIES) + b']'))
+    return documents
+
+def get_codecs():
+    codecs = []
+    for backend in BACKENDS:
+        try:
+            codecs.append(JsonCodec(backend))
+        except ValueError:
+            print('{}: not installed'.format(backend))
+    return codecs
+
+def measure(codec, content, repeat):
+    timer = timeit.Timer(lambda: codec.loads(content))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def main():
+    parser = argparse.ArgumentParser(prog='bench_json_codec', description='compare the JSON backends on fixture files')
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS, help='JSON files or directories of JSON files')
+    parser.add_argument('--repeat', type=int, default=5, help='number of repetitions (default: 5)')
+    args = parser.parse_args(sys.argv[1:])
+    codecs = get_codecs()
+    print('{:<44} {:>10} '.format('document', 'size') + ' '.join('{:>12}'.format(c.backend) for c in codecs))
+    for name, content in get_documents(args.paths):
+        times = [measure(c, content, args.repeat) for c in codecs]
+        print('{:<44} {:>10} '.format(name, len(content)) + ' '.join('{:>10.2f}us'.format(t * 1e6) for t in times))
+
+if __name__ == '__main__':
+    main()
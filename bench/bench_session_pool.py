@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Benchmark HTTP calls with and without the session pool against a local stub server
+
+Usage (from the repository root):
+
+    PYTHONPATH=src python bench/bench_session_pool.py [number-of-calls]
+'''
+
+# system imports
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+# library imports
+import requests
+
+# local imports
+from apitestframework.utils.session_pool import SessionPool
+
+BODY = json.dumps({'version': '0.3.1', 'status': 'OK'}).encode('utf-8')
+
+class StubHandler(BaseHTTPRequestHandler):
+    '''
+    Answer every GET with a small JSON body, keeping the connection alive
+    '''
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+def bench(label: str, calls: int, call):
+    '''
+    Time a number of calls and print the result
+    '''
+    start = time.perf_counter()
+    for _ in range(calls):
+        r = call()
+        r.json()
+    elapsed = time.perf_counter() - start
+    print('{:<24} {:>6} calls in {:8.3f}s ({:8.1f} calls/s)'.format(label, calls, elapsed, calls / elapsed))
+    return elapsed
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:{}/v1/status'.format(server.server_address[1])
+    try:
+        no_pool = bench('requests.request', calls, lambda: requests.request('GET', url))
+        pool = SessionPool()
+        session = pool.session(url)
+        pooled = bench('SessionPool', calls, lambda: session.request('GET', url))
+        pool.close()
+        print('speed-up: {:.2f}x'.format(no_pool / pooled))
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
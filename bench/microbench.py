@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Microbenchmarks of the hot paths of the framework, with JSON baselines and regression gating
+
+Usage (from the repository root):
+
+    # run the benchmarks, writing the results to a baseline file
+    PYTHONPATH=src python bench/microbench.py run --output baseline.json
+    # run them again, failing if a benchmark is more than 10% slower than the baseline
+    PYTHONPATH=src python bench/microbench.py run --output current.json --compare baseline.json --threshold 0.1
+    # compare two result files
+    PYTHONPATH=src python bench/microbench.py compare baseline.json current.json --threshold 0.1
+
+Payloads scale from 1 KB to 1 MB and suites from 10 to 1000 tests; with --full up to 50 MB and 100k tests
+'''
+
+# system imports
+import argparse
+import copy
+import functools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+# local imports
+from apitestframework.core.api_test import ApiTest
+from apitestframework.core.test_run import TestRun
+from apitestframework.utils.api_test_utils import check_result_content
+from apitestframework.utils.comparison_plan import ComparisonPlan
+from apitestframework.utils.header import Header
+from apitestframework.utils.header_utils import merge_headers_lists
+from apitestframework.utils.misc import build_keys_list, get_inner_key_value
+from apitestframework.utils.session_pool import SessionPool
+from apitestframework.utils.test_status import TestStatus
+
+# format of the result files: change it when their content changes
+RESULTS_VERSION = 1
+# payload sizes and number of tests, default and with --full
+PAYLOAD_SIZES = [('1KB', 1 << 10), ('100KB', 100 << 10), ('1MB', 1 << 20)]
+FULL_PAYLOAD_SIZES = PAYLOAD_SIZES + [('10MB', 10 << 20), ('50MB', 50 << 20)]
+TEST_COUNTS = [10, 1000]
+FULL_TEST_COUNTS = TEST_COUNTS + [10000, 100000]
+# expected result file used by the synthetic tests
+EXPECTED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config', 'output', 'goeuro-status-expected.json')
+
+def make_payload(size: int) -> Dict[str, Any]:
+    '''
+    Build a search-like response of about the given size once serialized
+
+    :param size: Target size, in bytes
+    :type size:  int
+
+    :return: The payload
+    :rtype:  Dict[str, Any]
+    '''
+    def solution(i: int) -> Dict[str, Any]:
+        return {
+            'solutionId': 'VCC-{:06d}'.format(i),
+            'departureStationCode': '09400',
+            'arrivalStationCode': '59700',
+            'price': {'amount': i % 997 + 0.5, 'currency': 'EUR'},
+            'segments': [
+                {'carrier': 'ATVO Spa', 'departureDateTime': '2019-08-30T10:00:00+02:00', 'seats': i % 50}
+            ]
+        }
+    one = len(json.dumps(solution(0)))
+    return {'currency': 'EUR', 'solutions': [solution(i) for i in range(max(1, size // one))]}
+
+def make_config(tests: int) -> Dict[str, Any]:
+    '''
+    Build a Test Run configuration with the given number of tests, in suites of 100 tests at most
+
+    :param tests: Number of tests
+    :type tests:  int
+
+    :return: The configuration
+    :rtype:  Dict[str, Any]
+    '''
+    suites = []
+    for s in range(0, tests, 100):
+        suites.append({
+            'name': 'SUITE_{}'.format(s // 100),
+            'baseUrl': 'http://localhost:9093',
+            'headers': {'X-Suite': {'value': 'suite-{}'.format(s)}},
+            'tests': [make_test(i) for i in range(s, min(s + 100, tests))]
+        })
+    return {'headers': {'Accept': {'value': 'application/json'}}, 'suites': suites}
+
+def make_test(i: int) -> Dict[str, Any]:
+    '''
+    Build the configuration of a test
+
+    :param i: Number of the test
+    :type i:  int
+
+    :return: The test configuration
+    :rtype:  Dict[str, Any]
+    '''
+    return {
+        'name': 'Test_{}'.format(i),
+        'path': '/v1/search/{}'.format(i),
+        'params': {'page': i % 10},
+        'headers': {'X-Test': {'value': str(i)}},
+        'expected': EXPECTED_FILE,
+        'responseCheckExceptions': [{'key': 'version', 'type': 'exist'}],
+        'extract': [{'name': 'v{}'.format(i), 'key': 'version'}]
+    }
+
+def get_benchmarks(full: bool) -> List[Tuple[str, Callable[[], Callable[[], Any]]]]:
+    '''
+    Return the benchmarks to run, with a function building the inputs of each one.
+    Inputs are built only for the benchmarks actually run
+
+    :param full: Whether to include the largest payloads and test counts
+    :type full:  bool
+
+    :return: Name of each benchmark and a function returning the function to time
+    :rtype:  List[Tuple[str, Callable[[], Callable[[], Any]]]]
+    '''
+    benchmarks = []
+    for label, size in (FULL_PAYLOAD_SIZES if full else PAYLOAD_SIZES):
+        # the payload of a size is shared by its benchmarks, built by the first one run
+        payload = functools.lru_cache(maxsize=None)(lambda s=size: make_payload(s))
+        benchmarks.append(('build_keys_list[{}]'.format(label), lambda p=payload: functools.partial(build_keys_list, p())))
+        benchmarks.append(('get_inner_key_value[{}]'.format(label), lambda p=payload: _get_inner_key_value(p())))
+        benchmarks.append(('check_result_content[{}]'.format(label), lambda p=payload: _check_result_content(p())))
+    for count in (10, 100):
+        benchmarks.append(('merge_headers_lists[{}]'.format(count), lambda c=count: _merge_headers_lists(c)))
+    benchmarks.append(('Header.value', _set_header_value))
+    for count in (FULL_TEST_COUNTS if full else TEST_COUNTS):
+        benchmarks.append(('ApiTest[{}]'.format(count), lambda c=count: _build_tests(c)))
+        benchmarks.append(('TestRun._summary[{}]'.format(count), lambda c=count: _get_summary(c)))
+    return benchmarks
+
+def _get_inner_key_value(payload: Dict[str, Any]) -> Callable[[], Any]:
+    '''
+    Return a function reading the last key of a payload
+
+    :param payload: The payload
+    :type payload:  Dict[str, Any]
+
+    :return: The function to time
+    :rtype:  Callable[[], Any]
+    '''
+    last_key = 'solutions.{}.segments.0.carrier'.format(len(payload['solutions']) - 1)
+    return functools.partial(get_inner_key_value, payload, last_key)
+
+def _check_result_content(payload: Dict[str, Any]) -> Callable[[], Any]:
+    '''
+    Return a function checking a payload against a copy of it.
+    The comparison plan is compiled once, as tests do, so that only the check is timed
+
+    :param payload: The payload
+    :type payload:  Dict[str, Any]
+
+    :return: The function to time
+    :rtype:  Callable[[], Any]
+    '''
+    expected = copy.deepcopy(payload)
+    plan = ComparisonPlan(expected)
+    return lambda: check_result_content(payload, expected, plan=plan)
+
+def _merge_headers_lists(count: int) -> Callable[[], Any]:
+    '''
+    Return a function merging two lists of headers, overlapping by half
+
+    :param count: Number of headers of the first list
+    :type count:  int
+
+    :return: The function to time
+    :rtype:  Callable[[], Any]
+    '''
+    list_a = [Header('X-A-{}'.format(i), {'value': str(i)}) for i in range(count)]
+    list_b = [Header('X-A-{}'.format(i), {'value': str(i)}) for i in range(0, count * 2, 2)]
+    return functools.partial(merge_headers_lists, list_a, list_b)
+
+def _set_header_value() -> Callable[[], Any]:
+    '''
+    Return a function setting the value of a header with a placeholder
+
+    :return: The function to time
+    :rtype:  Callable[[], Any]
+    '''
+    header = Header('Authorization', {'value': 'Bearer {}', 'placeholder': '{}'})
+    return lambda: setattr(header, 'value', 'token')
+
+def _build_tests(count: int) -> Callable[[], Any]:
+    '''
+    Return a function building the given number of tests
+
+    :param count: Number of tests
+    :type count:  int
+
+    :return: The function to time
+    :rtype:  Callable[[], Any]
+    '''
+    tests = [make_test(i) for i in range(count)]
+    shared = {'base_url': 'http://localhost:9093', 'headers': [], 'session_pool': SessionPool()}
+    return lambda: [ApiTest(shared, d) for d in tests]
+
+def _get_summary(tests: int) -> Callable[[], Any]:
+    '''
+    Build a Test Run with the results of the given number of tests
+
+    :param tests: Number of tests
+    :type tests:  int
+
+    :return: A function printing the summary of the run
+    :rtype:  Callable[[], Any]
+    '''
+    tr = TestRun(make_config(tests))
+    for s in tr.suites:
+        for t in s.tests:
+            s.test_results.add(t.name, TestStatus.SUCCESS, None, 0.01, 100, {'ttfb': 0.008, 'download': 0.002})
+    return tr._summary
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    '''
+    Time a function, calling it enough times to last about 0.2 seconds for each repetition
+
+    :param fn:     The function
+    :type fn:      Callable[[], Any]
+    :param repeat: Number of repetitions
+    :type repeat:  int
+
+    :return: Median and minimum time of a call, in seconds, and the calls per repetition
+    :rtype:  Dict[str, Any]
+    '''
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {'median': statistics.median(times), 'min': min(times), 'loops': number}
+
+def run(args: argparse.Namespace) -> int:
+    '''
+    Run the benchmarks, print and save the results, and compare them to a baseline if given
+
+    :param args: Command line arguments
+    :type args:  argparse.Namespace
+
+    :return: The exit code
+    :rtype:  int
+    '''
+    # the summary logs at INFO level: keep the formatting, drop the output
+    logging.disable(logging.CRITICAL)
+    results = {}
+    for name, setup in get_benchmarks(args.full):
+        if args.filter is not None and args.filter not in name:
+            continue
+        results[name] = measure(setup(), args.repeat)
+        print('{:<32} {:>14} (min {:>14}, {} loops)'.format(name, _format_time(results[name]['median']), _format_time(results[name]['min']), results[name]['loops']))
+    data = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+    if args.compare is not None:
+        return compare(load_results(args.compare), data, args.threshold)
+    return 0
+
+def load_results(path: str) -> Dict[str, Any]:
+    '''
+    Load a result file
+
+    :param path: Path of the result file
+    :type path:  str
+
+    :return: The results
+    :rtype:  Dict[str, Any]
+    '''
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != RESULTS_VERSION:
+        raise ValueError('Result file {} has a different format version: {}'.format(path, data.get('version')))
+    return data
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> int:
+    '''
+    Compare results to a baseline, printing the change of each benchmark
+
+    :param baseline:  The baseline results
+    :type baseline:   Dict[str, Any]
+    :param current:   The current results
+    :type current:    Dict[str, Any]
+    :param threshold: Relative slowdown of the median above which a benchmark regressed, e.g. 0.1 for 10%
+    :type threshold:  float
+
+    :return: The exit code: 1 if a benchmark regressed, 0 otherwise
+    :rtype:  int
+    '''
+    if (baseline.get('python'), baseline.get('machine')) != (current.get('python'), current.get('machine')):
+        print('warning: comparing results of Python {} on {} with Python {} on {}'.format(baseline.get('python'), baseline.get('machine'), current.get('python'), current.get('machine')))
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            print('{:<32} {:>14}  (new)'.format(name, _format_time(result['median'])))
+            continue
+        change = result['median'] / base['median'] - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print('{:<32} {:>14} -> {:>14} {:>+8.1%}{}'.format(name, _format_time(base['median']), _format_time(result['median']), change, '  REGRESSION' if regressed else ''))
+    for name in sorted(set(baseline['results']) - set(current['results'])):
+        print('{:<32} not run'.format(name))
+    if len(regressions) > 0:
+        print('{} benchmarks regressed by more than {:.0%}: {}'.format(len(regressions), threshold, ', '.join(regressions)))
+        return 1
+    print('No regression above {:.0%}'.format(threshold))
+    return 0
+
+def _format_time(seconds: float) -> str:
+    '''
+    Format a duration with a readable unit
+
+    :param seconds: The duration, in seconds
+    :type seconds:  float
+
+    :return: The formatted duration
+    :rtype:  str
+    '''
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.3f} {}'.format(seconds / scale, unit)
+    return '{:.1f} ns'.format(seconds / 1e-9)
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    '''
+    Parse command line arguments
+
+    :param argv: Command line arguments, without the program name
+    :type argv:  List[str]
+
+    :return: The parsed arguments
+    :rtype:  argparse.Namespace
+    '''
+    parser = argparse.ArgumentParser(prog='microbench', description='microbenchmarks of the hot paths of apitestframework')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--full', action='store_true', help='include payloads up to 50 MB and up to 100k tests')
+    run_parser.add_argument('--filter', help='run only the benchmarks whose name contains this text')
+    run_parser.add_argument('--repeat', type=int, default=5, help='number of repetitions of each benchmark (default: 5)')
+    run_parser.add_argument('--output', help='file to write the results to, usable as a baseline')
+    run_parser.add_argument('--compare', metavar='BASELINE', help='baseline file to compare the results to')
+    run_parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown above which a benchmark regressed (default: 0.1)')
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline', help='baseline result file')
+    compare_parser.add_argument('current', help='current result file')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown above which a benchmark regressed (default: 0.1)')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if args.command == 'compare':
+        sys.exit(compare(load_results(args.baseline), load_results(args.current), args.threshold))
+    sys.exit(run(args))
+
+if __name__ == '__main__':
+    main()
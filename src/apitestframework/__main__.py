@@ -18,15 +18,21 @@
 # limitations under the License.
 
 # system imports
+import argparse
 import logging
 import os
 import signal
 import sys
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 # local imports
+from apitestframework.core.load_run import LoadRun
+from apitestframework.core.snapshot import compile_snapshot, load_snapshot
+from apitestframework.core.stub_server import StubServer
 from apitestframework.core.test_run import TestRun
+from apitestframework.utils.cassette import Cassette
 from apitestframework.utils.config import get_conf_value, load_config
+from apitestframework.utils.log_utils import BODY_LOG_LENGTH, set_body_log_length, start_log_listener
 
 logger = None
 
@@ -42,7 +48,7 @@ def signal_handler(sig: int, frame):
     logger.warn('Handling signal {} before exiting!'.format(sig))
     sys.exit(0)
 
-def boot(config: Dict[str, Any]):
+def boot(config: Dict[str, Any], args: argparse.Namespace = None):
     '''
     Module starting point.
 
@@ -50,12 +56,160 @@ def boot(config: Dict[str, Any]):
 
     :param config: Configuration object
     :type config:  Dict[str, Any]
+    :param args:   Command line arguments
+    :type args:    argparse.Namespace
     '''
     # setup logger
     setup_logging(config)
-    # setup test run
-    test_run = TestRun(config)
-    test_run.run()
+    if args is not None and args.load:
+        # setup load run
+        load_run = LoadRun(apply_load_args(config, args))
+        if not load_run.run():
+            sys.exit(1)
+    else:
+        # setup test run
+        test_run = TestRun(apply_run_args(config, args))
+        test_run.run()
+
+def apply_load_args(config: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    '''
+    Override the load configuration with the values given on the command line
+
+    :param config: Configuration object
+    :type config:  Dict[str, Any]
+    :param args:   Command line arguments
+    :type args:    argparse.Namespace
+
+    :return: The configuration object
+    :rtype:  Dict[str, Any]
+    '''
+    load_config = dict(get_conf_value(config, 'load', {}))
+    # the load model given on the command line replaces the one of the configuration
+    if args.rate is not None:
+        load_config.pop('users', None)
+    if args.users is not None:
+        load_config.pop('rate', None)
+    for key in ('rate', 'users', 'duration', 'sample', 'suites'):
+        value = getattr(args, key)
+        if value is not None:
+            load_config[key] = value
+    config['load'] = load_config
+    return apply_cassette_args(config, args)
+
+def apply_run_args(config: Dict[str, Any], args: argparse.Namespace = None) -> Dict[str, Any]:
+    '''
+    Override the test run configuration with the values given on the command line
+
+    :param config: Configuration object
+    :type config:  Dict[str, Any]
+    :param args:   Command line arguments
+    :type args:    argparse.Namespace
+
+    :return: The configuration object
+    :rtype:  Dict[str, Any]
+    '''
+    if args is not None:
+        for key in ('workers', 'shard', 'runtimes', 'deadline', 'runState'):
+            value = getattr(args, key)
+            if value is not None:
+                config[key] = value
+        for key in ('changed', 'failedFirst'):
+            if getattr(args, key):
+                config[key] = True
+    return apply_cassette_args(config, args)
+
+def apply_cassette_args(config: Dict[str, Any], args: argparse.Namespace = None) -> Dict[str, Any]:
+    '''
+    Override the cassette configuration with the one given on the command line
+
+    :param config: Configuration object
+    :type config:  Dict[str, Any]
+    :param args:   Command line arguments
+    :type args:    argparse.Namespace
+
+    :return: The configuration object
+    :rtype:  Dict[str, Any]
+    '''
+    if args is not None:
+        if args.record is not None:
+            # emptied once by main, before the first configuration: each one appends its responses
+            config['cassette'] = {'mode': 'record', 'file': args.record, 'append': True}
+        elif args.replay is not None:
+            config['cassette'] = {'mode': 'replay', 'file': args.replay}
+    return config
+
+def apply_stub_args(config: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    '''
+    Override the stub server configuration with the values given on the command line
+
+    :param config: Configuration object
+    :type config:  Dict[str, Any]
+    :param args:   Command line arguments
+    :type args:    argparse.Namespace
+
+    :return: The stub server configuration object
+    :rtype:  Dict[str, Any]
+    '''
+    stub_config = dict(get_conf_value(config, 'stub', {}))
+    for key in ('host', 'port', 'latency', 'jitter', 'inflate'):
+        value = getattr(args, key)
+        if value is not None:
+            stub_config[key] = value
+    return stub_config
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    '''
+    Parse command line arguments
+
+    :param argv: Command line arguments, without the program name
+    :type argv:  List[str]
+
+    :return: The parsed arguments
+    :rtype:  argparse.Namespace
+    '''
+    if len(argv) > 0 and argv[0] == 'compile':
+        parser = argparse.ArgumentParser(prog='apitestframework compile', description='validate configuration files and the expected result files they reference, writing them to snapshots loaded by the following runs with --snapshot')
+        parser.add_argument('config', nargs='*', help='configuration file (json format). The snapshot is written next to it')
+        args = parser.parse_args(argv[1:])
+        args.command = 'compile'
+        return args
+    if len(argv) > 0 and argv[0] == 'stub':
+        parser = argparse.ArgumentParser(prog='apitestframework stub', description='start a local HTTP server answering the tests of a configuration file with their expected results')
+        parser.add_argument('config', nargs=1, help='configuration file (json format)')
+        parser.add_argument('--host', help='address to listen on (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, help='port to listen on (default: 8080)')
+        parser.add_argument('--latency', type=float, help='milliseconds to wait before answering')
+        parser.add_argument('--jitter', type=float, help='maximum milliseconds randomly added to the latency')
+        parser.add_argument('--inflate', type=float, help='factor to multiply the size of the responses by')
+        args = parser.parse_args(argv[1:])
+        args.command = 'stub'
+        return args
+    parser = argparse.ArgumentParser(prog='apitestframework', epilog='use "apitestframework compile <config>" to compile configuration files into snapshots loaded with --snapshot, "apitestframework stub <config>" to serve their expected results')
+    parser.add_argument('config', nargs='*', help='configuration file (json format). Each one is a Test Run')
+    parser.add_argument('--snapshot', action='store_true', help='load the configuration files from the snapshots written by "compile", rebuilding them if stale')
+    parser.add_argument('--deadline', type=float, help='seconds the whole run can last. Tests not run in time are reported as timed out')
+    distribution = parser.add_argument_group('distribution')
+    distribution.add_argument('--workers', type=int, help='number of processes running the test suites')
+    distribution.add_argument('--shard', help='run only a share of the test suites, as i/N, to split a run across machines')
+    distribution.add_argument('--runtimes', help='file of the runtimes of past runs, used to balance the shards and updated after the run')
+    recording = parser.add_argument_group('recording').add_mutually_exclusive_group()
+    recording.add_argument('--record', metavar='FILE', help='record the responses to a cassette file')
+    recording.add_argument('--replay', metavar='FILE', help='serve the responses from a cassette file, without using the network')
+    incremental = parser.add_argument_group('incremental runs')
+    incremental.add_argument('--state', dest='runState', metavar='FILE', help='file of the inputs and results of the tests of past runs, updated after the run')
+    incremental.add_argument('--changed', action='store_true', help='run only the tests whose inputs changed or that did not succeed last time, reusing the other results')
+    incremental.add_argument('--failed-first', dest='failedFirst', action='store_true', help='run first the test suites with tests that did not succeed last time')
+    load = parser.add_argument_group('load testing')
+    load.add_argument('--load', action='store_true', help='replay the test suites to generate load instead of running them once')
+    model = load.add_mutually_exclusive_group()
+    model.add_argument('--rate', type=float, help='chains started per second (open model)')
+    model.add_argument('--users', type=int, help='virtual users running chains in a loop (closed model)')
+    load.add_argument('--duration', type=float, help='seconds of load')
+    load.add_argument('--sample', type=float, help='share of the responses whose content is checked, between 0 and 1')
+    load.add_argument('--suite', dest='suites', action='append', help='name of a suite to run. Can be repeated. Defaults to all suites')
+    args = parser.parse_args(argv)
+    args.command = 'run'
+    return args
 
 def setup_logging(config: Dict[str, Any]):
     '''
@@ -65,17 +219,24 @@ def setup_logging(config: Dict[str, Any]):
     :type config:  Dict[str, Any]
     '''
     global logger
+    if logger is not None:
+        # already set up, by the first configuration
+        return
     handlers = []
+    log_level = get_conf_value(config, 'logLevel', 10)
 
     # setup console logger
     # possible format :-> [%(asctime)s] [%(levelname)s] [%(filename)s:%(lineno)d] %(message)s'
     console_formatter = logging.Formatter('[%(asctime)s] %(message)s')
     console = logging.StreamHandler()
-    console.setLevel(get_conf_value(config, 'logLevel', 10))
+    console.setLevel(log_level)
     console.setFormatter(console_formatter)
     handlers.append(console)
 
-    logging.basicConfig(handlers=handlers, level=logging.DEBUG)
+    # records are written by a background thread, so that tests do not wait for the console
+    logging.basicConfig(handlers=[start_log_listener(handlers)], level=log_level)
+    # logBodyLength: maximum length of the bodies written to the logs, 0 for whole bodies
+    set_body_log_length(get_conf_value(config, 'logBodyLength', BODY_LOG_LENGTH))
     logger = logging.getLogger(__name__)
 
 def main():
@@ -85,11 +246,22 @@ def main():
     # setup for signal trapping
     signal.signal(signal.SIGINT, signal_handler)
     # start up with command line arguments check
-    if len(sys.argv) > 1:
-        for arg in sys.argv[1:]:
-            config_file = arg
-            config = load_config(config_file)
-            boot(config)
+    args = parse_args(sys.argv[1:])
+    if args.command == 'stub':
+        config = load_config(args.config[0])
+        setup_logging(config)
+        StubServer(config, apply_stub_args(config, args)).serve_forever()
+    elif len(args.config) > 0:
+        if args.command == 'run' and args.record is not None:
+            Cassette({'mode': 'record', 'file': args.record}).reset()
+        for config_file in args.config:
+            if args.command == 'compile':
+                setup_logging(load_config(config_file))
+                compile_snapshot(config_file)
+            else:
+                # use the snapshot of the configuration only if asked for
+                config = load_snapshot(config_file) if args.snapshot else load_config(config_file)
+                boot(config, args)
     else:
         sys.exit('Missing configuration file (json format).')
 
@@ -18,22 +18,36 @@
 # limitations under the License.
 
 # system imports
+import copy
 import json
 import logging
 import os
 import requests
+import time
 import traceback
 import urllib3
 from datetime import datetime
 from typing import Any, Dict, List, Tuple
+from urllib.parse import urlparse
 
 # local imports
-from apitestframework.utils.api_test_utils import check_result_code, check_result_content
+from apitestframework.utils.api_test_utils import check_result_code, diff_result_content, diff_stream_content
+from apitestframework.utils.comparison_plan import ARRAY_MODES
 from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.deadline import Deadline
+from apitestframework.utils.fixture_cache import fixture_cache
 from apitestframework.utils.header import Header
 from apitestframework.utils.header_utils import get_headers_list, merge_headers_lists
-from apitestframework.utils.misc import build_keys_list, get_inner_key_value, set_inner_key_value
+from apitestframework.utils.json_codec import json_codec
+from apitestframework.utils.json_diff import JsonDiff
+from apitestframework.utils.key_path import compile_key
+from apitestframework.utils.log_utils import LogBody
+from apitestframework.utils.request_template import RequestTemplate
+from apitestframework.utils.retry_policy import HedgePolicy, RetryPolicy
+from apitestframework.utils.session_pool import SessionPool
+from apitestframework.utils.stream_check import CHUNK_SIZE, ResponseReader, check_stream, ijson, read_chunk
 from apitestframework.utils.test_status import TestStatus
+from apitestframework.utils.timing import NETWORK_PHASES, PhaseTimer, start_connection_timing, stop_connection_timing
 
 logger = logging.getLogger(__name__)
 
@@ -55,42 +69,90 @@ class ApiTest(object):
         if not self._verify_ssl:
             urllib3.disable_warnings()
         self._output = None
+        self._extracted = {}
+        self._elapsed = None
+        self._timings = {}
+        self._response_size = None
+        self._attempts = []
+        self._diff = None
         self._status = TestStatus.PENDING
 
     # ---------------------------
     # ----- Public methods ------
     # ---------------------------
 
-    def run(self) -> Tuple[TestStatus, Dict[str, Any]]:
+    def run(self, check_content: bool = True) -> Tuple[TestStatus, Dict[str, Any]]:
         '''
         Execute an API call
 
+        :param check_content: Whether to check the response content against the expected one
+        :type check_content:  bool
+
         :return: The test status and the call response
         :rtype:  Tuple[TestStatus, Dict[str, Any]]
         '''
         # set as running
         self._status = TestStatus.RUNNING
-        headers = self._get_headers()
+        self._diff = None
+        timer = PhaseTimer()
+        self._timings = timer.timings
+        self.load_expected()
         # debug info
-        logger.debug('~~~~~~~~~~')
-        logger.info('Running Test: "{}"...'.format(self._name))
-        logger.debug('URL :: {} {}'.format(self._method, self._url))
-        logger.debug('params :: {}'.format(self._params))
-        logger.debug('payload :: {}'.format(str(self._payload)))
-        logger.debug('headers :: {}'.format(str(headers)))
-        # actual call
-        r = requests.request(self._method, self._url, headers=headers, json=self._payload, params=self._params, verify=self._verify_ssl)
+        logger.info('Running Test: "%s"...', self._name)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('~~~~~~~~~~')
+            logger.debug('URL :: %s %s', self._method, self._url)
+            logger.debug('params :: %s', self._params)
+            logger.debug('payload :: %s', LogBody(self._payload))
+            logger.debug('headers :: %s', self._get_headers())
+        # build the request, on a session borrowed from the pool, patching the one of the last run
+        session = self._session_pool.session(self._url, self._verify_ssl)
+        prepared, settings = self._request.prepare(session, self._url, self._params, self._payload, self._verify_ssl)
+        # the call never goes past the deadline of the run
+        settings['timeout'] = self._deadline.clamp((self._connect_timeout, self._read_timeout))
+        timer.mark('build')
+        # actual call, returning as soon as the response headers are received, sent again on transient errors
+        r, error = self._send(session, prepared, settings, timer)
+        if error is not None:
+            if not _is_timeout(error):
+                raise error
+            return self._timed_out(error)
+        if self._stream:
+            return self._run_stream(r, timer, check_content)
+        try:
+            if not _download(r, self._deadline):
+                r.close()
+                timer.mark('download')
+                return self._timed_out(requests.Timeout('Deadline passed while downloading the response'))
+            self._response_size = len(r.content)
+        except requests.ConnectionError as e:
+            if not _is_timeout(e):
+                raise
+            r.close()
+            timer.mark('download')
+            return self._timed_out(e)
+        timer.mark('download')
+        self._elapsed = sum(self._timings.get(p, 0.0) for p in NETWORK_PHASES)
         # parse response
         try:
-            self._output = r.json()
+            self._output = json_codec.loads_response(r)
         except json.decoder.JSONDecodeError as e:
-            logger.error('Error while parsing JSON response: {}'.format(r.text))
-            logger.error(str(e))
+            logger.error('Error while parsing JSON response: %s', LogBody(r.text))
+            logger.error('%s', e)
             self._status = TestStatus.FAILURE
+            timer.mark('parse')
             return self._status, r.text
+        timer.mark('parse')
         # check result and set new status
-        self._status_content = check_result_content(self._output, self._expected_result, self._expected_result_file, self._response_check_exceptions)
+        if check_content:
+            diff = diff_result_content(self._output, self._expected_result, self._expected_result_file, self._response_check_exceptions, self._comparison_plan, self._diff_config, self._fail_fast)
+            self._status_content = len(diff) == 0
+            self._diff = diff if len(diff) > 0 else None
+        else:
+            self._status_content = True
+        timer.mark('content_check')
         self._status_code = check_result_code(r.status_code, self._expected_result_code)
+        timer.mark('code_check')
         if self._status_content and self._status_code:
             self._status = TestStatus.SUCCESS
         else:
@@ -98,6 +160,27 @@ class ApiTest(object):
         # return result
         return self._status, self._output
 
+    def load_expected(self, cache: bool = True):
+        '''
+        Load the expected result and its comparison plan from the shared cache, if not loaded yet.
+        Done by the first run, unless called before
+
+        :param cache: Whether to keep the file in the shared cache, for the other tests using it
+        :type cache:  bool
+        '''
+        if self._comparison_plan is None:
+            if cache:
+                self._expected_result = fixture_cache.load(self._expected_result_file)
+                self._comparison_plan = fixture_cache.plan(self._expected_result_file, self._response_check_exceptions, self._array_match)
+            else:
+                self._expected_result, self._comparison_plan = fixture_cache.read(self._expected_result_file, self._response_check_exceptions, self._array_match)
+
+    def clear_output(self):
+        '''
+        Drop the response of the last API call, once it is not needed anymore
+        '''
+        self._output = None
+
     def extract_values(self) -> Dict[str, Any]:
         '''
         Extract values from APi call output
@@ -105,12 +188,12 @@ class ApiTest(object):
         :return: Values from APi call output
         :rtype:  Dict[str, Any]
         '''
+        if self._stream:
+            return dict(self._extracted)
         values = {}
         if self._output is not None:
-            for k in self._extract:
-                n = k['name']
-                v = get_inner_key_value(self._output, k['key'])
-                values[n] = v
+            for n, key_path in self._extract_paths:
+                values[n] = key_path.get(self._output)
         return values
 
     def inject_values(self, values: Dict[str, Any]):
@@ -120,13 +203,15 @@ class ApiTest(object):
         :param values: Available values to inject
         :type values:  Dict[str, Any]
         '''
+        # start over from the configured URL, so that path values are not appended more than once
+        self._url = self._orig_url
         for v in self._inject:
             value_name = v['name']
             try:
                 injecting_value = values[value_name]
             except KeyError:
                 # values to inject not present in given values
-                logger.warn('Value {} not present in given dict :: {}'.format(value_name, values))
+                logger.warning('Value %s not present in given dict :: %s', value_name, LogBody(values))
                 continue
             value_type = v['type']
             if value_type == 'body':
@@ -165,18 +250,42 @@ class ApiTest(object):
         self._url = base_url + get_conf_value(data, 'path', '')
         if self._url is None or self._url == '':
             raise ValueError('[Test {}] Missing URL'.format(self._name))
+        self._orig_url = self._url
         # verify_ssl: whether to validate self-signed certificates
         self._verify_ssl = verify_ssl
+        # session_pool: pool of HTTP sessions to borrow the connection from
+        self._session_pool = get_conf_value(shared_config, 'session_pool')
+        if self._session_pool is None:
+            self._session_pool = SessionPool()
+        # connectTimeout/readTimeout: seconds to wait for the connection and for each read, by default those of the suite
+        self._connect_timeout = get_conf_value(data, 'connectTimeout', get_conf_value(shared_config, 'connect_timeout'))
+        self._read_timeout = get_conf_value(data, 'readTimeout', get_conf_value(shared_config, 'read_timeout'))
+        # deadline: time limit of the run
+        self._deadline = get_conf_value(shared_config, 'deadline') or Deadline()
+        # retry: when to send the call again on transient errors, by default the policy of the suite
+        retry = get_conf_value(data, 'retry', get_conf_value(shared_config, 'retry'))
+        self._retry_policy = RetryPolicy(retry)
+        # hedge: when to send a duplicate of a slow call, by default the policy of the suite
+        hedge = get_conf_value(data, 'hedge', get_conf_value(shared_config, 'hedge'))
+        self._hedge_policy = HedgePolicy(hedge) if hedge is not None else None
         # method: HTTP method for the call
         self._method = get_conf_value(data, 'method', 'GET').upper()
         # payload: body for the call
         self._payload = get_conf_value(data, 'payload')
         # params: URL parameters
         self._params = get_conf_value(data, 'params')
+        # stream: whether to check the response while it is downloaded, without keeping it in memory
+        self._stream = get_conf_value(data, 'stream', False)
+        if self._stream and ijson is None:
+            logger.warning('[Test %s] Streaming checks need the ijson package: the response will be loaded in memory', self._name)
+            self._stream = False
         # headers
         shared_headers = get_conf_value(shared_config, 'headers', [])
         test_headers = get_headers_list(data)
-        self._headers = merge_headers_lists(shared_headers, test_headers)
+        # copies, as injected values change them and the shared ones are used by the other tests of the suite
+        self._headers = [copy.copy(h) for h in merge_headers_lists(shared_headers, test_headers)]
+        # the request, prepared on the first run and then patched by the injected values
+        self._request = RequestTemplate(self._method, self._headers)
         # expected: path to file containing the expected result body for the call. File content interpreted as json
         self._expected_result_file = get_conf_value(data, 'expected')
         if self._expected_result_file is None or self._expected_result_file == '':
@@ -185,16 +294,159 @@ class ApiTest(object):
             self._expected_result_file = os.path.join(os.getcwd(), self._expected_result_file)
         if not os.path.exists(self._expected_result_file):
             raise FileNotFoundError('[Test {}] Could not find expected result file: "{}"'.format(self._name, self._expected_result_file))
-        with open(self._expected_result_file, 'r', encoding='utf-8') as res:
-            self._expected_result = json.load(res)
+        # the file is parsed on first use, once for all the tests referencing it
+        self._expected_result = None
+        self._comparison_plan = None
         # expected_code: the expected status code the call should return
         self._expected_result_code = get_conf_value(data, 'expected_code', 200)
         # response_check_exceptions: list of fields in the response body to ignore when checking the result
         self._response_check_exceptions = get_conf_value(data, 'responseCheckExceptions', [])
+        # diff: how many differences to keep when the content check fails, and how long their values
+        self._diff_config = get_conf_value(shared_config, 'diff')
+        # stop the content check at the maximum number of differences when the suite stops at the first failure
+        self._fail_fast = get_conf_value(shared_config, 'exit_on_error', False)
+        # array_match: how to match arrays of the response body, by default in order
+        self._array_match = get_conf_value(data, 'arrayMatch', [])
+        for m in self._array_match:
+            if m.get('mode') not in ARRAY_MODES:
+                raise ValueError('[Test {}] Non-valid array match mode: {}'.format(self._name, m.get('mode')))
         # extract: list of fields to extract from the response
         self._extract = get_conf_value(data, 'extract', [])
+        self._extract_paths = [(e['name'], compile_key(e['key'])) for e in self._extract]
         # inject: list of fields we need to have injected for the call to be successful
         self._inject = get_conf_value(data, 'inject', [])
+        self._inject_paths = {v['key']: compile_key(v['key']) for v in self._inject if v['type'] == 'body'}
+        # the test configuration with the settings inherited from the suite, before any value is injected
+        self._definition = {
+            'test': data,
+            'url': self._orig_url,
+            'verifySsl': self._verify_ssl,
+            'headers': [[h.key, h.value] for h in self._headers],
+            'connectTimeout': self._connect_timeout,
+            'readTimeout': self._read_timeout,
+            'retry': retry,
+            'hedge': hedge
+        }
+
+    def _run_stream(self, r: requests.Response, timer: PhaseTimer, check_content: bool = True) -> Tuple[TestStatus, Dict[str, Any]]:
+        '''
+        Check a streamed response while it is downloaded, keeping only the extracted values and the first mismatches.
+
+        Download, parsing and content check happen together, and are all timed as download
+
+        :param r:             The streamed response
+        :type r:              requests.Response
+        :param timer:         The timer of the test phases
+        :type timer:          PhaseTimer
+        :param check_content: Whether to check the response content against the expected one
+        :type check_content:  bool
+
+        :return: The test status and a summary of the response: bytes read, number of mismatches and the first ones
+        :rtype:  Tuple[TestStatus, Dict[str, Any]]
+        '''
+        reader = ResponseReader(r.raw, self._deadline)
+        timeout_error = None
+        try:
+            mismatches, count, self._extracted = check_stream(reader, self._comparison_plan, self._extract)
+        except ijson.JSONError as e:
+            logger.error('Error while parsing JSON response after %d bytes: %s', reader.bytes_read, e)
+            self._status = TestStatus.FAILURE
+            return self._status, None
+        except (urllib3.exceptions.ReadTimeoutError, requests.Timeout) as e:
+            timeout_error = e
+        finally:
+            r.close()
+            self._response_size = reader.bytes_read
+            timer.mark('download')
+            self._elapsed = sum(self._timings.get(p, 0.0) for p in NETWORK_PHASES)
+        if timeout_error is not None:
+            return self._timed_out(timeout_error)
+        # check result and set new status
+        if check_content:
+            diff = diff_stream_content(mismatches, count, self._expected_result_file, self._diff_config, self._comparison_plan.array_keys)
+            self._status_content = len(diff) == 0
+            self._diff = diff if len(diff) > 0 else None
+        else:
+            self._status_content = True
+        timer.mark('content_check')
+        self._status_code = check_result_code(r.status_code, self._expected_result_code)
+        timer.mark('code_check')
+        if self._status_content and self._status_code:
+            self._status = TestStatus.SUCCESS
+        else:
+            self._status = TestStatus.FAILURE
+        return self._status, {
+            'bytes': reader.bytes_read,
+            'mismatches': count,
+            'excerpt': mismatches
+        }
+
+    def _send(self, session: requests.Session, prepared: requests.PreparedRequest, settings: Dict[str, Any], timer: PhaseTimer) -> Tuple[requests.Response, requests.ConnectionError]:
+        '''
+        Send the request, again as long as the retry policy asks to, recording each attempt
+
+        :param session:  The session to send the request with
+        :type session:   requests.Session
+        :param prepared: The request
+        :type prepared:  requests.PreparedRequest
+        :param settings: The send settings
+        :type settings:  Dict[str, Any]
+        :param timer:    The timer of the test phases
+        :type timer:     PhaseTimer
+
+        :return: The response of the last attempt, or its connection error
+        :rtype:  Tuple[requests.Response, requests.ConnectionError]
+        '''
+        self._attempts = []
+        attempt = 1
+        while True:
+            start = time.perf_counter()
+            if self._hedge_policy is not None:
+                (r, error, parts, _), hedged = self._hedge_policy.send(self._method, (self._method, self._orig_url), lambda: _send_timed(session, prepared, settings))
+            else:
+                (r, error, parts, _), hedged = _send_timed(session, prepared, settings), False
+            timer.mark('ttfb', parts)
+            self._attempts.append({
+                'attempt': attempt,
+                'status': r.status_code if r is not None else None,
+                'error': type(error).__name__ if error is not None else None,
+                'elapsed': time.perf_counter() - start,
+                'hedged': hedged
+            })
+            if not self._retry_policy.should_retry(self._method, attempt, r, error):
+                return r, error
+            delay = self._retry_policy.get_delay(attempt, r)
+            remaining = self._deadline.remaining()
+            if remaining is not None and delay >= remaining:
+                return r, error
+            if r is not None:
+                # read the body, so that the connection can be reused
+                try:
+                    r.content
+                except requests.ConnectionError:
+                    pass
+                r.close()
+                timer.mark('download')
+            logger.warning('[Test %s] Attempt %d failed with %s: retrying in %.3fs', self._name, attempt, r.status_code if r is not None else error, delay)
+            self._attempts[-1]['wait'] = delay
+            time.sleep(delay)
+            timer.mark('backoff')
+            attempt += 1
+
+    def _timed_out(self, error: Exception) -> Tuple[TestStatus, Any]:
+        '''
+        Set the test as stopped by a timeout
+
+        :param error: The timeout error
+        :type error:  Exception
+
+        :return: The test status and no response
+        :rtype:  Tuple[TestStatus, Any]
+        '''
+        logger.error('[Test %s] Call timed out: %s', self._name, error)
+        self._elapsed = sum(self._timings.get(p, 0.0) for p in NETWORK_PHASES)
+        self._status = TestStatus.TIMEOUT
+        return self._status, None
 
     def _get_headers(self) -> Dict[str, Any]:
         '''
@@ -218,7 +470,11 @@ class ApiTest(object):
         :param injecting_value: Value to inject into the body
         :type injecting_value:  Any
         '''
-        set_inner_key_value(self._payload, value_key, injecting_value)
+        if self._payload is not None:
+            key_path = self._inject_paths[value_key]
+            if key_path.wildcard or injecting_value is None or key_path.get(self._payload) != injecting_value:
+                key_path.set(self._payload, injecting_value)
+                self._request.body_changed()
 
     def _inject_query(self, value_key: str, injecting_value: Any):
         '''
@@ -231,7 +487,9 @@ class ApiTest(object):
         '''
         if self._params is None:
             self._params = {}
-        self._params[value_key] = injecting_value
+        if value_key not in self._params or self._params[value_key] != injecting_value:
+            self._params[value_key] = injecting_value
+            self._request.url_changed()
 
     def _inject_path(self, injecting_value: Any):
         '''
@@ -284,6 +542,111 @@ class ApiTest(object):
         '''
         return self._name
 
+    @property
+    def expected_file(self) -> str:
+        '''
+        Return the path of the file containing the expected result
+
+        :return: The path of the expected result file
+        :rtype:  str
+        '''
+        return self._expected_result_file
+
+    @property
+    def definition(self) -> Dict[str, Any]:
+        '''
+        Return the test configuration with the settings inherited from the suite, headers included,
+        before any value is injected
+
+        :return: The resolved test configuration
+        :rtype:  Dict[str, Any]
+        '''
+        return self._definition
+
+    @property
+    def extract_names(self) -> List[str]:
+        '''
+        Return the names of the values this test extracts from its output
+
+        :return: The names of the extracted values
+        :rtype:  List[str]
+        '''
+        return [e['name'] for e in self._extract]
+
+    @property
+    def inject_names(self) -> List[str]:
+        '''
+        Return the names of the values this test needs injected
+
+        :return: The names of the injected values
+        :rtype:  List[str]
+        '''
+        return [i['name'] for i in self._inject]
+
+    @property
+    def host(self) -> str:
+        '''
+        Return the host (and port) this test calls
+
+        :return: The host this test calls
+        :rtype:  str
+        '''
+        return urlparse(self._url).netloc
+
+    @property
+    def elapsed(self) -> float:
+        '''
+        Return the duration of the last API call, in seconds
+
+        :return: The duration of the last API call
+        :rtype:  float
+        '''
+        return self._elapsed
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        '''
+        Return the time spent in each phase of the last run, in seconds.
+        See utils.timing.PHASES for the phases
+
+        :return: The time spent in each phase of the last run
+        :rtype:  Dict[str, float]
+        '''
+        return self._timings
+
+    @property
+    def response_size(self) -> int:
+        '''
+        Return the size of the body of the last API call response, in bytes
+
+        :return: The size of the last response body
+        :rtype:  int
+        '''
+        return self._response_size
+
+    @property
+    def attempts(self) -> List[Dict[str, Any]]:
+        '''
+        Return the calls sent by the last test run, if retried or hedged: for each one number, status code or error,
+        time to the response headers, whether a duplicate was sent and the time waited before the next one
+
+        :return: The calls sent, None if there was a single one
+        :rtype:  List[Dict[str, Any]]
+        '''
+        if len(self._attempts) > 1 or any(a['hedged'] for a in self._attempts):
+            return self._attempts
+        return None
+
+    @property
+    def diff(self) -> JsonDiff:
+        '''
+        Return the differences found by the content check of the last run, if it failed
+
+        :return: The differences found, None if the content matched or was not checked
+        :rtype:  JsonDiff
+        '''
+        return self._diff
+
     @property
     def status(self) -> TestStatus:
         '''
@@ -293,3 +656,74 @@ class ApiTest(object):
         :rtype:  TestStatus
         '''
         return self._status
+
+def _send_timed(session: requests.Session, prepared: requests.PreparedRequest, settings: Dict[str, Any]) -> Tuple[requests.Response, requests.ConnectionError, Dict[str, float], float]:
+    '''
+    Send a request, measuring the time spent opening connections
+
+    :param session:  The session to send the request with
+    :type session:   requests.Session
+    :param prepared: The request
+    :type prepared:  requests.PreparedRequest
+    :param settings: The send settings
+    :type settings:  Dict[str, Any]
+
+    :return: The response or the connection error, the time spent on connections and the time to the response headers
+    :rtype:  Tuple[requests.Response, requests.ConnectionError, Dict[str, float], float]
+    '''
+    start = time.perf_counter()
+    start_connection_timing()
+    try:
+        r, error = session.send(prepared, **settings), None
+    except requests.ConnectionError as e:
+        r, error = None, e
+    finally:
+        parts = stop_connection_timing()
+    return r, error, parts, time.perf_counter() - start
+
+def _download(r: requests.Response, deadline: Deadline) -> bool:
+    '''
+    Read the body of a response sent as a stream. With a deadline, the body is read
+    in chunks as they arrive, stopping as soon as the deadline passes
+
+    :param r:        The response
+    :type r:         requests.Response
+    :param deadline: The time limit of the run
+    :type deadline:  Deadline
+
+    :return: Whether the whole body was read before the deadline
+    :rtype:  bool
+    '''
+    if deadline.remaining() is None or r._content_consumed:
+        r.content
+        return True
+    chunks = []
+    while True:
+        if deadline.expired:
+            return False
+        chunk = read_chunk(r.raw, CHUNK_SIZE)
+        if len(chunk) == 0:
+            break
+        chunks.append(chunk)
+    r._content = b''.join(chunks)
+    r._content_consumed = True
+    r.raw.release_conn()
+    return True
+
+def _is_timeout(error: requests.ConnectionError) -> bool:
+    '''
+    Return whether a connection error was raised by a timeout, connecting or reading the response
+
+    :param error: The connection error
+    :type error:  requests.ConnectionError
+
+    :return: Whether the error is a timeout
+    :rtype:  bool
+    '''
+    if isinstance(error, requests.Timeout):
+        return True
+    cause = error.args[0] if len(error.args) > 0 else None
+    # with transport retries the timeout is wrapped in the retry error
+    if isinstance(cause, urllib3.exceptions.MaxRetryError):
+        cause = cause.reason
+    return isinstance(cause, urllib3.exceptions.TimeoutError)
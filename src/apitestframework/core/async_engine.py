@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+# local imports
+from apitestframework.utils.config import get_conf_value
+
+logger = logging.getLogger(__name__)
+
+class AsyncEngine(object):
+    '''
+    Run test suites concurrently, each one as its own coroutine.
+
+    Calls are sent through the shared session pool on a thread pool, with a global limit
+    on the number of calls in flight and a limit for each host
+    '''
+
+    def __init__(self, data: Dict[str, Any] = None):
+        '''
+        Initialize the engine
+
+        :param data: Concurrency configuration object
+        :type data:  Dict[str, Any]
+        '''
+        # global: maximum number of calls in flight
+        self._max_global = get_conf_value(data, 'global', 10)
+        # perHost: maximum number of calls in flight against the same host
+        self._max_per_host = get_conf_value(data, 'perHost', 4)
+        self._executor = None
+        self._global_semaphore = None
+        self._host_semaphores = {}
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def run(self, suites: List['TestSuite']):
+        '''
+        Run the given suites concurrently, returning when all of them are done
+
+        :param suites: The suites to run
+        :type suites:  List[TestSuite]
+        '''
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._run_suites(suites))
+        finally:
+            loop.close()
+
+    async def call(self, host: str, func: Callable, *args) -> Any:
+        '''
+        Execute a blocking call against a host, waiting for a free slot
+
+        :param host: The host the call is for
+        :type host:  str
+        :param func: The function making the call
+        :type func:  Callable
+        :param args: Arguments of the function
+        :type args:  Any
+
+        :return: The function result
+        :rtype:  Any
+        '''
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = asyncio.Semaphore(self._max_per_host)
+            self._host_semaphores[host] = host_semaphore
+        async with self._global_semaphore:
+            async with host_semaphore:
+                return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    async def _run_suites(self, suites: List['TestSuite']):
+        '''
+        Run the given suites, one coroutine each
+
+        :param suites: The suites to run
+        :type suites:  List[TestSuite]
+        '''
+        logger.debug('Running {} suites concurrently (max {} calls, {} per host)'.format(len(suites), self._max_global, self._max_per_host))
+        self._global_semaphore = asyncio.Semaphore(self._max_global)
+        self._host_semaphores = {}
+        with ThreadPoolExecutor(max_workers=self._max_global) as executor:
+            self._executor = executor
+            try:
+                await asyncio.gather(*[s.run_async(self) for s in suites])
+            finally:
+                self._executor = None
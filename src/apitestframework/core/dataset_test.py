@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlparse
+
+# local imports
+from .api_test import ApiTest
+from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.dataset import get_dataset_format, has_placeholders, iter_rows, render
+from apitestframework.utils.deadline import Deadline
+from apitestframework.utils.json_diff import JsonDiff
+from apitestframework.utils.test_status import TestStatus
+from apitestframework.utils.timing import sum_timings
+
+logger = logging.getLogger(__name__)
+
+# configuration entries of the dataset test not passed to the test of each row
+DATASET_KEYS = ('dataset', 'datasetFormat', 'groupBy')
+# group of the rows when they are not grouped by a column
+DEFAULT_GROUP = 'all'
+# maximum number of failed rows listed for each group
+MAX_FAILED_ROWS = 10
+
+class DatasetTest(object):
+    '''
+    A Test against an API run once for each row of a dataset file.
+
+    The test configuration is a template whose ${column} placeholders are filled in with the values of each row.
+    Rows are read one at a time and run on the suite workers, and their results aggregated by group
+    '''
+
+    def __init__(self, shared_config: Dict[str, Any], data: Dict[str, Any]):
+        '''
+        Initialize the test parameters
+
+        :param shared_config: Configuration entries shared by all tests in a suite
+        :type shared_config:  Dict[str, Any]
+        :param data:          The source data for this test
+        :type data:           Dict[str, Any]
+        '''
+        self._init_from_data(shared_config, data)
+        self._output = None
+        self._injected = {}
+        self._elapsed = None
+        self._timings = {}
+        self._response_size = None
+        self._diff = None
+        self._status = TestStatus.PENDING
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def run(self, check_content: bool = True) -> Tuple[TestStatus, Dict[str, Any]]:
+        '''
+        Execute the API call of each row of the dataset
+
+        :param check_content: Whether to check the response contents against the expected ones
+        :type check_content:  bool
+
+        :return: The test status and the results of the rows, by group
+        :rtype:  Tuple[TestStatus, Dict[str, Any]]
+        '''
+        self._status = TestStatus.RUNNING
+        self._diff = None
+        self._timings = {}
+        self._response_size = 0
+        logger.info('Running Dataset Test: "%s" on %s...', self._name, self._dataset_file)
+        start = time.perf_counter()
+        groups = {}
+        count = 0
+        completed = False
+        stop = False
+        rows = iter_rows(self._dataset_file, self._dataset_format)
+        try:
+            with ThreadPoolExecutor(max_workers=self._workers) as executor:
+                running = {}
+                while True:
+                    # keep a bounded number of rows in flight, so that memory does not depend on the dataset size
+                    while not stop and len(running) < self._workers * 2:
+                        if self._deadline.expired:
+                            stop = True
+                            break
+                        row = next(rows, None)
+                        if row is None:
+                            stop = completed = True
+                            break
+                        count += 1
+                        running[executor.submit(self._run_row, count, row, check_content)] = (count, self._get_group(row))
+                    if len(running) == 0:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        n, group = running.pop(f)
+                        status = self._row_done(groups, group, n, *f.result())
+                        if status != TestStatus.SUCCESS and self._fail_fast and not stop:
+                            logger.info('Stopping dataset test "%s" on the failure of row %d', self._name, n)
+                            stop = True
+        finally:
+            rows.close()
+        self._elapsed = time.perf_counter() - start
+        self._output = {
+            'rows': count,
+            'groups': groups
+        }
+        if any(g['failed'] > 0 for g in groups.values()):
+            self._status = TestStatus.FAILURE
+        elif any(g['timeouts'] > 0 for g in groups.values()) or (not completed and self._deadline.expired):
+            self._status = TestStatus.TIMEOUT
+        else:
+            self._status = TestStatus.SUCCESS
+        self._log_groups(groups)
+        return self._status, self._output
+
+    def load_expected(self):
+        '''
+        Load the expected result shared by all the rows, if it is not filled in by each row
+        '''
+        if self._probe is not None and self._expected_file is not None:
+            self._probe.load_expected()
+
+    def clear_output(self):
+        '''
+        Drop the results of the last run, once they are not needed anymore
+        '''
+        self._output = None
+
+    def extract_values(self) -> Dict[str, Any]:
+        '''
+        Extract values from the API call outputs. Rows do not pass values to the following tests
+
+        :return: No values
+        :rtype:  Dict[str, Any]
+        '''
+        return {}
+
+    def inject_values(self, values: Dict[str, Any]):
+        '''
+        Inject given values into the test of every row, where there is a match of values "names"
+
+        :param values: Available values to inject
+        :type values:  Dict[str, Any]
+        '''
+        self._injected.update({n: values[n] for n in self.inject_names if n in values})
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _init_from_data(self, shared_config: Dict[str, Any], data: Dict[str, Any]):
+        '''
+        Initialize this test with data from a given dictionary
+
+        :param shared_config: Configuration entries shared by all tests in a suite
+        :type shared_config:  Dict[str, Any]
+        :param data:          The source data
+        :type data:           Dict[str, Any]
+        '''
+        self._shared_config = shared_config
+        self._data = data
+        # enabled: True/False
+        self._enabled = get_conf_value(data, 'enabled', True)
+        # name: Name of the test, the name of the test of each row is followed by the row number
+        self._name = get_conf_value(data, 'name', 'Unnamed Dataset Test - {}'.format(datetime.utcnow()))
+        # dataset: path to the CSV or JSON Lines file whose rows fill in the test
+        self._dataset_file = get_conf_value(data, 'dataset')
+        if self._dataset_file[0] != '/':
+            self._dataset_file = os.path.join(os.getcwd(), self._dataset_file)
+        if not os.path.exists(self._dataset_file):
+            raise FileNotFoundError('[Test {}] Could not find dataset file: "{}"'.format(self._name, self._dataset_file))
+        # datasetFormat: "csv" or "jsonl", by default from the file extension
+        self._dataset_format = get_dataset_format(self._dataset_file, get_conf_value(data, 'datasetFormat'))
+        # groupBy: column to aggregate the results of the rows by
+        self._group_by = get_conf_value(data, 'groupBy')
+        # the test configuration filled in by each row
+        self._template = {k: v for k, v in data.items() if k not in DATASET_KEYS}
+        self._inject_names = [i['name'] for i in get_conf_value(data, 'inject', [])]
+        # workers: how many rows to run at the same time, those of the suite
+        self._workers = max(1, get_conf_value(shared_config, 'workers', 1))
+        self._deadline = get_conf_value(shared_config, 'deadline') or Deadline()
+        # stop at the first failed row when the suite stops at the first failure
+        self._fail_fast = get_conf_value(shared_config, 'exit_on_error', False)
+        self._host = urlparse(get_conf_value(shared_config, 'base_url', '')).netloc
+        # validate the template on the first row. Its test gives the expected result too, if shared by all rows
+        self._probe = None
+        rows = iter_rows(self._dataset_file, self._dataset_format)
+        try:
+            row = next(rows, None)
+        finally:
+            rows.close()
+        if row is not None:
+            self._probe = ApiTest(shared_config, self._get_row_data(1, row))
+        self._expected_file = None
+        if self._probe is not None and not has_placeholders(get_conf_value(data, 'expected')):
+            self._expected_file = self._probe.expected_file
+        self._definition = None
+
+    def _get_row_data(self, n: int, row: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+        Return the configuration of the test of a row
+
+        :param n:   The row number
+        :type n:    int
+        :param row: The dataset row
+        :type row:  Dict[str, Any]
+
+        :return: The test configuration filled in with the row values
+        :rtype:  Dict[str, Any]
+        '''
+        data = render(self._template, row)
+        data['name'] = '{} #{}'.format(data.get('name', self._name), n)
+        # CSV values are strings
+        if isinstance(data.get('expected_code'), str):
+            data['expected_code'] = int(data['expected_code'])
+        return data
+
+    def _get_group(self, row: Dict[str, Any]) -> str:
+        '''
+        Return the group of a row
+
+        :param row: The dataset row
+        :type row:  Dict[str, Any]
+
+        :return: The value of the groupBy column, DEFAULT_GROUP if not grouped
+        :rtype:  str
+        '''
+        if self._group_by is None:
+            return DEFAULT_GROUP
+        return str(row.get(self._group_by))
+
+    def _run_row(self, n: int, row: Dict[str, Any], check_content: bool) -> Tuple[TestStatus, float, int, Dict[str, float], JsonDiff]:
+        '''
+        Run the test of a row
+
+        :param n:             The row number
+        :type n:              int
+        :param row:           The dataset row
+        :type row:            Dict[str, Any]
+        :param check_content: Whether to check the response content against the expected one
+        :type check_content:  bool
+
+        :return: The test status, the call duration, the response size, the phase timings and the differences found
+        :rtype:  Tuple[TestStatus, float, int, Dict[str, float], JsonDiff]
+        '''
+        try:
+            test = ApiTest(self._shared_config, self._get_row_data(n, row))
+            if len(self._injected) > 0:
+                test.inject_values(self._injected)
+            if self._expected_file is None:
+                # a file per row: not cached, or a long dataset would keep all of them in memory
+                test.load_expected(cache=False)
+            status, _ = test.run(check_content)
+        except (KeyError, ValueError, OSError) as e:
+            # a row not filling in a valid test, or a call failing, fails the row only
+            logger.error('Row %d of dataset test "%s" failed: %s', n, self._name, e)
+            return TestStatus.FAILURE, None, None, None, None
+        test.clear_output()
+        return status, test.elapsed, test.response_size, test.timings, test.diff
+
+    def _row_done(self, groups: Dict[str, Dict[str, Any]], group: str, n: int, status: TestStatus, elapsed: float, size: int, timings: Dict[str, float], diff: JsonDiff) -> TestStatus:
+        '''
+        Add the result of a row to those of its group
+
+        :param groups:  Results of the rows, by group
+        :type groups:   Dict[str, Dict[str, Any]]
+        :param group:   The group of the row
+        :type group:    str
+        :param n:       The row number
+        :type n:        int
+        :param status:  The test status of the row
+        :type status:   TestStatus
+        :param elapsed: The call duration, in seconds
+        :type elapsed:  float
+        :param size:    The response size, in bytes
+        :type size:     int
+        :param timings: The time spent in each phase, in seconds
+        :type timings:  Dict[str, float]
+        :param diff:    The differences found by the content check
+        :type diff:     JsonDiff
+
+        :return: The test status of the row
+        :rtype:  TestStatus
+        '''
+        g = groups.get(group)
+        if g is None:
+            g = groups[group] = {'rows': 0, 'passed': 0, 'failed': 0, 'timeouts': 0, 'elapsed': 0.0, 'failedRows': []}
+        g['rows'] += 1
+        g['elapsed'] += elapsed or 0.0
+        if status == TestStatus.SUCCESS:
+            g['passed'] += 1
+        elif status == TestStatus.TIMEOUT:
+            g['timeouts'] += 1
+        else:
+            g['failed'] += 1
+            if len(g['failedRows']) < MAX_FAILED_ROWS:
+                g['failedRows'].append(n)
+            if self._diff is None:
+                self._diff = diff
+        self._response_size += size or 0
+        self._timings = sum_timings([self._timings, timings])
+        return status
+
+    def _log_groups(self, groups: Dict[str, Dict[str, Any]]):
+        '''
+        Log the results of the rows of each group
+
+        :param groups: Results of the rows, by group
+        :type groups:  Dict[str, Dict[str, Any]]
+        '''
+        if len(groups) == 0:
+            logger.warning('Dataset test "%s" ran no rows', self._name)
+        for group, g in groups.items():
+            logger.info('Dataset test "%s" [%s]: %d rows, %d passed, %d failed, %d timed out, mean call time %.3fs',
+                self._name, group, g['rows'], g['passed'], g['failed'], g['timeouts'], g['elapsed'] / g['rows'])
+
+    def _get_dataset_digest(self) -> str:
+        '''
+        Return the digest of the content of the dataset file, reading it in chunks
+
+        :return: The SHA-256 digest of the dataset file
+        :rtype:  str
+        '''
+        h = hashlib.sha256()
+        with open(self._dataset_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def enabled(self) -> bool:
+        '''
+        Return whether to run this test or not
+
+        :return: Whether to run this test or not
+        :rtype:  bool
+        '''
+        return self._enabled
+
+    @property
+    def name(self) -> str:
+        '''
+        Return this test name
+
+        :return: This test name
+        :rtype:  str
+        '''
+        return self._name
+
+    @property
+    def dataset_file(self) -> str:
+        '''
+        Return the path of the dataset file
+
+        :return: The path of the dataset file
+        :rtype:  str
+        '''
+        return self._dataset_file
+
+    @property
+    def expected_file(self) -> str:
+        '''
+        Return the path of the file containing the expected result, if shared by all the rows
+
+        :return: The path of the expected result file, None if filled in by each row
+        :rtype:  str
+        '''
+        return self._expected_file
+
+    @property
+    def definition(self) -> Dict[str, Any]:
+        '''
+        Return the test configuration with the settings inherited from the suite and the digest of the dataset,
+        before any value is injected
+
+        :return: The resolved test configuration
+        :rtype:  Dict[str, Any]
+        '''
+        if self._definition is None:
+            self._definition = {
+                'test': self._data,
+                'probe': self._probe.definition if self._probe is not None else None,
+                'dataset': self._get_dataset_digest()
+            }
+        return self._definition
+
+    @property
+    def extract_names(self) -> List[str]:
+        '''
+        Return the names of the values this test extracts from its output
+
+        :return: No names, rows do not pass values to the following tests
+        :rtype:  List[str]
+        '''
+        return []
+
+    @property
+    def inject_names(self) -> List[str]:
+        '''
+        Return the names of the values this test needs injected
+
+        :return: The names of the injected values
+        :rtype:  List[str]
+        '''
+        return self._inject_names
+
+    @property
+    def host(self) -> str:
+        '''
+        Return the host (and port) this test calls
+
+        :return: The host this test calls
+        :rtype:  str
+        '''
+        return self._host
+
+    @property
+    def elapsed(self) -> float:
+        '''
+        Return the duration of the last run over all the rows, in seconds
+
+        :return: The duration of the last run
+        :rtype:  float
+        '''
+        return self._elapsed
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        '''
+        Return the time spent in each phase by all the rows of the last run, in seconds
+
+        :return: The time spent in each phase of the last run
+        :rtype:  Dict[str, float]
+        '''
+        return self._timings
+
+    @property
+    def response_size(self) -> int:
+        '''
+        Return the size of the bodies of all the responses of the last run, in bytes
+
+        :return: The size of the response bodies
+        :rtype:  int
+        '''
+        return self._response_size
+
+    @property
+    def attempts(self) -> List[Dict[str, Any]]:
+        '''
+        Return the calls sent by the last test run. Not kept for the rows
+
+        :return: None
+        :rtype:  List[Dict[str, Any]]
+        '''
+        return None
+
+    @property
+    def diff(self) -> JsonDiff:
+        '''
+        Return the differences found by the content check of the first failed row of the last run
+
+        :return: The differences found, None if no row failed the content check
+        :rtype:  JsonDiff
+        '''
+        return self._diff
+
+    @property
+    def status(self) -> TestStatus:
+        '''
+        Return this test status
+
+        :return: This test status
+        :rtype:  TestStatus
+        '''
+        return self._status
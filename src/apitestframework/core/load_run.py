@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict
+
+# library imports
+import requests
+
+# local imports
+from apitestframework.core.test_suite import TestSuite
+from apitestframework.utils.cassette import Cassette
+from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.header_utils import get_headers_list
+from apitestframework.utils.latency_histogram import LatencyHistogram
+from apitestframework.utils.session_pool import SessionPool
+from apitestframework.utils.test_status import TestStatus
+
+logger = logging.getLogger(__name__)
+
+# percentiles shown in the summary
+PERCENTILES = [50, 90, 99, 99.9]
+
+class LoadRun(object):
+    '''
+    Replay the request chains of test suites to generate load.
+
+    Either new chains start at a fixed arrival rate (open model) or a fixed number of
+    virtual users run them in a loop (closed model)
+    '''
+
+    def __init__(self, config: Dict[str, Any]):
+        '''
+        Initialize load run
+
+        :param config: Configuration object
+        :type config:  Dict[str, Any]
+        '''
+        load_config = get_conf_value(config, 'load', {})
+        # rate: chains started per second (open model)
+        self._rate = get_conf_value(load_config, 'rate')
+        # users: virtual users running chains in a loop (closed model)
+        self._users = get_conf_value(load_config, 'users')
+        if self._rate is not None and self._users is not None:
+            raise ValueError('Load Run needs either a rate or a number of users, not both')
+        if self._rate is None and self._users is None:
+            self._users = 1
+        # maxUsers: maximum number of chains running at the same time in the open model
+        self._max_users = get_conf_value(load_config, 'maxUsers', 100)
+        # duration: seconds of load
+        self._duration = get_conf_value(load_config, 'duration', 60)
+        # sample: share of the responses whose content is checked
+        self._sample = get_conf_value(load_config, 'sample', 1.0)
+        # suites: names of the suites to run, all of them if empty
+        suite_names = get_conf_value(load_config, 'suites', [])
+        self._suites_def = [s for s in get_conf_value(config, 'suites', []) if len(suite_names) == 0 or get_conf_value(s, 'name') in suite_names]
+        if len(self._suites_def) == 0:
+            raise ValueError('No Test Suite to run')
+        pool_config = dict(get_conf_value(config, 'connectionPool', {}))
+        pool_config.setdefault('poolSize', self._users or self._max_users)
+        # cassette: record the responses to a file, or replay them from it without using the network
+        cassette_config = get_conf_value(config, 'cassette')
+        cassette = Cassette(cassette_config) if cassette_config is not None else None
+        if cassette is not None:
+            cassette.start()
+        self._session_pool = SessionPool(pool_config, cassette)
+        self._global_config = {
+            'headers': get_headers_list(config),
+            'session_pool': self._session_pool,
+            'cassette': cassette,
+            'connect_timeout': get_conf_value(config, 'connectTimeout'),
+            'read_timeout': get_conf_value(config, 'readTimeout')
+        }
+        # build the suites once to validate them and to know the tests to report.
+        # Stats are kept by suite and test index, as tests in a suite can share a name
+        self._stats = {}
+        for index, sc in enumerate(self._suites_def):
+            suite = TestSuite(sc, self._global_config)
+            for i, test in enumerate(suite.tests):
+                if test.enabled:
+                    self._stats[(index, i)] = _TestStats('{} / {}'.format(suite.name, test.name))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._iterations = 0
+        self._in_flight = 0
+        self._dropped = 0
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def run(self) -> bool:
+        '''
+        Generate load for the configured duration and print a summary
+
+        :return: Whether all the checks were successful
+        :rtype:  bool
+        '''
+        logger.info('')
+        logger.info('Starting Load Run at {0:%Y-%m-%d %H:%M:%S}'.format(datetime.now()))
+        if self._rate is not None:
+            logger.info('Open model: {} chains per second for {}s'.format(self._rate, self._duration))
+        else:
+            logger.info('Closed model: {} virtual users for {}s'.format(self._users, self._duration))
+        # single calls are reported in the summary
+        test_logger = logging.getLogger('apitestframework.core.api_test')
+        test_log_level = test_logger.level
+        test_logger.setLevel(logging.WARNING)
+        start = time.monotonic()
+        deadline = start + self._duration
+        try:
+            if self._rate is not None:
+                self._run_open(deadline)
+            else:
+                self._run_closed(deadline)
+        finally:
+            test_logger.setLevel(test_log_level)
+            self._session_pool.close()
+        return self._summary(time.monotonic() - start)
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _run_open(self, deadline: float):
+        '''
+        Start chains at the configured rate until the deadline
+
+        :param deadline: Time when to stop starting new chains (time.monotonic)
+        :type deadline:  float
+        '''
+        interval = 1.0 / self._rate
+        next_start = time.monotonic()
+        i = 0
+        with ThreadPoolExecutor(max_workers=self._max_users) as executor:
+            while next_start < deadline:
+                delay = next_start - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                with self._lock:
+                    busy = self._in_flight >= self._max_users
+                    if busy:
+                        self._dropped += 1
+                    else:
+                        self._in_flight += 1
+                if not busy:
+                    executor.submit(self._tracked_iteration, i % len(self._suites_def))
+                i += 1
+                next_start += interval
+
+    def _run_closed(self, deadline: float):
+        '''
+        Run the virtual users until the deadline
+
+        :param deadline: Time when to stop starting new chains (time.monotonic)
+        :type deadline:  float
+        '''
+        users = []
+        for i in range(self._users):
+            users.append(threading.Thread(target=self._user_loop, args=(i % len(self._suites_def), deadline), daemon=True))
+        for u in users:
+            u.start()
+        for u in users:
+            u.join()
+
+    def _user_loop(self, index: int, deadline: float):
+        '''
+        Run the chain of a suite in a loop until the deadline
+
+        :param index:    Index of the suite to run
+        :type index:     int
+        :param deadline: Time when to stop starting new chains (time.monotonic)
+        :type deadline:  float
+        '''
+        while time.monotonic() < deadline:
+            self._iteration(index)
+
+    def _tracked_iteration(self, index: int):
+        '''
+        Run the chain of a suite once, keeping count of the chains in flight
+
+        :param index: Index of the suite to run
+        :type index:  int
+        '''
+        try:
+            self._iteration(index)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _iteration(self, index: int):
+        '''
+        Run the chain of a suite once, passing extracted values to the following tests
+
+        :param index: Index of the suite to run
+        :type index:  int
+        '''
+        suite = self._get_suite(index)
+        values = {}
+        for i, test in enumerate(suite.tests):
+            if not test.enabled:
+                continue
+            if len(values) > 0:
+                test.inject_values(values)
+            try:
+                status, _ = test.run(random.random() < self._sample)
+                elapsed = test.elapsed
+            except requests.RequestException as e:
+                logger.warning('Call of test "{}" failed: {}'.format(test.name, e))
+                status = TestStatus.FAILURE
+                elapsed = None
+            self._stats[(index, i)].record(elapsed, status == TestStatus.SUCCESS)
+            if status != TestStatus.SUCCESS:
+                break
+            values.update(test.extract_values())
+        with self._lock:
+            self._iterations += 1
+
+    def _get_suite(self, index: int) -> TestSuite:
+        '''
+        Return the suite to run in the current thread, building it if needed.
+
+        Tests keep the injected values, so every thread needs its own copy
+
+        :param index: Index of the suite
+        :type index:  int
+
+        :return: The suite
+        :rtype:  TestSuite
+        '''
+        suites = getattr(self._local, 'suites', None)
+        if suites is None:
+            suites = {}
+            self._local.suites = suites
+        if index not in suites:
+            suites[index] = TestSuite(self._suites_def[index], self._global_config)
+        return suites[index]
+
+    def _summary(self, elapsed: float) -> bool:
+        '''
+        Print a summary of the load run
+
+        :param elapsed: Duration of the load run, in seconds
+        :type elapsed:  float
+
+        :return: Whether all the checks were successful
+        :rtype:  bool
+        '''
+        success = True
+        logger.info('')
+        logger.info('Load Run finished at {0:%Y-%m-%d %H:%M:%S}'.format(datetime.now()))
+        logger.info('{} chains in {:.1f}s, {} arrivals dropped'.format(self._iterations, elapsed, self._dropped))
+        logger.info('')
+        logger.info('---------- Load run Results (latencies in ms) ----------')
+        logger.info('{:<40} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}'.format('Test', 'calls', 'errors', 'calls/s', 'p50', 'p90', 'p99', 'p999', 'max'))
+        for stats in self._stats.values():
+            h = stats.histogram
+            success = success and stats.errors == 0
+            logger.info('{:<40} {:>8} {:>7} {:>9.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}'.format(
+                stats.name[:40], stats.calls, stats.errors, stats.calls / elapsed if elapsed > 0 else 0,
+                *[v * 1000 for v in h.percentiles(PERCENTILES) + [h.max]]))
+        logger.info('')
+        if not success:
+            logger.error('Some calls failed. See the results above for more details.')
+        logger.info('-----------------------------------')
+        logger.info('')
+        return success
+
+class _TestStats(object):
+    '''
+    Latencies and errors of the calls of a test
+    '''
+
+    def __init__(self, name: str):
+        '''
+        Initialize the stats
+
+        :param name: Name of the test, with the one of its suite
+        :type name:  str
+        '''
+        self.name = name
+        self.histogram = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, success: bool):
+        '''
+        Record a call
+
+        :param elapsed: Duration of the call in seconds, None if no response was received
+        :type elapsed:  float
+        :param success: Whether the checks were successful
+        :type success:  bool
+        '''
+        with self._lock:
+            self.calls += 1
+            if elapsed is not None:
+                self.histogram.record(elapsed)
+            if not success:
+                self.errors += 1
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import copy
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Set
+
+# local imports
+from apitestframework.core.api_test import ApiTest
+from apitestframework.core.test_graph import build_dependencies
+from apitestframework.utils.result_store import ResultRecord
+from apitestframework.utils.test_status import TestStatus
+
+logger = logging.getLogger(__name__)
+
+# format of the run state files: change it when their content changes
+STATE_VERSION = 1
+
+class RunState(object):
+    '''
+    Inputs and results of the tests of the previous runs, to rerun only the tests whose inputs changed or that did not succeed.
+
+    The inputs of a test are summarized by a hash of its resolved configuration (suite settings and headers included)
+    and of the content of its expected result file
+    '''
+
+    def __init__(self, path: str):
+        '''
+        Initialize the run state, loading the one saved by the previous run if any
+
+        :param path: Path of the run state file
+        :type path:  str
+        '''
+        self._path = path
+        self._suites = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                self._suites = state['suites']
+            else:
+                logger.info('Run state {} was saved by a different version: running all the tests'.format(path))
+        self._fingerprints = {}
+        self._file_digests = {}
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def plan(self, suite_name: str, tests: List[ApiTest], changed_only: bool) -> Dict[int, ResultRecord]:
+        '''
+        Compute the inputs of the tests of a suite and choose which ones can reuse their previous result.
+
+        A test is run if it is new, its inputs changed or it did not succeed last time, together with the tests
+        injecting values it extracts (recursively) and the tests extracting values it injects (recursively)
+
+        :param suite_name:   Name of the suite
+        :type suite_name:    str
+        :param tests:        Tests of the suite, in configuration order
+        :type tests:         List[ApiTest]
+        :param changed_only: Whether to run only the tests needed, or all of them
+        :type changed_only:  bool
+
+        :return: The previous results to reuse, by test index
+        :rtype:  Dict[int, ResultRecord]
+        '''
+        keys = _get_keys(tests)
+        self._fingerprints[suite_name] = {k: self._fingerprint(t) for k, t in zip(keys, tests)}
+        if not changed_only:
+            return {}
+        previous = self._suites.get(suite_name, {})
+        selected = set()
+        for i, (key, test) in enumerate(zip(keys, tests)):
+            entry = previous.get(key)
+            if test.enabled and (entry is None or entry['hash'] != self._fingerprints[suite_name][key] or entry['status'] != TestStatus.SUCCESS.name):
+                selected.add(i)
+        dependencies = build_dependencies(tests)
+        dependents = {i: set() for i in dependencies}
+        for i, deps in dependencies.items():
+            for d in deps:
+                dependents[d].add(i)
+        # values extracted by a test that changed may change too, and tests that run need the values they inject
+        selected = _closure(_closure(selected, dependents), dependencies)
+        reused = {}
+        for i, (key, test) in enumerate(zip(keys, tests)):
+            if test.enabled and i not in selected:
+                entry = previous[key]
+                reused[i] = ResultRecord(test.name, TestStatus.SUCCESS, entry.get('elapsed'), entry.get('size'), timings=entry.get('timings'))
+        logger.info('Test Suite "{}": running {} tests, reusing the previous result of {}'.format(suite_name, len(tests) - len(reused), len(reused)))
+        return reused
+
+    def for_suite(self, suite_name: str) -> 'RunState':
+        '''
+        Return the run state of a single suite, to plan it in the process running it. See merge
+
+        :param suite_name: Name of the suite
+        :type suite_name:  str
+
+        :return: A run state holding only the previous results of the suite
+        :rtype:  RunState
+        '''
+        state = copy.copy(self)
+        state._suites = {suite_name: self._suites[suite_name]} if suite_name in self._suites else {}
+        state._fingerprints = {}
+        state._file_digests = {}
+        return state
+
+    def merge(self, other: 'RunState'):
+        '''
+        Add the inputs of the tests planned by another run state, e.g. in the process running a suite
+
+        :param other: The run state the suites were planned with
+        :type other:  RunState
+        '''
+        self._fingerprints.update(other._fingerprints)
+
+    def has_failures(self, suite_name: str) -> bool:
+        '''
+        Return whether a test of a suite did not succeed in the previous run
+
+        :param suite_name: Name of the suite
+        :type suite_name:  str
+
+        :return: Whether a test of the suite did not succeed
+        :rtype:  bool
+        '''
+        return any(TestStatus[e['status']].is_failure() for e in self._suites.get(suite_name, {}).values())
+
+    def update(self, suite_name: str, records: List[ResultRecord]):
+        '''
+        Store the inputs and results of the tests of a suite, forgetting the tests not run
+
+        :param suite_name: Name of the suite
+        :type suite_name:  str
+        :param records:    Results of the tests, in configuration order
+        :type records:     List[ResultRecord]
+        '''
+        fingerprints = self._fingerprints.get(suite_name)
+        if fingerprints is None:
+            return
+        entries = {}
+        for key, r in zip(_get_keys(records), records):
+            if key in fingerprints and r.status != TestStatus.SKIPPED:
+                entries[key] = {
+                    'hash': fingerprints[key],
+                    'status': r.status.name,
+                    'elapsed': r.elapsed,
+                    'size': r.size,
+                    'timings': r.timings
+                }
+        self._suites[suite_name] = entries
+
+    def save(self):
+        '''
+        Write the run state file
+        '''
+        tmp_path = '{}.{}.tmp'.format(self._path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': STATE_VERSION, 'suites': self._suites}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._path)
+        logger.debug('Saved run state to {}'.format(self._path))
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _fingerprint(self, test: ApiTest) -> str:
+        '''
+        Return the hash of the inputs of a test
+
+        :param test: The test
+        :type test:  ApiTest
+
+        :return: The SHA-256 digest of the resolved configuration of the test and of its expected result file
+        :rtype:  str
+        '''
+        h = hashlib.sha256(json.dumps(test.definition, sort_keys=True, default=str).encode('utf-8'))
+        path = test.expected_file
+        if path is None:
+            # expected results filled in by dataset rows: the definition holds the digest of the dataset
+            return h.hexdigest()
+        digest = self._file_digests.get(path)
+        if digest is None:
+            with open(path, 'rb') as f:
+                digest = self._file_digests[path] = hashlib.sha256(f.read()).hexdigest()
+        h.update(digest.encode('ascii'))
+        return h.hexdigest()
+
+def _get_keys(items: List[Any]) -> List[str]:
+    '''
+    Return the keys of the tests of a suite in the run state: their names, numbered when repeated
+
+    :param items: The tests, or their results, in configuration order
+    :type items:  List[Any]
+
+    :return: The keys of the tests
+    :rtype:  List[str]
+    '''
+    seen = {}
+    keys = []
+    for item in items:
+        n = seen.get(item.name, 0)
+        seen[item.name] = n + 1
+        keys.append(item.name if n == 0 else '{}#{}'.format(item.name, n + 1))
+    return keys
+
+def _closure(start: Set[int], edges: Dict[int, Set[int]]) -> Set[int]:
+    '''
+    Return the nodes reachable from a set of nodes
+
+    :param start: The starting nodes
+    :type start:  Set[int]
+    :param edges: The nodes reachable from each node in one step
+    :type edges:  Dict[int, Set[int]]
+
+    :return: The starting nodes and the ones reachable from them
+    :rtype:  Set[int]
+    '''
+    reached = set(start)
+    stack = list(start)
+    while len(stack) > 0:
+        for n in edges.get(stack.pop(), ()):
+            if n not in reached:
+                reached.add(n)
+                stack.append(n)
+    return reached
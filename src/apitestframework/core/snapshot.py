@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import hashlib
+import logging
+import os
+import pickle
+import sys
+from typing import Any, Dict, Tuple
+
+# local imports
+from apitestframework import __version__
+from apitestframework.core.test_run import TestRun
+from apitestframework.utils.config import load_config
+from apitestframework.utils.fixture_cache import fixture_cache
+
+logger = logging.getLogger(__name__)
+
+# format of the snapshot files: change it when their content changes
+SNAPSHOT_VERSION = 2
+
+# options of a single run, left out when validating: they are not part of the snapshot contents
+# and some of them have side effects (a cassette in record mode is emptied, reporters create their files)
+RUN_OPTIONS = ('cassette', 'shard', 'runtimes', 'runState', 'changed', 'failedFirst', 'workers', 'reporters', 'deadline')
+
+def get_snapshot_path(config_file: str) -> str:
+    '''
+    Return the path of the snapshot of a configuration file
+
+    :param config_file: The path to the configuration file
+    :type config_file:  str
+
+    :return: The path of the snapshot
+    :rtype:  str
+    '''
+    return '{}.snapshot'.format(os.path.abspath(config_file))
+
+def compile_snapshot(config_file: str) -> Dict[str, Any]:
+    '''
+    Validate a configuration file and all the expected result files it references,
+    writing them already parsed to a snapshot next to the configuration file
+
+    :param config_file: The path to the configuration file
+    :type config_file:  str
+
+    :return: The snapshot
+    :rtype:  Dict[str, Any]
+    '''
+    config = load_config(config_file)
+    # building the test run validates the configuration
+    test_run = TestRun({k: v for k, v in config.items() if k not in RUN_OPTIONS})
+    paths = []
+    for s in test_run.suites:
+        for t in s.tests:
+            t.load_expected()
+            # the expected results filled in by dataset rows are loaded by the workers
+            if t.expected_file is not None:
+                paths.append(t.expected_file)
+    fixtures = fixture_cache.export(paths)
+    manifest = {}
+    for path in [config_file] + list(fixtures['paths']):
+        manifest[os.path.realpath(path)] = _file_info(path)
+    snapshot = {
+        'version': _get_version(),
+        'manifest': manifest,
+        'config': config,
+        'fixtures': fixtures
+    }
+    path = get_snapshot_path(config_file)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    logger.info('Compiled {} ({} expected result files) into {}'.format(config_file, len(fixtures['paths']), path))
+    return snapshot
+
+def load_snapshot(config_file: str) -> Dict[str, Any]:
+    '''
+    Return the configuration of a configuration file from its snapshot, preloading the expected result files.
+    Only called when snapshots are asked for on the command line, as they are pickles.
+
+    The snapshot is rebuilt if a source file changed; if there is no snapshot, the configuration file is loaded as is
+
+    :param config_file: The path to the configuration file
+    :type config_file:  str
+
+    :return: The configuration object
+    :rtype:  Dict[str, Any]
+    '''
+    path = get_snapshot_path(config_file)
+    if not os.path.exists(path):
+        logger.warning('No snapshot of {}: loading it as is'.format(config_file))
+        return load_config(config_file)
+    with open(path, 'rb') as f:
+        snapshot = pickle.load(f)
+    if snapshot.get('version') != _get_version():
+        logger.warning('Snapshot {} was built by a different version: rebuilding it'.format(path))
+        snapshot = compile_snapshot(config_file)
+    else:
+        changed = _find_changed(snapshot['manifest'])
+        if changed is not None:
+            logger.warning('{} changed since snapshot {} was built: rebuilding it'.format(changed, path))
+            snapshot = compile_snapshot(config_file)
+    fixture_cache.preload(snapshot['fixtures'])
+    return snapshot['config']
+
+def _get_version() -> Tuple[int, str, Tuple[int, int]]:
+    '''
+    Return the version of the snapshot format, of the framework and of Python
+
+    :return: The versions the snapshot depends on
+    :rtype:  Tuple[int, str, Tuple[int, int]]
+    '''
+    return (SNAPSHOT_VERSION, __version__, tuple(sys.version_info[:2]))
+
+def _file_info(path: str) -> Tuple[int, int, str]:
+    '''
+    Return size, modification time and SHA-256 digest of a file
+
+    :param path: The path to the file
+    :type path:  str
+
+    :return: Size, modification time in nanoseconds and SHA-256 digest of the file
+    :rtype:  Tuple[int, int, str]
+    '''
+    st = os.stat(path)
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return (st.st_size, st.st_mtime_ns, digest)
+
+def _find_changed(manifest: Dict[str, Tuple[int, int, str]]) -> str:
+    '''
+    Return the first source file changed since the snapshot was built.
+    Files with a different modification time are hashed, as checkouts do not preserve it
+
+    :param manifest: Size, modification time and SHA-256 digest of each source file, by path
+    :type manifest:  Dict[str, Tuple[int, int, str]]
+
+    :return: The path of the first changed file, None if no file changed
+    :rtype:  str
+    '''
+    for path, (size, mtime_ns, digest) in manifest.items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            return path
+        if st.st_size != size:
+            return path
+        if st.st_mtime_ns != mtime_ns and _file_info(path)[2] != digest:
+            return path
+    return None
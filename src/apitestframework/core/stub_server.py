@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+from urllib.parse import urlparse
+
+# local imports
+from apitestframework.utils.config import get_conf_value
+
+logger = logging.getLogger(__name__)
+
+class StubServer(object):
+    '''
+    Local HTTP server answering the tests of a configuration with their expected results,
+    to run Test Runs without the real services
+    '''
+
+    def __init__(self, config: Dict[str, Any], data: Dict[str, Any] = None):
+        '''
+        Initialize the stub server
+
+        :param config: Configuration object of the Test Run to answer
+        :type config:  Dict[str, Any]
+        :param data:   Configuration object for the stub server
+        :type data:    Dict[str, Any]
+        '''
+        # host: address to listen on
+        self._host = get_conf_value(data, 'host', '127.0.0.1')
+        # port: port to listen on, any free one if 0
+        self._port = get_conf_value(data, 'port', 8080)
+        # latency: milliseconds to wait before answering
+        self._latency = get_conf_value(data, 'latency', 0) / 1000.0
+        # jitter: maximum milliseconds randomly added to the latency
+        self._jitter = get_conf_value(data, 'jitter', 0) / 1000.0
+        # inflate: factor to multiply the size of the responses by, padding them with whitespace
+        self._inflate = get_conf_value(data, 'inflate', 1)
+        if self._latency < 0 or self._jitter < 0 or self._inflate < 1:
+            raise ValueError('Non-valid stub settings: latency and jitter must not be negative, inflate must be at least 1')
+        self._routes = self._get_routes(config)
+        self._server = None
+        self._thread = None
+        self._served = 0
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def start(self):
+        '''
+        Start serving in a background thread
+        '''
+        self._bind()
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-server', daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        '''
+        Serve until interrupted
+        '''
+        self._bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        '''
+        Stop serving and release the port
+        '''
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def answer(self, method: str, path: str) -> Tuple[int, bytes]:
+        '''
+        Return the response to a call, waiting for the configured latency
+
+        :param method: The HTTP method
+        :type method:  str
+        :param path:   The path called, query included
+        :type path:    str
+
+        :return: The status code and body of the response
+        :rtype:  Tuple[int, bytes]
+        '''
+        with self._lock:
+            self._served += 1
+        delay = self._latency + random.uniform(0, self._jitter)
+        if delay > 0:
+            time.sleep(delay)
+        path = urlparse(path).path.rstrip('/')
+        route = self._routes.get((method, path))
+        # values injected into the path are appended to it: fall back to the longest matching route
+        while route is None and '/' in path:
+            path = path.rsplit('/', 1)[0]
+            route = self._routes.get((method, path))
+        if route is None:
+            return 404, b'{}'
+        return route
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _bind(self):
+        '''
+        Open the listening socket
+        '''
+        self._server = ThreadingHTTPServer((self._host, self._port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        logger.info('Stub server listening on {} with {} routes'.format(self.url, len(self._routes)))
+
+    def _get_routes(self, config: Dict[str, Any]) -> Dict[Tuple[str, str], Tuple[int, bytes]]:
+        '''
+        Read the response of each test of a configuration
+
+        :param config: Configuration object of the Test Run
+        :type config:  Dict[str, Any]
+
+        :return: Status code and body of the responses, by method and path
+        :rtype:  Dict[Tuple[str, str], Tuple[int, bytes]]
+        '''
+        routes = {}
+        for suite in get_conf_value(config, 'suites', []):
+            base_path = urlparse(get_conf_value(suite, 'baseUrl', '')).path
+            for test in get_conf_value(suite, 'tests', []):
+                if not get_conf_value(test, 'enabled', True):
+                    continue
+                key = (get_conf_value(test, 'method', 'GET').upper(), (base_path + urlparse(get_conf_value(test, 'path', '')).path).rstrip('/'))
+                if key in routes:
+                    logger.debug('Stub route {} {} already defined, ignoring test "{}"'.format(key[0], key[1], get_conf_value(test, 'name')))
+                    continue
+                body = b''
+                expected_file = get_conf_value(test, 'expected')
+                if expected_file is not None:
+                    with open(expected_file, 'rb') as f:
+                        body = f.read()
+                if self._inflate > 1:
+                    body += b' ' * int(len(body) * (self._inflate - 1))
+                routes[key] = (get_conf_value(test, 'expected_code', 200), body)
+        return routes
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def url(self) -> str:
+        '''
+        Return the base URL of the server
+
+        :return: The base URL of the server
+        :rtype:  str
+        '''
+        port = self._server.server_address[1] if self._server is not None else self._port
+        return 'http://{}:{}'.format(self._host, port)
+
+    @property
+    def routes(self) -> Dict[Tuple[str, str], Tuple[int, bytes]]:
+        '''
+        Return the responses of the server
+
+        :return: Status code and body of the responses, by method and path
+        :rtype:  Dict[Tuple[str, str], Tuple[int, bytes]]
+        '''
+        return self._routes
+
+    @property
+    def served(self) -> int:
+        '''
+        Return the number of calls answered
+
+        :return: The number of calls answered
+        :rtype:  int
+        '''
+        return self._served
+
+class _StubHandler(BaseHTTPRequestHandler):
+    '''
+    Request handler of the stub server, keeping connections alive
+
+    Nagle's algorithm is disabled so that the body written after the headers
+    is not held back waiting for the client's delayed ACK.
+    '''
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _answer(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length > 0:
+            self.rfile.read(length)
+        status, body = self.server.stub.answer(self.command, self.path)
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except ConnectionError:
+            # the client gave up waiting
+            self.close_connection = True
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _answer
+
+    def do_HEAD(self):
+        status, _ = self.server.stub.answer(self.command, self.path)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format: str, *args):
+        logger.debug('Stub server :: {}'.format(format % args))
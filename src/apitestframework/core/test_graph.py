@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import logging
+from typing import Dict, List, Set
+
+# local imports
+from .api_test import ApiTest
+
+logger = logging.getLogger(__name__)
+
+class TestGraph(object):
+    '''
+    Dependency graph of the tests in a suite, built from their extract/inject declarations.
+
+    A test depends on the closest previous test extracting each of the values it injects
+    '''
+
+    def __init__(self, tests: List[ApiTest]):
+        '''
+        Build the graph
+
+        :param tests: The tests of the suite, in configuration order
+        :type tests:  List[ApiTest]
+        '''
+        self._dependencies = build_dependencies(tests)
+        self._dependents = {i: set() for i in range(len(tests))}
+        for i, deps in self._dependencies.items():
+            for d in deps:
+                self._dependents[d].add(i)
+        self._pending = set(range(len(tests)))
+        self._completed = set()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def ready(self) -> List[int]:
+        '''
+        Return the tests whose dependencies are all completed, removing them from the pending ones
+
+        :return: Indexes of the tests ready to run, in configuration order
+        :rtype:  List[int]
+        '''
+        ready = sorted(i for i in self._pending if self._dependencies[i] <= self._completed)
+        self._pending.difference_update(ready)
+        return ready
+
+    def complete(self, i: int, success: bool = True) -> List[int]:
+        '''
+        Mark a test as completed, whether it was handed out to run or not.
+
+        If the test was not successful, all the pending tests depending on it, directly or not,
+        will never be ready: they are removed from the pending ones and returned
+
+        :param i:       Index of the completed test
+        :type i:        int
+        :param success: Whether the test was successful
+        :type success:  bool
+
+        :return: Indexes of the tests that cannot run anymore, in configuration order
+        :rtype:  List[int]
+        '''
+        self._pending.discard(i)
+        if success:
+            self._completed.add(i)
+            return []
+        blocked = set()
+        stack = [i]
+        while stack:
+            for d in self._dependents[stack.pop()]:
+                if d in self._pending and d not in blocked:
+                    blocked.add(d)
+                    stack.append(d)
+        self._pending.difference_update(blocked)
+        return sorted(blocked)
+
+    def dependencies(self, i: int) -> List[int]:
+        '''
+        Return the tests a test depends on
+
+        :param i: Index of the test
+        :type i:  int
+
+        :return: Indexes of the tests the test depends on, in configuration order
+        :rtype:  List[int]
+        '''
+        return sorted(self._dependencies[i])
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def pending(self) -> int:
+        '''
+        Return the number of tests not yet handed out to run
+
+        :return: The number of pending tests
+        :rtype:  int
+        '''
+        return len(self._pending)
+
+def build_dependencies(tests: List[ApiTest]) -> Dict[int, Set[int]]:
+    '''
+    Build the dependencies of each test from the extract/inject declarations.
+
+    Values injected but not extracted by any previous test create no dependency
+
+    :param tests: The tests of the suite, in configuration order
+    :type tests:  List[ApiTest]
+
+    :return: For each test index, the indexes of the tests it depends on
+    :rtype:  Dict[int, Set[int]]
+    '''
+    dependencies = {}
+    producers = {}
+    for i, test in enumerate(tests):
+        dependencies[i] = set()
+        for name in test.inject_names:
+            if name in producers:
+                dependencies[i].add(producers[name])
+            else:
+                logger.debug('Test "{}" injects value {} not extracted by any previous test'.format(test.name, name))
+        for name in test.extract_names:
+            producers[name] = i
+    return dependencies
@@ -19,15 +19,27 @@
 
 # system imports
 import logging
+import multiprocessing
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, List, Tuple
 
 # local imports
+from apitestframework.core.async_engine import AsyncEngine
+from apitestframework.core.run_state import RunState
 from apitestframework.core.test_suite import TestSuite
+from apitestframework.utils.cassette import Cassette
 from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.deadline import Deadline
 from apitestframework.utils.header_utils import get_headers_list
+from apitestframework.utils.reporters import QueueReporter, Reporter, get_reporters
+from apitestframework.utils.result_store import ResultRecord
+from apitestframework.utils.session_pool import SessionPool
+from apitestframework.utils.sharding import load_runtimes, save_runtimes, select_shard
 from apitestframework.utils.test_status import TestStatus
+from apitestframework.utils.timing import PHASES, sum_timings
 
 logger = logging.getLogger(__name__)
 
@@ -44,10 +56,55 @@ class TestRun(object):
         :type config:  Dict[str, Any]
         '''
         suites_def = get_conf_value(config, 'suites', [])
-        global_config = self._get_global_config(config)
+        # runtimes: file of the runtimes of past runs, used to split the suites into shards
+        self._runtimes_path = get_conf_value(config, 'runtimes')
+        # shard: run only a share of the suites, as "i/N"
+        shard = get_conf_value(config, 'shard')
+        if shard is not None:
+            suites_def = select_shard(suites_def, shard, load_runtimes(self._runtimes_path))
+        # workers: number of processes running the suites
+        self._workers = get_conf_value(config, 'workers', 1)
+        self._process_config = {k: v for k, v in config.items() if k not in ('suites', 'reporters')}
+        self._suites_def = suites_def
+        # engine: how to run the suites, one after the other ("sync") or concurrently ("async")
+        self._engine = get_conf_value(config, 'engine', 'sync')
+        if self._engine not in ('sync', 'async'):
+            raise ValueError('Non-valid engine: {}'.format(self._engine))
+        if self._engine == 'async' and self._workers > 1:
+            raise ValueError('The async engine cannot run suites on more than one process: set either "engine" or "workers"')
+        self._concurrency = get_conf_value(config, 'concurrency', {})
+        # deadline: seconds the whole run can last, the tests not run in time are reported as timed out
+        self._deadline = Deadline(get_conf_value(config, 'deadline'))
+        # cassette: record the responses to a file, or replay them from it without using the network
+        self._cassette = _get_cassette(config)
+        if self._cassette is not None:
+            self._cassette.start()
+        self._session_pool = SessionPool(get_conf_value(config, 'connectionPool'), self._cassette)
+        # reporters: machine-readable reports, written as tests finish
+        self._reporters = get_reporters(get_conf_value(config, 'reporters', []))
+        global_config = _get_global_config(config, self._session_pool, self._reporters, self._cassette, self._deadline)
+        # the tests of suites run by other processes are built there, unless needed here
+        in_process = self._workers <= 1 or len(suites_def) <= 1
         self._suites = []
-        for sc in suites_def:
-            self._suites.append(TestSuite(sc, global_config))
+        for index, sc in enumerate(suites_def):
+            self._suites.append(TestSuite(sc, global_config, in_process, index))
+        # runState: file of the inputs and results of the tests of past runs
+        state_path = get_conf_value(config, 'runState')
+        self._run_state = RunState(state_path) if state_path is not None else None
+        # changed: run only the tests whose inputs changed or that did not succeed, reusing the other results
+        changed = get_conf_value(config, 'changed', False)
+        # failedFirst: run first the suites with tests that did not succeed last time
+        failed_first = get_conf_value(config, 'failedFirst', False)
+        if (changed or failed_first) and self._run_state is None:
+            raise ValueError('Running changed or failed tests first needs a runState file')
+        if self._run_state is not None and in_process:
+            # the suites run by other processes are planned there, where their tests are built
+            for s in self._suites:
+                s.reuse(self._run_state.plan(s.name, s.tests, changed))
+            if failed_first:
+                order = sorted(range(len(self._suites)), key=lambda i: not self._run_state.has_failures(self._suites[i].name))
+                self._suites = [self._suites[i] for i in order]
+                self._suites_def = [self._suites_def[i] for i in order]
 
     # ---------------------------
     # ----- Public methods ------
@@ -59,10 +116,32 @@ class TestRun(object):
         '''
         logger.info('')
         logger.info('Starting Test Run at {0:%Y-%m-%d %H:%M:%S}'.format(datetime.now()))
+        self._deadline.start()
         # run test suites
-        for s in self._suites:
-            s.run()
-        run_result = self._summary()
+        try:
+            if self._workers > 1 and len(self._suites) > 1:
+                self._run_processes()
+            elif self._engine == 'async':
+                AsyncEngine(self._concurrency).run(self._suites)
+            else:
+                for s in self._suites:
+                    s.run()
+        finally:
+            self._session_pool.close()
+            for reporter in self._reporters:
+                reporter.close()
+        try:
+            if self._runtimes_path is not None:
+                save_runtimes(self._runtimes_path, {s.name: s.duration for s in self._suites if s.duration is not None})
+            if self._run_state is not None:
+                for s in self._suites:
+                    self._run_state.update(s.name, s.test_results.records)
+                self._run_state.save()
+            run_result = self._summary()
+        finally:
+            # the bodies spilled to files are not needed after the run
+            for s in self._suites:
+                s.test_results.discard()
         # exit with error if a test failed
         if not run_result:
             sys.exit(1)
@@ -71,19 +150,48 @@ class TestRun(object):
     # ----- Private methods ------
     # ----------------------------
 
-    def _get_global_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
+    def _run_processes(self):
+        '''
+        Run the suites on a pool of processes, merging their results into the suites of this run.
+        Reports are sent back to this process as the tests finish
         '''
-        Initialize configuration shared by all objects in this test run
+        logger.info('Running {} suites on {} processes'.format(len(self._suites), self._workers))
+        manager = multiprocessing.Manager() if len(self._reporters) > 0 else None
+        queue = manager.Queue() if manager is not None else None
+        forwarder = None
+        try:
+            with ProcessPoolExecutor(max_workers=min(self._workers, len(self._suites))) as executor:
+                states = [self._run_state.for_suite(s.name) if self._run_state is not None else None for s in self._suites]
+                futures = [executor.submit(_run_suite_process, self._process_config, sc, queue, self._deadline, st, s.index) for s, sc, st in zip(self._suites, self._suites_def, states)]
+                if queue is not None:
+                    forwarder = threading.Thread(target=self._forward_reports, args=(queue,), daemon=True)
+                    forwarder.start()
+                for s, f in zip(self._suites, futures):
+                    records, spill_path, duration, reused, run_state = f.result()
+                    s.merge_results(records, spill_path, duration)
+                    s.reuse(reused)
+                    if run_state is not None:
+                        self._run_state.merge(run_state)
+        finally:
+            if forwarder is not None:
+                queue.put(None)
+                forwarder.join()
+            if manager is not None:
+                manager.shutdown()
 
-        :param config: Configuration object
-        :type config:  Dict[str, Any]
+    def _forward_reports(self, queue: Any):
+        '''
+        Send the results received from the processes to the reporters, until None is received
 
-        :return: A dictionary containing all the available global configuration sections
-        :rtype:  Dict[str, Any]
+        :param queue: The queue of the results
+        :type queue:  multiprocessing.Queue
         '''
-        return {
-            'headers': get_headers_list(config)
-        }
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+            for reporter in self._reporters:
+                reporter.test_done(*item)
 
     def _summary(self) -> bool:
         '''
@@ -93,6 +201,7 @@ class TestRun(object):
         :rtype:  bool
         '''
         status_success_acc = True
+        timeouts = 0
         logger.info('')
         logger.info('Test Run finished at {0:%Y-%m-%d %H:%M:%S}'.format(datetime.now()))
         logger.info('')
@@ -102,12 +211,20 @@ class TestRun(object):
             logger.info('**************************************************')
             logger.info('Test Suite "{}"'.format(s.name))
             logger.info('**************************************************')
-            for tr in s.test_results:
-                (test_name, result_test_status, _) = tr
-                test_success = (result_test_status != TestStatus.FAILURE)
+            for tr in s.test_results.records:
+                test_name = tr.name
+                result_test_status = tr.status
+                test_success = not result_test_status.is_failure()
                 status_success_acc = status_success_acc and test_success
-                logger.info('{} Test "{}" - Result: {}'.format(result_test_status.icon(), test_name, result_test_status.name))
+                timeouts += result_test_status == TestStatus.TIMEOUT
+                logger.info('{} Test "{}" - Result: {}{}'.format(result_test_status.icon(), test_name, result_test_status.name, ' ({} attempts)'.format(len(tr.attempts)) if tr.attempts else (' (previous result)' if tr.index[1] in s.reused else '')))
+            timed = [tr.timings for tr in s.test_results.records if tr.timings]
+            if timed:
+                timings = sum_timings(timed)
+                logger.info('Time spent (ms) :: {}'.format(' - '.join('{}: {:.1f}'.format(p, timings.get(p, 0.0) * 1000) for p in PHASES)))
         logger.info('')
+        if timeouts > 0:
+            logger.error('{} tests timed out{}.'.format(timeouts, ' or were not run before the deadline' if self._deadline.expired else ''))
         if not status_success_acc:
             logger.error('Some tests failed. See the results above for more details.')
         else:
@@ -116,3 +233,95 @@ class TestRun(object):
         logger.info('-----------------------------------')
         logger.info('')
         return status_success_acc
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def suites(self) -> List[TestSuite]:
+        '''
+        Return the test suites of the run
+
+        :return: The test suites
+        :rtype:  List[TestSuite]
+        '''
+        return self._suites
+
+def _get_cassette(config: Dict[str, Any]) -> Cassette:
+    '''
+    Return the cassette of a test run
+
+    :param config: Configuration object
+    :type config:  Dict[str, Any]
+
+    :return: The cassette, or None if the test run uses the network
+    :rtype:  Cassette
+    '''
+    cassette_config = get_conf_value(config, 'cassette')
+    return Cassette(cassette_config) if cassette_config is not None else None
+
+def _get_global_config(config: Dict[str, Any], session_pool: SessionPool, reporters: List[Reporter], cassette: Cassette = None, deadline: Deadline = None) -> Dict[str, Any]:
+    '''
+    Initialize configuration shared by all objects in a test run
+
+    :param config:       Configuration object
+    :type config:        Dict[str, Any]
+    :param session_pool: The HTTP sessions shared by the suites
+    :type session_pool:  SessionPool
+    :param reporters:    The reporters of the results
+    :type reporters:     List[Reporter]
+    :param cassette:     The cassette recording or replaying the responses, if any
+    :type cassette:      Cassette
+    :param deadline:     The time limit of the run, if any
+    :type deadline:      Deadline
+
+    :return: A dictionary containing all the available global configuration sections
+    :rtype:  Dict[str, Any]
+    '''
+    return {
+        'headers': get_headers_list(config),
+        'session_pool': session_pool,
+        'result_retention': get_conf_value(config, 'resultRetention'),
+        'reporters': reporters,
+        'cassette': cassette,
+        'connect_timeout': get_conf_value(config, 'connectTimeout'),
+        'read_timeout': get_conf_value(config, 'readTimeout'),
+        'deadline': deadline,
+        'diff': get_conf_value(config, 'diff')
+    }
+
+def _run_suite_process(config: Dict[str, Any], suite_config: Dict[str, Any], queue: Any = None, deadline: Deadline = None, run_state: RunState = None, index: int = 0) -> Tuple[List[ResultRecord], str, float, Dict[int, ResultRecord], RunState]:
+    '''
+    Run a suite in a worker process
+
+    :param config:       Configuration object of the test run, without the suites
+    :type config:        Dict[str, Any]
+    :param suite_config: Configuration object of the suite
+    :type suite_config:  Dict[str, Any]
+    :param queue:        Queue to send the results to as the tests finish, if any
+    :type queue:         multiprocessing.Queue
+    :param deadline:     The time limit of the run, already started, if any
+    :type deadline:      Deadline
+    :param run_state:    The run state of the suite, to choose the tests reusing their previous result, if any
+    :type run_state:     RunState
+    :param index:        Position of the suite in the run
+    :type index:         int
+
+    :return: The records of the results, the path of the file their bodies were spilled to (handed over to the parent process),
+             the time spent running the suite, the tests that reused their previous result, by test index, and the run state with the inputs of the tests
+    :rtype:  Tuple[List[ResultRecord], str, float, Dict[int, ResultRecord], RunState]
+    '''
+    # the parent process already emptied the cassette: workers only append to it
+    cassette = _get_cassette(config)
+    session_pool = SessionPool(get_conf_value(config, 'connectionPool'), cassette)
+    reporters = [QueueReporter(queue)] if queue is not None else []
+    suite = TestSuite(suite_config, _get_global_config(config, session_pool, reporters, cassette, deadline), index=index)
+    if run_state is not None:
+        suite.reuse(run_state.plan(suite.name, suite.tests, get_conf_value(config, 'changed', False)))
+    try:
+        suite.run()
+    finally:
+        session_pool.close()
+    store = suite.test_results
+    return store.records, store.spill_path, suite.duration, suite.reused, run_state
@@ -18,16 +18,25 @@
 # limitations under the License.
 
 # system imports
+import asyncio
 import logging
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Any, Dict, List, Tuple
 
 # local imports
 from .api_test import ApiTest
+from .async_engine import AsyncEngine
+from .dataset_test import DatasetTest
+from .test_graph import TestGraph
 from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.deadline import Deadline
 from apitestframework.utils.header_utils import get_headers_list, merge_headers_lists
 from apitestframework.utils.misc import camel_to_snake
+from apitestframework.utils.result_store import ResultRecord, ResultStore
+from apitestframework.utils.session_pool import SessionPool
 from apitestframework.utils.test_status import TestStatus
 
 logger = logging.getLogger(__name__)
@@ -37,7 +46,7 @@ class TestSuite(object):
     Collection of tests
     '''
 
-    def __init__(self, suite_config: Dict[str, Any], global_config: Dict[str, Any] = None):
+    def __init__(self, suite_config: Dict[str, Any], global_config: Dict[str, Any] = None, load_tests: bool = True, index: int = 0):
         '''
         Initialize test suite
 
@@ -45,10 +54,18 @@ class TestSuite(object):
         :type suite_config:   Dict[str, Any]
         :param global_config: Configuration object shared by all objects in the same test run
         :type global_config:  Dict[str, Any]
+        :param load_tests:    Whether to build the tests now, or only when first needed (e.g. for suites run by other processes)
+        :type load_tests:     bool
+        :param index:         Position of the suite in the run, identifying its results with the test index. Suite names can be repeated
+        :type index:          int
         '''
+        self._index = index
         self._init_conf(suite_config, global_config)
-        self._tests = self._init_tests(get_conf_value(suite_config, 'tests', []), global_config)
-        self._test_results = []
+        self._tests_list = get_conf_value(suite_config, 'tests', [])
+        self._tests = self._init_tests(self._tests_list, global_config) if load_tests else None
+        self._test_results = ResultStore(get_conf_value(suite_config, 'resultRetention', get_conf_value(global_config, 'result_retention')))
+        self._duration = None
+        self._reused = {}
 
     # ---------------------------
     # ----- Public methods ------
@@ -58,35 +75,324 @@ class TestSuite(object):
         '''
         Run all the tests in the suite
         '''
+        self._log_start()
+        start = time.perf_counter()
+        try:
+            if self._scheduler == 'graph':
+                self._run_graph()
+            else:
+                for i, test in enumerate(self.tests):
+                    if not self._run_test(i, test):
+                        break
+        finally:
+            self._duration = time.perf_counter() - start
+            self._close()
+
+    async def run_async(self, engine: AsyncEngine):
+        '''
+        Run all the tests in the suite as a coroutine, sending the calls through the given engine
+
+        :param engine: The engine running the calls
+        :type engine:  AsyncEngine
+        '''
+        self._log_start()
+        start = time.perf_counter()
+        try:
+            if self._scheduler == 'graph':
+                await self._run_graph_async(engine)
+            else:
+                for i, test in enumerate(self.tests):
+                    if not await engine.call(test.host, self._run_test, i, test):
+                        break
+        finally:
+            self._duration = time.perf_counter() - start
+            self._close()
+
+    def reuse(self, results: Dict[int, ResultRecord]):
+        '''
+        Set the tests not to run, reporting the result of a previous run instead
+
+        :param results: The previous results, by test index
+        :type results:  Dict[int, ResultRecord]
+        '''
+        self._reused = results
+
+    def merge_results(self, records: List[ResultRecord], spill_path: str, duration: float):
+        '''
+        Save the results of the suite run by another process
+
+        :param records:    The records of the results, with the bodies retained by the policy
+        :type records:     List[ResultRecord]
+        :param spill_path: The path of the file the bodies were spilled to, None if nothing was spilled
+        :type spill_path:  str
+        :param duration:   Time spent running the suite, in seconds
+        :type duration:    float
+        '''
+        self._test_results.adopt(records, spill_path)
+        self._duration = duration
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _log_start(self):
+        '''
+        Log the start of the suite
+        '''
         logger.info('')
         logger.info('----------------------------------------------------------------')
         logger.info('Running Test Suite: "{}"...'.format(self._name))
         logger.info('----------------------------------------------------------------')
-        l = len(self._tests)
-        for i, test in enumerate(self._tests):
-            # run each test
-            if test.enabled:
-                # if enabled
-                status, res = test.run()
-                # save result and final status
-                self._test_results.append((test.name, status, res))
-                if status == TestStatus.SUCCESS:
-                    # extract data from test
-                    self._extracted_values.update(test.extract_values())
-                    if i < l - 1 and len(self._extracted_values) > 0:
-                        # inject it into next test
-                        next_test = self._tests[i + 1]
-                        next_test.inject_values(self._extracted_values)
-                elif self._exit_on_error:
-                    logger.info('Exiting on test failure. If you are sure you want to execute all tests, set `"exitOnFailure": false` in Test Suite configuration.')
+
+    def _close(self):
+        '''
+        Release the resources owned by the suite
+        '''
+        if self._owns_session_pool:
+            self._session_pool.close()
+        self._test_results.close()
+
+    def _run_test(self, i: int, test: ApiTest) -> bool:
+        '''
+        Run a test of the suite, passing extracted values to the following one
+
+        :param i:    The position of the test in the suite
+        :type i:     int
+        :param test: The test to run
+        :type test:  ApiTest
+
+        :return: Whether to go on with the following tests
+        :rtype:  bool
+        '''
+        if i in self._reused:
+            self._save_reused(i, self._reused[i])
+            self._report(i, test, TestStatus.SUCCESS, self._reused[i])
+        elif test.enabled and self._deadline.expired:
+            # the run is over: report the test as not run in time
+            self._save_result(i, test, TestStatus.TIMEOUT, None)
+        elif test.enabled:
+            # if enabled
+            status, res = test.run()
+            # save result and final status
+            self._save_result(i, test, status, res)
+            if status == TestStatus.SUCCESS:
+                # extract data from test
+                self._extracted_values.update(test.extract_values())
+                if i < len(self._tests) - 1 and len(self._extracted_values) > 0:
+                    # inject it into next test
+                    next_test = self._tests[i + 1]
+                    next_test.inject_values(self._extracted_values)
+            self._release_output(test)
+            if status != TestStatus.SUCCESS and self._exit_on_error and not self._deadline.expired:
+                logger.info('Exiting on test failure. If you are sure you want to execute all tests, set `"exitOnFailure": false` in Test Suite configuration.')
+                return False
+        else:
+            # if disabled mark as 'skipped' with no result
+            self._save_result(i, test, TestStatus.SKIPPED, None)
+        return True
+
+    def _save_result(self, i: int, test: ApiTest, status: TestStatus, res: Any, report: bool = True):
+        '''
+        Save the result of a test
+
+        :param i:      Index of the test
+        :type i:       int
+        :param test:   The test
+        :type test:    ApiTest
+        :param status: The test status
+        :type status:  TestStatus
+        :param res:    The call response
+        :type res:     Any
+        :param report: Whether to send the result to the reporters too
+        :type report:  bool
+        '''
+        if status == TestStatus.SKIPPED:
+            self._test_results.add(test.name, status, index=(self._index, i))
+        else:
+            self._test_results.add(test.name, status, res, test.elapsed, test.response_size, test.timings, test.attempts, test.diff, (self._index, i))
+        if report:
+            self._report(i, test, status)
+
+    def _save_reused(self, i: int, record: ResultRecord):
+        '''
+        Save the result of a test not run, taken from a previous run
+
+        :param i:      Index of the test
+        :type i:       int
+        :param record: The previous result
+        :type record:  ResultRecord
+        '''
+        self._test_results.add(record.name, record.status, None, record.elapsed, record.size, record.timings, index=(self._index, i))
+
+    def _report(self, i: int, test: ApiTest, status: TestStatus, record: ResultRecord = None):
+        '''
+        Send the result of a test to the reporters
+
+        :param i:      Index of the test
+        :type i:       int
+        :param test:   The test
+        :type test:    ApiTest
+        :param status: The test status
+        :type status:  TestStatus
+        :param record: The result to send, if not the one of the last run of the test
+        :type record:  ResultRecord
+        '''
+        if len(self._reporters) == 0:
+            return
+        if record is None and status == TestStatus.SKIPPED:
+            record = ResultRecord(test.name, status, index=(self._index, i))
+        elif record is None:
+            record = ResultRecord(test.name, status, test.elapsed, test.response_size, timings=test.timings, attempts=test.attempts, diff=test.diff, index=(self._index, i))
+        else:
+            record.index = (self._index, i)
+        for reporter in self._reporters:
+            reporter.test_done(self._name, record)
+
+    def _release_output(self, test: ApiTest):
+        '''
+        Let a test drop its response once its values are extracted, unless the results keep all of them anyway
+
+        :param test: The test
+        :type test:  ApiTest
+        '''
+        if self._test_results.policy != 'all':
+            test.clear_output()
+
+    def _run_graph(self):
+        '''
+        Run the tests on a pool of workers, each one as soon as the tests it depends on are done
+        '''
+        graph = self._start_graph()
+        results = {}
+        running = {}
+        stop = False
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            while True:
+                if not stop:
+                    for i in graph.ready():
+                        running[executor.submit(self._run_graph_test, graph, i)] = i
+                if len(running) == 0:
                     break
-            else:
-                # if disabled mark as 'skipped' with no result
-                self._test_results.append((test.name, TestStatus.SKIPPED, None))
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for f in done:
+                    stop = not self._graph_test_done(graph, running.pop(f), f.result(), results) or stop
+        self._end_graph(results)
 
-    # ----------------------------
-    # ----- Private methods ------
-    # ----------------------------
+    async def _run_graph_async(self, engine: AsyncEngine):
+        '''
+        Run the tests as coroutines, each one as soon as the tests it depends on are done
+
+        :param engine: The engine running the calls
+        :type engine:  AsyncEngine
+        '''
+        graph = self._start_graph()
+        results = {}
+        running = {}
+        stop = False
+        while True:
+            if not stop:
+                for i in graph.ready():
+                    running[asyncio.ensure_future(engine.call(self._tests[i].host, self._run_graph_test, graph, i))] = i
+            if len(running) == 0:
+                break
+            done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for f in done:
+                stop = not self._graph_test_done(graph, running.pop(f), f.result(), results) or stop
+        self._end_graph(results)
+
+    def _start_graph(self) -> TestGraph:
+        '''
+        Build the dependency graph of the tests, marking the disabled ones as completed
+
+        :return: The dependency graph of the tests
+        :rtype:  TestGraph
+        '''
+        graph = TestGraph(self.tests)
+        self._values_by_test = {}
+        for i, test in enumerate(self._tests):
+            if not test.enabled:
+                # disabled tests are never handed out to run
+                graph.complete(i)
+                self._report(i, test, TestStatus.SKIPPED)
+            elif i in self._reused:
+                # neither are tests reusing a previous result: the tests depending on them are reused too
+                graph.complete(i)
+                self._report(i, test, TestStatus.SUCCESS, self._reused[i])
+        return graph
+
+    def _run_graph_test(self, graph: TestGraph, i: int) -> Tuple[TestStatus, Any]:
+        '''
+        Run a test of the graph, injecting the values extracted by the tests it depends on
+
+        :param graph: The dependency graph of the tests
+        :type graph:  TestGraph
+        :param i:     Index of the test to run
+        :type i:      int
+
+        :return: The test status and the call response
+        :rtype:  Tuple[TestStatus, Any]
+        '''
+        test = self._tests[i]
+        if self._deadline.expired:
+            return TestStatus.TIMEOUT, None
+        values = {}
+        for d in graph.dependencies(i):
+            values.update(self._values_by_test.get(d, {}))
+        if len(values) > 0:
+            test.inject_values(values)
+        status, res = test.run()
+        if status == TestStatus.SUCCESS:
+            self._values_by_test[i] = test.extract_values()
+        self._release_output(test)
+        return status, res
+
+    def _graph_test_done(self, graph: TestGraph, i: int, result: Tuple[TestStatus, Any], results: Dict[int, Tuple[TestStatus, Any]]) -> bool:
+        '''
+        Record the result of a test of the graph
+
+        :param graph:   The dependency graph of the tests
+        :type graph:    TestGraph
+        :param i:       Index of the test
+        :type i:        int
+        :param result:  The test status and the call response
+        :type result:   Tuple[TestStatus, Any]
+        :param results: Results of the tests, by index
+        :type results:  Dict[int, Tuple[TestStatus, Any]]
+
+        :return: Whether to go on starting new tests
+        :rtype:  bool
+        '''
+        test = self._tests[i]
+        status, _ = result
+        results[i] = result
+        self._report(i, test, status)
+        if status == TestStatus.SUCCESS:
+            self._extracted_values.update(self._values_by_test[i])
+        # once the deadline passed, the tests not run are reported as timed out
+        blocked_status = TestStatus.TIMEOUT if self._deadline.expired else TestStatus.SKIPPED
+        for b in graph.complete(i, status == TestStatus.SUCCESS):
+            logger.info('Skipping test "{}": test "{}" it depends on was not successful'.format(self._tests[b].name, test.name))
+            results[b] = (blocked_status, None)
+            self._report(b, self._tests[b], blocked_status)
+        if status != TestStatus.SUCCESS and self._exit_on_error and not self._deadline.expired:
+            logger.info('Exiting on test failure. If you are sure you want to execute all tests, set `"exitOnFailure": false` in Test Suite configuration.')
+            return False
+        return True
+
+    def _end_graph(self, results: Dict[int, Tuple[TestStatus, Any]]):
+        '''
+        Save the results of the tests of the graph, in configuration order. They were already reported as they finished
+
+        :param results: Results of the tests, by index
+        :type results:  Dict[int, Tuple[TestStatus, Any]]
+        '''
+        for i, test in enumerate(self._tests):
+            if not test.enabled:
+                self._save_result(i, test, TestStatus.SKIPPED, None, False)
+            elif i in self._reused:
+                self._save_reused(i, self._reused[i])
+            elif i in results:
+                self._save_result(i, test, *results[i], False)
 
     def _init_conf(self, suite_config: Dict[str, Any], global_config: Dict[str, Any] = None):
         '''
@@ -100,19 +406,41 @@ class TestSuite(object):
         logger.debug('Initializing configuration')
         self._name = get_conf_value(suite_config, 'name', 'Unnamed Test Suite - {}'.format(datetime.utcnow()))
         self._exit_on_error = get_conf_value(suite_config, 'exitOnFailure', True)
+        # scheduler: run tests one after the other ("sequential") or as soon as their inputs are ready ("graph")
+        self._scheduler = get_conf_value(suite_config, 'scheduler', 'sequential')
+        if self._scheduler not in ('sequential', 'graph'):
+            raise ValueError('Non-valid scheduler: {}'.format(self._scheduler))
+        self._workers = get_conf_value(suite_config, 'workers', 4)
         self._base_url = get_conf_value(suite_config, 'baseUrl', '')
         self._verify_ssl = get_conf_value(suite_config, 'verifySsl', True)
+        # connectTimeout/readTimeout: seconds to wait for the connection and for each read, by default those of the test run
+        self._connect_timeout = get_conf_value(suite_config, 'connectTimeout', get_conf_value(global_config, 'connect_timeout'))
+        self._read_timeout = get_conf_value(suite_config, 'readTimeout', get_conf_value(global_config, 'read_timeout'))
+        self._deadline = get_conf_value(global_config, 'deadline') or Deadline()
+        # retry: when to send calls again on transient errors, for the tests not declaring it
+        self._retry = get_conf_value(suite_config, 'retry')
+        # hedge: when to send duplicates of slow calls, for the tests not declaring it
+        self._hedge = get_conf_value(suite_config, 'hedge')
+        # diff: how to report the differences found by content checks
+        self._diff_config = get_conf_value(global_config, 'diff')
         # manage headers
         global_headers = get_conf_value(global_config, 'headers', [])
         suite_headers = get_headers_list(suite_config)
         self._headers = merge_headers_lists(global_headers, suite_headers)
         self._override_conf(get_conf_value(suite_config, 'envOverride', []))
+        # manage HTTP sessions: use the suite own pool if configured, otherwise the one of the test run
+        pool_config = get_conf_value(suite_config, 'connectionPool')
+        self._session_pool = get_conf_value(global_config, 'session_pool')
+        self._owns_session_pool = pool_config is not None or self._session_pool is None
+        if self._owns_session_pool:
+            self._session_pool = SessionPool(pool_config, get_conf_value(global_config, 'cassette'))
         # now that we have set and overridden values, check for url validity
         if self._base_url is None or self._base_url == '':
             # TODO check for more cases.
             # We'll probably need to do it manually because urlparse awkwardly fails with 'localhost:8080' or '192.168.2.1:8080'
             raise ValueError('Non-valid baseUrl: {}'.format(self._base_url))
         self._extracted_values = {}
+        self._reporters = get_conf_value(global_config, 'reporters', [])
 
     def _override_conf(self, overrides: List[Dict[str, str]]):
         '''
@@ -148,7 +476,11 @@ class TestSuite(object):
         '''
         tests = []
         for test_data in tests_list:
-            tests.append(ApiTest(self._get_shared_suite_config(), test_data))
+            if get_conf_value(test_data, 'dataset') is not None:
+                # run once for each row of a dataset file
+                tests.append(DatasetTest(self._get_shared_suite_config(), test_data))
+            else:
+                tests.append(ApiTest(self._get_shared_suite_config(), test_data))
         return tests
 
     def _get_shared_suite_config(self) -> Dict[str, Any]:
@@ -161,7 +493,16 @@ class TestSuite(object):
         return {
             'base_url': self._base_url,
             'verify_ssl': self._verify_ssl,
-            'headers': self._headers
+            'headers': self._headers,
+            'session_pool': self._session_pool,
+            'connect_timeout': self._connect_timeout,
+            'read_timeout': self._read_timeout,
+            'deadline': self._deadline,
+            'retry': self._retry,
+            'hedge': self._hedge,
+            'diff': self._diff_config,
+            'exit_on_error': self._exit_on_error,
+            'workers': self._workers
         }
 
     # -----------------------
@@ -179,12 +520,54 @@ class TestSuite(object):
         return self._name
 
     @property
-    def test_results(self) -> List[Tuple[str, TestStatus, Dict[str, Any]]]:
+    def index(self) -> int:
+        '''
+        Return the position of the suite in the run
+
+        :return: The position of the suite in the run
+        :rtype:  int
+        '''
+        return self._index
+
+    @property
+    def tests(self) -> List[ApiTest]:
+        '''
+        Return the list of tests of the suite
+
+        :return: The list of tests
+        :rtype:  List[ApiTest]
+        '''
+        if self._tests is None:
+            self._tests = self._init_tests(self._tests_list)
+        return self._tests
+
+    @property
+    def test_results(self) -> ResultStore:
         '''
         Return the list of test results
         Each one is a tuple (test.name, test.result, test.result_content)
 
         :return: The list of test results
-        :rtype:  List[Tuple[str, TestStatus, Dict[str, Any]]]
+        :rtype:  ResultStore
         '''
         return self._test_results
+
+    @property
+    def reused(self) -> Dict[int, ResultRecord]:
+        '''
+        Return the tests not run, reusing the result of a previous run
+
+        :return: The previous results, by test index
+        :rtype:  Dict[int, ResultRecord]
+        '''
+        return self._reused
+
+    @property
+    def duration(self) -> float:
+        '''
+        Return the time spent running the suite, in seconds
+
+        :return: The time spent running the suite, None if not run yet
+        :rtype:  float
+        '''
+        return self._duration
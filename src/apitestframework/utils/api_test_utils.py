@@ -20,62 +20,96 @@
 # system imports
 import logging
 import traceback
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Tuple
 
 # local imports
-from apitestframework.utils.misc import build_keys_list, get_inner_key_value
+from apitestframework.utils.comparison_plan import ComparisonPlan
+from apitestframework.utils.json_diff import JsonDiff, diff_mismatches, diff_result
 
 logger = logging.getLogger(__name__)
 
-def check_result_content(result: Dict[str, Any], expected: Dict[str, Any], expected_result_file: str = None, exceptions: List[str] = None) -> bool:
+def check_result_content(result: Dict[str, Any], expected: Dict[str, Any], expected_result_file: str = None, exceptions: List[str] = None, plan: ComparisonPlan = None) -> bool:
     '''
     Check the API call result content against the expected content
 
-    :param result:   The actual API call result
-    :type result:    Dict[str, Any]
-    :param expected: The expected API call result
-    :type expected:  Dict[str, Any]
+    :param result:               The actual API call result
+    :type result:                Dict[str, Any]
+    :param expected:             The expected API call result
+    :type expected:              Dict[str, Any]
+    :param expected_result_file: The file containing the expected API call result
+    :type expected_result_file:  str
+    :param exceptions:           Fields to ignore when checking the result
+    :type exceptions:            List[str]
+    :param plan:                 The expected API call result, already compiled with its exceptions
+    :type plan:                  ComparisonPlan
 
     :return: The resulting status of the test
     :rtype:  bool
     '''
+    return len(diff_result_content(result, expected, expected_result_file, exceptions, plan)) == 0
+
+def diff_result_content(result: Dict[str, Any], expected: Dict[str, Any], expected_result_file: str = None, exceptions: List[str] = None, plan: ComparisonPlan = None, diff_config: Dict[str, Any] = None, fail_fast: bool = False) -> JsonDiff:
+    '''
+    Compare the API call result content to the expected content, logging the differences
+
+    :param result:               The actual API call result
+    :type result:                Dict[str, Any]
+    :param expected:             The expected API call result
+    :type expected:              Dict[str, Any]
+    :param expected_result_file: The file containing the expected API call result
+    :type expected_result_file:  str
+    :param exceptions:           Fields to ignore when checking the result
+    :type exceptions:            List[str]
+    :param plan:                 The expected API call result, already compiled with its exceptions
+    :type plan:                  ComparisonPlan
+    :param diff_config:          Configuration object for the diff
+    :type diff_config:           Dict[str, Any]
+    :param fail_fast:            Whether to stop comparing once the maximum number of differences is found
+    :type fail_fast:             bool
+
+    :return: The differences found, none if the result is as expected
+    :rtype:  JsonDiff
+    '''
     if expected_result_file is None:
         expected_result_file = 'N/A'
-    if exceptions is None:
-        exceptions = []
     logger.debug('Checking test result content...')
-    test_status = True
-    expected_keys_list = build_keys_list(expected)
-    # check all keys in expected
-    for k in expected_keys_list:
-        # do not check for content if in ignore list
-        exc = next((e for e in exceptions if e['key'] == k), None)
-        if exc is None:
-            # get actual and expected values
-            result_value = get_inner_key_value(result, k)
-            expected_value = get_inner_key_value(expected, k)
-            # check
-            if result_value != expected_value:
-                logger.error('Check Result failed for key {} :: expected: {} - actual: {}'.format(k, expected_value, result_value))
-                test_status = False
-        else:
-            logger.debug('Key {} found in exceptions list'.format(k))
-            exc_type = exc['type']
-            if exc_type == 'ignore':
-                continue
-            elif exc_type == 'exist':
-                result_keys_list = build_keys_list(result)
-                if k not in result_keys_list:
-                    test_status = False
+    if plan is None:
+        plan = ComparisonPlan(expected, exceptions)
+    diff = diff_result(plan, result, diff_config, fail_fast)
     # check final result
-    if not test_status:
-        logger.error('Content check failed')
-        logger.error('Expected result (file {}) was :: {}'.format(expected_result_file, expected))
-        logger.error('Actual result was :: {}'.format(result))
+    if len(diff) > 0:
+        logger.error('Content check failed against expected result (file %s): %s', expected_result_file, diff)
     else:
         logger.debug('Content check successful.')
-    # return final test status
-    return test_status
+    return diff
+
+def diff_stream_content(mismatches: List[Tuple[str, Any, Any]], count: int, expected_result_file: str = None, diff_config: Dict[str, Any] = None, array_keys: Iterable[str] = ()) -> JsonDiff:
+    '''
+    Report the differences found by a content check done while streaming the API call result.
+    The result is not available, so null keys are reported as missing
+
+    :param mismatches:           The first mismatches found, as (key, expected value, actual value)
+    :type mismatches:            List[Tuple[str, Any, Any]]
+    :param count:                The total number of mismatches found
+    :type count:                 int
+    :param expected_result_file: The file containing the expected API call result
+    :type expected_result_file:  str
+    :param diff_config:          Configuration object for the diff
+    :type diff_config:           Dict[str, Any]
+    :param array_keys:           The keys of the arrays matched regardless of the order of their items
+    :type array_keys:            Iterable[str]
+
+    :return: The differences found, none if the result is as expected
+    :rtype:  JsonDiff
+    '''
+    if expected_result_file is None:
+        expected_result_file = 'N/A'
+    diff = diff_mismatches(mismatches, count, diff_config, array_keys)
+    if len(diff) > 0:
+        logger.error('Content check failed against expected result (file %s): %s', expected_result_file, diff)
+    else:
+        logger.debug('Content check successful.')
+    return diff
 
 def check_result_code(result_code: int, expected_code: int) -> bool:
     '''
@@ -94,8 +128,8 @@ def check_result_code(result_code: int, expected_code: int) -> bool:
     test_code_status = (result_code == expected_code)
     if not test_code_status:
         logger.error('Code check failed')
-        logger.error('Expected code was :: {}'.format(expected_code))
-        logger.error('Actual result was :: {}'.format(result_code))
+        logger.error('Expected code was :: %s', expected_code)
+        logger.error('Actual result was :: %s', result_code)
     else:
         logger.debug('Code check successful.')
     # return final test status
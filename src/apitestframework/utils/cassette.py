@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List
+
+# library imports
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.response import HTTPResponse
+
+# local imports
+from apitestframework.utils.config import get_conf_value
+
+logger = logging.getLogger(__name__)
+
+# available cassette modes
+MODES = ('record', 'replay')
+# response headers not recorded, as the body is stored decoded and whole
+SKIPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive')
+# start of each recorded line: the request key comes first, so that it is read without decoding the line
+KEY_PREFIX = b'{"key":"'
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    '''
+    Raised when replaying a request that was not recorded
+    '''
+    pass
+
+class Cassette(object):
+    '''
+    Store of recorded HTTP exchanges: a JSON Lines file with one response per line, keyed by request.
+
+    Several processes can record to the same file: each response is appended with a single write
+    '''
+
+    def __init__(self, data: Dict[str, Any]):
+        '''
+        Initialize the cassette
+
+        :param data: Configuration object for the cassette
+        :type data:  Dict[str, Any]
+        '''
+        # mode: "record" responses from the network, or "replay" them without using it
+        self._mode = get_conf_value(data, 'mode', 'replay')
+        if self._mode not in MODES:
+            raise ValueError('Non-valid cassette mode: {}'.format(self._mode))
+        # file: path of the cassette
+        self._path = get_conf_value(data, 'file')
+        if self._path is None:
+            raise ValueError('Missing cassette file')
+        # append: keep the responses already in the file when recording starts, instead of emptying it
+        self._append = get_conf_value(data, 'append', False)
+        self._index = None
+        self._replayed = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def start(self):
+        '''
+        Get ready to record, emptying the file unless appending to it
+        '''
+        if self._mode == 'record' and not self._append:
+            self.reset()
+
+    def reset(self):
+        '''
+        Remove all the recorded responses
+        '''
+        with self._lock:
+            open(self._path, 'wb').close()
+            self._index = None
+            self._replayed = {}
+
+    def record(self, request: requests.PreparedRequest, status: int, reason: str, headers: Dict[str, str], body: bytes):
+        '''
+        Append a response to the cassette
+
+        :param request: The request
+        :type request:  requests.PreparedRequest
+        :param status:  The response status code
+        :type status:   int
+        :param reason:  The response status reason
+        :type reason:   str
+        :param headers: The response headers
+        :type headers:  Dict[str, str]
+        :param body:    The decoded response body
+        :type body:     bytes
+        '''
+        try:
+            text, encoding = body.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(body).decode('ascii'), 'base64'
+        # the key must stay the first field: see KEY_PREFIX
+        line = json.dumps({
+            'key': request_key(request),
+            'method': request.method,
+            'url': request.url,
+            'status': status,
+            'reason': reason,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS},
+            'encoding': encoding,
+            'body': text
+        }, separators=(',', ':')) + '\n'
+        fd = os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode('utf-8'))
+        finally:
+            os.close(fd)
+        with self._lock:
+            self._index = None
+
+    def replay(self, request: requests.PreparedRequest) -> Dict[str, Any]:
+        '''
+        Return the recorded response to a request.
+        A request recorded more than once gets its responses in order, then the last one again
+
+        :param request: The request
+        :type request:  requests.PreparedRequest
+
+        :return: The recorded response: status, reason, headers and body
+        :rtype:  Dict[str, Any]
+        '''
+        key = request_key(request)
+        with self._lock:
+            if self._index is None:
+                self._index = self._load_index()
+            offsets = self._index.get(key)
+            if offsets is None:
+                raise CassetteMissError('No recorded response for {} {} in cassette {}'.format(request.method, request.url, self._path))
+            i = self._replayed.get(key, 0)
+            self._replayed[key] = i + 1
+            offset = offsets[min(i, len(offsets) - 1)]
+        with open(self._path, 'rb') as f:
+            f.seek(offset)
+            entry = json.loads(f.readline().decode('utf-8'))
+        if entry['encoding'] == 'base64':
+            entry['body'] = base64.b64decode(entry['body'])
+        else:
+            entry['body'] = entry['body'].encode('utf-8')
+        return entry
+
+    def new_adapter(self, adapter: HTTPAdapter) -> BaseAdapter:
+        '''
+        Return the transport adapter to mount in place of a network one
+
+        :param adapter: The network adapter
+        :type adapter:  HTTPAdapter
+
+        :return: An adapter recording the responses of the network one, or replaying them
+        :rtype:  BaseAdapter
+        '''
+        if self._mode == 'record':
+            return RecordingAdapter(self, adapter)
+        return ReplayAdapter(self)
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _load_index(self) -> Dict[str, List[int]]:
+        '''
+        Read the position of the recorded responses of each request.
+        Only the key at the start of each line is read, the bodies are not decoded
+
+        :return: The positions of the recorded responses, by request key
+        :rtype:  Dict[str, List[int]]
+        '''
+        index = {}
+        if not os.path.exists(self._path):
+            return index
+        with open(self._path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if line.startswith(KEY_PREFIX):
+                    key = line[len(KEY_PREFIX):line.index(b'"', len(KEY_PREFIX))].decode('ascii')
+                    index.setdefault(key, []).append(offset)
+                elif line.strip():
+                    # written by hand or by other tools: decode the whole line
+                    index.setdefault(json.loads(line.decode('utf-8'))['key'], []).append(offset)
+                offset += len(line)
+        logger.debug('Loaded {} recorded requests from cassette {}'.format(len(index), self._path))
+        return index
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def mode(self) -> str:
+        '''
+        Return the cassette mode
+
+        :return: The cassette mode, "record" or "replay"
+        :rtype:  str
+        '''
+        return self._mode
+
+    @property
+    def append(self) -> bool:
+        '''
+        Return whether recording appends to the responses already in the file
+
+        :return: Whether recording appends to the file
+        :rtype:  bool
+        '''
+        return self._append
+
+    @property
+    def path(self) -> str:
+        '''
+        Return the path of the cassette file
+
+        :return: The path of the cassette file
+        :rtype:  str
+        '''
+        return self._path
+
+class RecordingAdapter(BaseAdapter):
+    '''
+    Transport adapter sending requests through the network and recording their responses
+    '''
+
+    def __init__(self, cassette: Cassette, adapter: HTTPAdapter):
+        '''
+        Initialize the adapter
+
+        :param cassette: The cassette to record to
+        :type cassette:  Cassette
+        :param adapter:  The network adapter
+        :type adapter:   HTTPAdapter
+        '''
+        super().__init__()
+        self._cassette = cassette
+        self._adapter = adapter
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = self._adapter.send(request, **kwargs)
+        body = response.content
+        self._cassette.record(request, response.status_code, response.reason, response.headers, body)
+        # the body was read: let streaming readers read it again
+        response.raw = _build_raw(response.status_code, response.reason, response.headers, body)
+        return response
+
+    def close(self):
+        self._adapter.close()
+
+class ReplayAdapter(BaseAdapter):
+    '''
+    Transport adapter serving recorded responses, without using the network
+    '''
+
+    def __init__(self, cassette: Cassette):
+        '''
+        Initialize the adapter
+
+        :param cassette: The cassette to replay from
+        :type cassette:  Cassette
+        '''
+        super().__init__()
+        self._cassette = cassette
+        self._builder = HTTPAdapter()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        entry = self._cassette.replay(request)
+        raw = _build_raw(entry['status'], entry['reason'], entry['headers'], entry['body'])
+        return self._builder.build_response(request, raw)
+
+    def close(self):
+        self._builder.close()
+
+def request_key(request: requests.PreparedRequest) -> str:
+    '''
+    Return the key of a request in a cassette: a digest of method, URL (query parameters included) and body
+
+    :param request: The request
+    :type request:  requests.PreparedRequest
+
+    :return: The request key
+    :rtype:  str
+    '''
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    h = hashlib.sha256()
+    h.update(request.method.encode('utf-8'))
+    h.update(b'\n')
+    h.update(request.url.encode('utf-8'))
+    h.update(b'\n')
+    h.update(hashlib.sha256(body).digest())
+    return h.hexdigest()
+
+def _build_raw(status: int, reason: str, headers: Dict[str, str], body: bytes) -> HTTPResponse:
+    '''
+    Return a raw response serving a decoded body from memory
+
+    :param status:  The response status code
+    :type status:   int
+    :param reason:  The response status reason
+    :type reason:   str
+    :param headers: The response headers
+    :type headers:  Dict[str, str]
+    :param body:    The decoded response body
+    :type body:     bytes
+
+    :return: The raw response
+    :rtype:  HTTPResponse
+    '''
+    headers = {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS}
+    headers['Content-Length'] = str(len(body))
+    return HTTPResponse(body=io.BytesIO(body), headers=headers, status=status, reason=reason, preload_content=False, decode_content=False)
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+from collections import Counter
+from typing import Any, Dict, List, Set, Tuple, Union
+
+# local imports
+from apitestframework.utils.key_path import compile_key
+from apitestframework.utils.misc import _is_primitive
+
+# a segment of a key: dictionary key or list index
+Segment = Union[str, int]
+
+# available array match modes
+ARRAY_MODES = ('ordered', 'unordered', 'subset')
+
+class ComparisonPlan(object):
+    '''
+    Expected result of a test, compiled once to check responses against it.
+
+    Keys of the expected result are stored pre-split into a tree, with the exceptions
+    already applied, so that a response is checked with a single walk.
+
+    Arrays matched regardless of the order of their items are stored as multisets of the canonical forms of their items,
+    so they are compared in linear time
+    '''
+
+    def __init__(self, expected: Any, exceptions: List[Dict[str, str]] = None, array_modes: List[Dict[str, str]] = None):
+        '''
+        Compile the expected result
+
+        :param expected:    The expected API call result
+        :type expected:     Any
+        :param exceptions:  Fields to ignore when checking the result
+        :type exceptions:   List[Dict[str, str]]
+        :param array_modes: How to match arrays, as [{"key": ..., "mode": "ordered" | "unordered" | "subset"}]
+        :type array_modes:  List[Dict[str, str]]
+        '''
+        # the first exception declared for a key wins: keep the position of each one
+        self._exceptions = {}
+        self._wildcard_exceptions = []
+        for i, e in enumerate(exceptions or []):
+            key_path = compile_key(e['key'])
+            if key_path.wildcard:
+                self._wildcard_exceptions.append((i, key_path, e['type']))
+            else:
+                self._exceptions.setdefault(e['key'], (i, e['type']))
+        self._has_exceptions = len(self._exceptions) > 0 or len(self._wildcard_exceptions) > 0
+        # the first mode declared for an array wins
+        self._array_modes = []
+        for m in array_modes or []:
+            if m['mode'] not in ARRAY_MODES:
+                raise ValueError('Non-valid array match mode: {}'.format(m['mode']))
+            self._array_modes.append((compile_key(m['key']), m['mode']))
+        self._root = _PlanNode()
+        self._leaves = []
+        self._array_keys = set()
+        self._compile(expected, ())
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def check(self, result: Any, limit: int = None) -> List[Tuple[str, Any, Any]]:
+        '''
+        Check an API call result against the expected one
+
+        :param result: The actual API call result
+        :type result:  Any
+        :param limit:  Number of mismatches after which to stop checking, None to check the whole result
+        :type limit:   int
+
+        :return: The mismatches found, as (key, expected value, actual value). Empty if the result is as expected
+        :rtype:  List[Tuple[str, Any, Any]]
+        '''
+        mismatches = []
+        self._walk(self._root, result, mismatches, limit)
+        return mismatches
+
+    def check_array(self, array: '_PlanArray', actual: Any) -> List[Tuple[str, Any, Any]]:
+        '''
+        Check an array of the plan regardless of the order of its items.
+
+        Missing expected items are reported as (key, expected item, None), unexpected ones as (key, None, actual item)
+
+        :param array:  The compiled array, as found in the plan nodes
+        :type array:   _PlanArray
+        :param actual: The actual array
+        :type actual:  Any
+
+        :return: The mismatches found, as (key, expected value, actual value)
+        :rtype:  List[Tuple[str, Any, Any]]
+        '''
+        if not isinstance(actual, list):
+            return [(array.key, array.expected, actual)]
+        mismatches = []
+        canonicals = [self._canonical(v, array.schema, array.segments + (i,)) for i, v in enumerate(actual)]
+        available = Counter(canonicals)
+        for c, v in zip(array.canonicals, array.expected):
+            if available[c] > 0:
+                available[c] -= 1
+            else:
+                mismatches.append((array.key, v, None))
+        if array.mode == 'unordered':
+            expected = Counter(array.canonicals)
+            for c, v in zip(canonicals, actual):
+                if expected[c] > 0:
+                    expected[c] -= 1
+                else:
+                    mismatches.append((array.key, None, v))
+        return mismatches
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _compile(self, expected: Any, segments: Tuple[Segment, ...]):
+        '''
+        Add the leaves of the expected result to the plan
+
+        :param expected: The (part of the) expected result to add
+        :type expected:  Any
+        :param segments: The segments of the key of the expected result
+        :type segments:  Tuple[Segment, ...]
+        '''
+        if isinstance(expected, dict):
+            for k, v in expected.items():
+                self._compile(v, segments + (k,))
+        elif isinstance(expected, list):
+            mode = self._get_array_mode(segments)
+            if mode != 'ordered':
+                node = self._root
+                for s in segments:
+                    node = node.child(s)
+                node.array = self._compile_array(expected, segments, mode)
+                return
+            for i, v in enumerate(expected):
+                self._compile(v, segments + (i,))
+        elif _is_primitive(expected) and len(segments) > 0:
+            key = '.'.join(str(s) for s in segments)
+            exc_type = self._get_exception(key, segments)
+            self._leaves.append((key, expected, exc_type))
+            if exc_type == 'ignore':
+                return
+            node = self._root
+            for s in segments:
+                node = node.child(s)
+            node.leaf = _PlanLeaf(key, expected, exc_type)
+
+    def _compile_array(self, expected: List[Any], segments: Tuple[Segment, ...], mode: str) -> '_PlanArray':
+        '''
+        Compile an array matched regardless of the order of its items
+
+        :param expected: The expected array
+        :type expected:  List[Any]
+        :param segments: The segments of the key of the array
+        :type segments:  Tuple[Segment, ...]
+        :param mode:     The match mode, "unordered" or "subset"
+        :type mode:      str
+
+        :return: The compiled array
+        :rtype:  _PlanArray
+        '''
+        schema = None
+        for v in expected:
+            schema = _merge_schemas(schema, _get_schema(v))
+        canonicals = [self._canonical(v, schema, segments + (i,)) for i, v in enumerate(expected)]
+        self._array_keys.add('.'.join(str(s) for s in segments))
+        return _PlanArray('.'.join(str(s) for s in segments), expected, mode, segments, schema, canonicals)
+
+    def _canonical(self, value: Any, schema: Tuple, segments: Tuple[Segment, ...]) -> Any:
+        '''
+        Return a hashable form of a value, equal for values matching each other.
+
+        Only the fields found in the expected items are kept, exceptions are applied
+        and the items of nested arrays matched regardless of their order are counted
+
+        :param value:    The value
+        :type value:     Any
+        :param schema:   The fields of the expected items, see _get_schema
+        :type schema:    Tuple
+        :param segments: The segments of the key of the value
+        :type segments:  Tuple[Segment, ...]
+
+        :return: The canonical form of the value
+        :rtype:  Any
+        '''
+        if isinstance(value, dict):
+            fields = schema[1] if schema is not None and schema[0] == 'd' else None
+            items = []
+            for k, v in value.items():
+                sub_schema = None
+                if fields is not None:
+                    sub_schema = fields.get(k, _NULL_SCHEMA)
+                    if sub_schema == _NULL_SCHEMA:
+                        # never expected, or only as null: not checked
+                        continue
+                c = self._canonical(v, sub_schema, segments + (k,))
+                if c is not _IGNORED:
+                    items.append((k, c))
+            return ('d', frozenset(items))
+        if isinstance(value, list):
+            item_schema = schema[1] if schema is not None and schema[0] == 'l' else None
+            canonicals = [self._canonical(v, item_schema, segments + (i,)) for i, v in enumerate(value)]
+            if self._get_array_mode(segments) != 'ordered':
+                return ('u', frozenset(Counter(canonicals).items()))
+            return ('l', tuple(canonicals))
+        if _is_primitive(value) and self._has_exceptions:
+            exc_type = self._get_exception('.'.join(str(s) for s in segments), segments)
+            if exc_type == 'ignore':
+                return _IGNORED
+            if exc_type == 'exist':
+                return ('e',)
+        if value is None:
+            return ('z',)
+        if isinstance(value, bool):
+            return ('b', value)
+        if isinstance(value, str):
+            return ('s', value)
+        return ('n', value)
+
+    def _get_array_mode(self, segments: Tuple[Segment, ...]) -> str:
+        '''
+        Return the match mode of the array with the given key
+
+        :param segments: The segments of the key of the array
+        :type segments:  Tuple[Segment, ...]
+
+        :return: The match mode, "ordered" if none declared
+        :rtype:  str
+        '''
+        for key_path, mode in self._array_modes:
+            if key_path.matches(segments):
+                return mode
+        return 'ordered'
+
+    def _get_exception(self, key: str, segments: Tuple[Segment, ...]) -> str:
+        '''
+        Return the type of the first exception declared for a key, if any
+
+        :param key:      The key in dot notation
+        :type key:       str
+        :param segments: The segments of the key
+        :type segments:  Tuple[Segment, ...]
+
+        :return: The exception type, None if the key has no exception
+        :rtype:  str
+        '''
+        exception = self._exceptions.get(key)
+        for i, key_path, exc_type in self._wildcard_exceptions:
+            if exception is not None and exception[0] < i:
+                break
+            if key_path.matches(segments):
+                exception = (i, exc_type)
+                break
+        return exception[1] if exception is not None else None
+
+    def _walk(self, node: '_PlanNode', actual: Any, mismatches: List[Tuple[str, Any, Any]], limit: int = None) -> bool:
+        '''
+        Check a (part of the) result against a node of the plan
+
+        :param node:       The node of the plan
+        :type node:        _PlanNode
+        :param actual:     The part of the actual result matching the node
+        :type actual:      Any
+        :param mismatches: The mismatches found so far
+        :type mismatches:  List[Tuple[str, Any, Any]]
+        :param limit:      Number of mismatches after which to stop checking, None to check the whole result
+        :type limit:       int
+
+        :return: Whether to go on checking
+        :rtype:  bool
+        '''
+        for segment, child in node.children.items():
+            value = _resolve(actual, segment)
+            if child.array is not None:
+                mismatches.extend(self.check_array(child.array, value))
+            elif child.leaf is None:
+                if not self._walk(child, value, mismatches, limit):
+                    return False
+            elif child.leaf.exc_type is None:
+                if value != child.leaf.expected:
+                    mismatches.append((child.leaf.key, child.leaf.expected, value))
+            elif child.leaf.exc_type == 'exist':
+                if not _is_primitive(value):
+                    mismatches.append((child.leaf.key, child.leaf.expected, value))
+            if limit is not None and len(mismatches) >= limit:
+                return False
+        return True
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def root(self) -> '_PlanNode':
+        '''
+        Return the root node of the plan
+
+        :return: The root node of the plan
+        :rtype:  _PlanNode
+        '''
+        return self._root
+
+    @property
+    def array_keys(self) -> Set[str]:
+        '''
+        Return the keys of the arrays matched regardless of the order of their items
+
+        :return: The keys of the arrays in dot notation
+        :rtype:  Set[str]
+        '''
+        return self._array_keys
+
+    @property
+    def keys(self) -> List[str]:
+        '''
+        Return the keys of the expected result in dot notation, as in build_keys_list
+
+        :return: The keys of the expected result
+        :rtype:  List[str]
+        '''
+        return [l[0] for l in self._leaves]
+
+    @property
+    def values(self) -> Dict[str, Any]:
+        '''
+        Return the flattened expected result
+
+        :return: The values of the expected result, by key in dot notation
+        :rtype:  Dict[str, Any]
+        '''
+        return {l[0]: l[1] for l in self._leaves}
+
+class _PlanNode(object):
+    '''
+    Node of a comparison plan: either a leaf or a container of other nodes
+    '''
+    __slots__ = ('children', 'leaf', 'array')
+
+    def __init__(self):
+        self.children = {}
+        self.leaf = None
+        self.array = None
+
+    def child(self, segment: Segment) -> '_PlanNode':
+        '''
+        Return the child node for a segment, creating it if needed
+        '''
+        node = self.children.get(segment)
+        if node is None:
+            node = _PlanNode()
+            self.children[segment] = node
+        return node
+
+    def leaves(self) -> List['_PlanLeaf']:
+        '''
+        Return all the leaves below this node, arrays matched regardless of the order of their items being leaves
+        '''
+        if self.leaf is not None:
+            return [self.leaf]
+        if self.array is not None:
+            return [self.array]
+        leaves = []
+        for child in self.children.values():
+            leaves.extend(child.leaves())
+        return leaves
+
+class _PlanLeaf(object):
+    '''
+    Expected value of a key, with its exception type if any
+    '''
+    __slots__ = ('key', 'expected', 'exc_type')
+
+    def __init__(self, key: str, expected: Any, exc_type: str = None):
+        self.key = key
+        self.expected = expected
+        self.exc_type = exc_type
+
+class _PlanArray(object):
+    '''
+    Expected array matched regardless of the order of its items, with the canonical forms of its items
+    '''
+    __slots__ = ('key', 'expected', 'mode', 'segments', 'schema', 'canonicals')
+
+    def __init__(self, key: str, expected: List[Any], mode: str, segments: Tuple[Segment, ...], schema: Tuple, canonicals: List[Any]):
+        self.key = key
+        self.expected = expected
+        self.mode = mode
+        self.segments = segments
+        self.schema = schema
+        self.canonicals = canonicals
+
+# marker of a value not checked
+_IGNORED = object()
+# schema of the fields never expected, or only as null
+_NULL_SCHEMA = ('n',)
+# schema of the fields expected with different shapes
+_ANY_SCHEMA = ('*',)
+
+def _get_schema(value: Any) -> Tuple:
+    '''
+    Return the shape of a value: its fields, recursively
+
+    :param value: The value
+    :type value:  Any
+
+    :return: ('d', {field: schema}) for dictionaries, ('l', item schema) for lists, ('n',) for null, ('p',) for other values
+    :rtype:  Tuple
+    '''
+    if isinstance(value, dict):
+        return ('d', {k: _get_schema(v) for k, v in value.items()})
+    if isinstance(value, list):
+        schema = None
+        for v in value:
+            schema = _merge_schemas(schema, _get_schema(v))
+        return ('l', schema)
+    if value is None:
+        return _NULL_SCHEMA
+    return ('p',)
+
+def _merge_schemas(a: Tuple, b: Tuple) -> Tuple:
+    '''
+    Merge the shapes of two values
+
+    :param a: The first schema, None if unknown
+    :type a:  Tuple
+    :param b: The second schema, None if unknown
+    :type b:  Tuple
+
+    :return: The merged schema, ('*',) (any value) if the shapes conflict
+    :rtype:  Tuple
+    '''
+    if a is None or a == _NULL_SCHEMA:
+        return b
+    if b is None or b == _NULL_SCHEMA:
+        return a
+    if a[0] != b[0] or a == _ANY_SCHEMA:
+        return _ANY_SCHEMA
+    if a[0] == 'd':
+        fields = dict(a[1])
+        for k, v in b[1].items():
+            fields[k] = _merge_schemas(fields[k], v) if k in fields else v
+        return ('d', fields)
+    if a[0] == 'l':
+        return ('l', _merge_schemas(a[1], b[1]))
+    return a
+
+def _resolve(data: Any, segment: Segment) -> Any:
+    '''
+    Return the value of a segment in a container, None if not found
+
+    :param data:    The container
+    :type data:     Any
+    :param segment: Dictionary key or list index
+    :type segment:  Segment
+
+    :return: The value of the segment
+    :rtype:  Any
+    '''
+    if isinstance(segment, int):
+        if isinstance(data, list) and segment < len(data):
+            return data[segment]
+        return None
+    if isinstance(data, dict):
+        return data.get(segment)
+    return None
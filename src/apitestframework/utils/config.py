@@ -18,12 +18,14 @@
 # limitations under the License.
 
 # system imports
-import json
 import logging
 import os
 import sys
 from typing import Any, Dict
 
+# local imports
+from apitestframework.utils.json_codec import json_codec
+
 logger = logging.getLogger(__name__)
 
 def load_config(config_file: str) -> Dict[str, Any]:
@@ -42,10 +44,8 @@ def load_config(config_file: str) -> Dict[str, Any]:
         config_path = os.path.abspath(config_file)
         # check if config file exists
         if os.path.exists(config_path):
-            with open(config_path, 'r', encoding="utf-8") as j:
-                logger.debug('Loading configuration file {}'.format(config_path))
-                config = json.load(j)
-            return config
+            logger.debug('Loading configuration file {}'.format(config_path))
+            return json_codec.load_file(config_path)
         else:
             sys.exit('Missing configuration file (json format).\n\nPlease make sure the file {} exists.'.format(config_file))
     except:
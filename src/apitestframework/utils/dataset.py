@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import csv
+import os
+import re
+from typing import Any, Dict, Iterator
+
+# local imports
+from apitestframework.utils.json_codec import json_codec
+
+# supported formats of the dataset files, by extension
+DATASET_FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl'
+}
+# placeholder of a column value in the test definition
+PLACEHOLDER = re.compile(r'\$\{([^}]+)\}')
+
+def get_dataset_format(path: str, dataset_format: str = None) -> str:
+    '''
+    Return the format of a dataset file, from its extension if not given
+
+    :param path:           Path of the dataset file
+    :type path:            str
+    :param dataset_format: The declared format, if any
+    :type dataset_format:  str
+
+    :return: The format of the file, "csv" or "jsonl"
+    :rtype:  str
+    '''
+    if dataset_format is None:
+        dataset_format = DATASET_FORMATS.get(os.path.splitext(path)[1].lower())
+    if dataset_format not in DATASET_FORMATS.values():
+        raise ValueError('Non-valid dataset format for {}: {}'.format(path, dataset_format))
+    return dataset_format
+
+def iter_rows(path: str, dataset_format: str = None) -> Iterator[Dict[str, Any]]:
+    '''
+    Read the rows of a dataset file one at a time, without loading the whole file in memory
+
+    CSV rows are mapped by the header line and all their values are strings.
+    JSON Lines rows must be objects and keep their types. Blank lines are skipped
+
+    :param path:           Path of the dataset file
+    :type path:            str
+    :param dataset_format: The format of the file, by default from its extension
+    :type dataset_format:  str
+
+    :return: An iterator over the rows
+    :rtype:  Iterator[Dict[str, Any]]
+    '''
+    dataset_format = get_dataset_format(path, dataset_format)
+    if dataset_format == 'csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+    else:
+        with open(path, 'rb') as f:
+            for n, line in enumerate(f, 1):
+                if line.strip() == b'':
+                    continue
+                row = json_codec.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError('Non-valid row at line {} of {}: not an object'.format(n, path))
+                yield row
+
+def render(value: Any, row: Dict[str, Any]) -> Any:
+    '''
+    Fill in the ${column} placeholders of a value with the values of a dataset row.
+
+    Dictionaries and lists are rendered recursively. A string made of a single placeholder
+    is replaced by the column value as it is, otherwise the value is formatted into the string
+
+    :param value: The value to render
+    :type value:  Any
+    :param row:   The dataset row
+    :type row:    Dict[str, Any]
+
+    :return: The rendered value
+    :rtype:  Any
+    '''
+    if isinstance(value, str):
+        m = PLACEHOLDER.fullmatch(value)
+        if m is not None:
+            return _get_column(row, m.group(1))
+        if '${' not in value:
+            return value
+        return PLACEHOLDER.sub(lambda m: str(_get_column(row, m.group(1))), value)
+    if isinstance(value, dict):
+        return {k: render(v, row) for k, v in value.items()}
+    if isinstance(value, list):
+        return [render(v, row) for v in value]
+    return value
+
+def has_placeholders(value: Any) -> bool:
+    '''
+    Return whether a value contains any ${column} placeholder
+
+    :param value: The value to look into
+    :type value:  Any
+
+    :return: Whether the value contains placeholders
+    :rtype:  bool
+    '''
+    if isinstance(value, str):
+        return PLACEHOLDER.search(value) is not None
+    if isinstance(value, dict):
+        return any(has_placeholders(v) for v in value.values())
+    if isinstance(value, list):
+        return any(has_placeholders(v) for v in value)
+    return False
+
+def _get_column(row: Dict[str, Any], column: str) -> Any:
+    '''
+    Return the value of a column of a dataset row
+
+    :param row:    The dataset row
+    :type row:     Dict[str, Any]
+    :param column: The column name
+    :type column:  str
+
+    :return: The column value
+    :rtype:  Any
+    '''
+    try:
+        return row[column]
+    except KeyError:
+        raise KeyError('Column "{}" not found in dataset row'.format(column)) from None
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import time
+from typing import Optional, Tuple
+
+# shortest timeout given to a call started right before the deadline
+MIN_TIMEOUT = 0.001
+
+class Deadline(object):
+    '''
+    Time limit of a test run, shared by its suites and tests, and by the processes running them
+    '''
+
+    def __init__(self, seconds: float = None):
+        '''
+        Initialize the deadline
+
+        :param seconds: Seconds from the start of the run to the deadline, None for no deadline
+        :type seconds:  float
+        '''
+        if seconds is not None and seconds <= 0:
+            raise ValueError('Non-valid deadline: {}'.format(seconds))
+        self._seconds = seconds
+        # wall clock time, comparable across processes
+        self._end = None
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def start(self):
+        '''
+        Start counting down to the deadline
+        '''
+        if self._seconds is not None:
+            self._end = time.time() + self._seconds
+
+    def remaining(self) -> Optional[float]:
+        '''
+        Return the time left before the deadline
+
+        :return: Seconds left, None if there is no deadline or it was not started
+        :rtype:  Optional[float]
+        '''
+        if self._end is None:
+            return None
+        return max(0.0, self._end - time.time())
+
+    def clamp(self, timeout: Tuple[Optional[float], Optional[float]]) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        '''
+        Shorten the timeouts of a call so that it does not go past the deadline
+
+        :param timeout: Connect and read timeouts of the call, None for no timeout
+        :type timeout:  Tuple[Optional[float], Optional[float]]
+
+        :return: The timeouts to use, None for no timeout
+        :rtype:  Optional[Tuple[Optional[float], Optional[float]]]
+        '''
+        remaining = self.remaining()
+        if remaining is not None:
+            remaining = max(remaining, MIN_TIMEOUT)
+            timeout = tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        if timeout[0] is None and timeout[1] is None:
+            return None
+        return timeout
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def expired(self) -> bool:
+        '''
+        Return whether the deadline passed
+
+        :return: Whether the deadline passed
+        :rtype:  bool
+        '''
+        return self._end is not None and time.time() >= self._end
+
+    @property
+    def seconds(self) -> float:
+        '''
+        Return the length of the run allowed by the deadline
+
+        :return: Seconds from the start of the run to the deadline, None for no deadline
+        :rtype:  float
+        '''
+        return self._seconds
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+# local imports
+from apitestframework.utils.comparison_plan import ComparisonPlan
+from apitestframework.utils.json_codec import json_codec
+
+logger = logging.getLogger(__name__)
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError('{} is shared between tests and cannot be modified'.format(type(self).__name__))
+
+class FrozenDict(dict):
+    '''
+    Dictionary that cannot be modified
+    '''
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(list):
+    '''
+    List that cannot be modified
+    '''
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = clear = extend = insert = pop = remove = reverse = sort = _immutable
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+def freeze(value: Any) -> Any:
+    '''
+    Return an immutable copy of a JSON value
+
+    :param value: The JSON value
+    :type value:  Any
+
+    :return: The value, with dictionaries and lists replaced by their immutable counterparts
+    :rtype:  Any
+    '''
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+class FixtureCache(object):
+    '''
+    Cache of the parsed expected result files.
+
+    Files are identified by resolved path, modification time and size, so a changed file is parsed again;
+    files with the same content share the same immutable value, and the same comparison plan for the same exceptions
+    '''
+
+    def __init__(self):
+        '''
+        Initialize the cache
+        '''
+        self._digests = {}
+        self._values = {}
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def load(self, path: str) -> Any:
+        '''
+        Return the content of a JSON file, parsing it only the first time
+
+        :param path: Path of the file
+        :type path:  str
+
+        :return: The immutable content of the file
+        :rtype:  Any
+        '''
+        return self._values[self._digest(path)]
+
+    def plan(self, path: str, exceptions: List[Dict[str, str]] = None, array_modes: List[Dict[str, str]] = None) -> ComparisonPlan:
+        '''
+        Return the comparison plan of a JSON file with the given exceptions and array match modes, compiling it only the first time
+
+        :param path:        Path of the file
+        :type path:         str
+        :param exceptions:  Fields to ignore when checking the result
+        :type exceptions:   List[Dict[str, str]]
+        :param array_modes: How to match arrays
+        :type array_modes:  List[Dict[str, str]]
+
+        :return: The comparison plan
+        :rtype:  ComparisonPlan
+        '''
+        digest = self._digest(path)
+        key = (digest, json.dumps([exceptions or [], array_modes or []], sort_keys=True))
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = ComparisonPlan(self._values[digest], exceptions, array_modes)
+            with self._lock:
+                plan = self._plans.setdefault(key, plan)
+        return plan
+
+    def read(self, path: str, exceptions: List[Dict[str, str]] = None, array_modes: List[Dict[str, str]] = None) -> Tuple[Any, ComparisonPlan]:
+        '''
+        Return the content of a JSON file and its comparison plan, without adding them to the cache.
+        Used for files read by a single test, e.g. the rows of a dataset: the cached ones are shared anyway
+
+        :param path:        Path of the file
+        :type path:         str
+        :param exceptions:  Fields to ignore when checking the result
+        :type exceptions:   List[Dict[str, str]]
+        :param array_modes: How to match arrays
+        :type array_modes:  List[Dict[str, str]]
+
+        :return: The immutable content of the file and the comparison plan
+        :rtype:  Tuple[Any, ComparisonPlan]
+        '''
+        real_path = os.path.realpath(path)
+        st = os.stat(real_path)
+        if (real_path, st.st_mtime_ns, st.st_size) in self._digests:
+            return self.load(path), self.plan(path, exceptions, array_modes)
+        with open(real_path, 'rb') as f:
+            value = freeze(json_codec.loads(f.read()))
+        return value, ComparisonPlan(value, exceptions, array_modes)
+
+    def export(self, paths: List[str]) -> Dict[str, Any]:
+        '''
+        Return the cached content of some files, with their comparison plans, to be preloaded by another process
+
+        :param paths: Paths of the files
+        :type paths:  List[str]
+
+        :return: The digest of each file by resolved path, the values and the comparison plans by digest
+        :rtype:  Dict[str, Any]
+        '''
+        digests = {os.path.realpath(p): self._digest(p) for p in paths}
+        with self._lock:
+            values = {d: self._values[d] for d in set(digests.values())}
+            plans = {k: p for k, p in self._plans.items() if k[0] in values}
+        return {
+            'paths': digests,
+            'values': values,
+            'plans': plans
+        }
+
+    def preload(self, data: Dict[str, Any]):
+        '''
+        Add to the cache the content of files exported by another process. The files must not have changed since
+
+        :param data: The exported content, see export
+        :type data:  Dict[str, Any]
+        '''
+        with self._lock:
+            for real_path, digest in data['paths'].items():
+                st = os.stat(real_path)
+                self._digests[(real_path, st.st_mtime_ns, st.st_size)] = digest
+            for digest, value in data['values'].items():
+                self._values.setdefault(digest, value)
+            for key, plan in data['plans'].items():
+                self._plans.setdefault(key, plan)
+
+    def clear(self):
+        '''
+        Remove all the files from the cache
+        '''
+        with self._lock:
+            self._digests = {}
+            self._values = {}
+            self._plans = {}
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _digest(self, path: str) -> str:
+        '''
+        Return the digest of the content of a file, parsing the file if its content is not cached yet
+
+        :param path: Path of the file
+        :type path:  str
+
+        :return: The SHA-256 digest of the content of the file
+        :rtype:  str
+        '''
+        real_path = os.path.realpath(path)
+        st = os.stat(real_path)
+        key = (real_path, st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(key)
+        if digest is None:
+            with open(real_path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if digest not in self._values:
+                logger.debug('Parsing expected result file {}'.format(real_path))
+                value = freeze(json_codec.loads(content))
+                with self._lock:
+                    self._values.setdefault(digest, value)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    # -----------------------
+    # ----- Python API ------
+    # -----------------------
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+# the cache shared by all the tests of the process
+fixture_cache = FixtureCache()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+import logging
+from typing import Any, Union
+
+# library imports
+import requests
+try:
+    import orjson
+except ImportError:
+    # orjson backend not available
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    # msgspec backend not available
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+# decoding backends, in order of preference
+BACKENDS = ('orjson', 'msgspec', 'json')
+# encodings of the responses decoded from their bytes, without going through the text
+UTF8_NAMES = ('utf-8', 'utf8', 'utf_8')
+# numbers the fast backends could round differently, integers beyond 64 bits, have 19 digits or more:
+# looked for by turning all digits into zeros, faster than a regular expression
+_DIGITS = bytes(0x30 if 0x30 <= c <= 0x39 else c for c in range(256))
+_DIGITS_STR = str.maketrans('123456789', '000000000')
+_LONG_NUMBER = '0' * 19
+
+class JsonCodec(object):
+    '''
+    JSON decoder using the fastest backend installed, with the same results as the json module.
+
+    Fast backends reject or round some numbers the json module accepts (integers beyond 64 bits, NaN, Infinity, 1e400):
+    documents containing long numbers, or rejected by the fast backend, are decoded by the json module,
+    which also raises the errors
+    '''
+
+    def __init__(self, backend: str = None):
+        '''
+        Initialize the codec
+
+        :param backend: Name of the backend to use, one of BACKENDS. The first one installed by default
+        :type backend:  str
+        '''
+        if backend is None:
+            backend = next(b for b in BACKENDS if b == 'json' or globals()[b] is not None)
+        if backend not in BACKENDS:
+            raise ValueError('Non-valid JSON backend: {}'.format(backend))
+        if backend != 'json' and globals()[backend] is None:
+            raise ValueError('JSON backend {} is not installed'.format(backend))
+        self._backend = backend
+        if backend == 'orjson':
+            self._decode = orjson.loads
+            self._errors = (orjson.JSONDecodeError,)
+        elif backend == 'msgspec':
+            self._decode = msgspec.json.decode
+            self._errors = (msgspec.DecodeError,)
+        else:
+            self._decode = None
+            self._errors = ()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        '''
+        Decode a JSON document. Bytes are decoded as UTF-8
+
+        :param data: The JSON document
+        :type data:  Union[bytes, str]
+
+        :return: The decoded value
+        :rtype:  Any
+        '''
+        if self._decode is not None and not self._has_long_number(data):
+            try:
+                return self._decode(data)
+            except self._errors:
+                pass
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def load_file(self, path: str) -> Any:
+        '''
+        Decode a UTF-8 JSON file
+
+        :param path: Path of the file
+        :type path:  str
+
+        :return: The decoded value
+        :rtype:  Any
+        '''
+        with open(path, 'rb') as f:
+            return self.loads(f.read())
+
+    def loads_response(self, r: requests.Response) -> Any:
+        '''
+        Decode the JSON body of a response, like requests.Response.json does
+
+        :param r: The response
+        :type r:  requests.Response
+
+        :return: The decoded body
+        :rtype:  Any
+        '''
+        if self._decode is not None and r.encoding is not None and r.encoding.lower() in UTF8_NAMES:
+            content = r.content
+            if not self._has_long_number(content):
+                try:
+                    return self._decode(content)
+                except self._errors:
+                    pass
+        # anything else, errors included, as requests does it
+        return r.json()
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _has_long_number(self, data: Union[bytes, str]) -> bool:
+        '''
+        Return whether a document may contain numbers the fast backend could decode differently.
+        Long digit sequences in strings are reported as well, only making the decoding slower
+
+        :param data: The JSON document
+        :type data:  Union[bytes, str]
+
+        :return: Whether the document contains 19 digits or more in a row
+        :rtype:  bool
+        '''
+        if isinstance(data, str):
+            return _LONG_NUMBER in data.translate(_DIGITS_STR)
+        return _LONG_NUMBER.encode('ascii') in data.translate(_DIGITS)
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def backend(self) -> str:
+        '''
+        Return the name of the backend in use
+
+        :return: The name of the backend
+        :rtype:  str
+        '''
+        return self._backend
+
+# the codec shared by the whole process
+json_codec = JsonCodec()
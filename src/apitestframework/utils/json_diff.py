@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+from typing import Any, Dict, Iterable, List, Tuple
+
+# local imports
+from apitestframework.utils.comparison_plan import ComparisonPlan
+from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.key_path import compile_key
+
+# kinds of difference
+MISSING = 'missing'
+EXTRA = 'extra'
+CHANGED = 'changed'
+TYPE_CHANGED = 'type_changed'
+# default maximum number of differences kept for each test
+MAX_ENTRIES = 100
+# default maximum length of the values of the differences
+MAX_VALUE_LENGTH = 200
+# items kept for each object or array in the values of the differences
+_MAX_ITEMS = 10
+# levels of objects and arrays kept in the values of the differences
+_MAX_DEPTH = 3
+
+class DiffEntry(object):
+    '''
+    A difference between the expected and the actual result, with values shortened to a maximum length
+    '''
+    __slots__ = ('kind', 'path', 'expected', 'actual')
+
+    def __init__(self, kind: str, path: str, expected: Any, actual: Any):
+        '''
+        Initialize the difference
+
+        :param kind:     Kind of difference: MISSING, EXTRA, CHANGED or TYPE_CHANGED
+        :type kind:      str
+        :param path:     Key of the difference, in dot notation
+        :type path:      str
+        :param expected: Expected value, None for an EXTRA difference
+        :type expected:  Any
+        :param actual:   Actual value, None for a MISSING difference
+        :type actual:    Any
+        '''
+        self.kind = kind
+        self.path = path
+        self.expected = expected
+        self.actual = actual
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''
+        Return the difference as a JSON serializable object
+
+        :return: Kind, path, expected and actual value and, for TYPE_CHANGED, the types
+        :rtype:  Dict[str, Any]
+        '''
+        entry = {'kind': self.kind, 'path': self.path}
+        if self.kind != EXTRA:
+            entry['expected'] = self.expected
+        if self.kind != MISSING:
+            entry['actual'] = self.actual
+        if self.kind == TYPE_CHANGED:
+            entry['expectedType'] = _type_name(self.expected)
+            entry['actualType'] = _type_name(self.actual)
+        return entry
+
+    def __str__(self) -> str:
+        if self.kind == MISSING:
+            return 'missing {} (expected {})'.format(self.path, _dumps(self.expected))
+        if self.kind == EXTRA:
+            return 'extra {}: {}'.format(self.path, _dumps(self.actual))
+        if self.kind == TYPE_CHANGED:
+            return 'type changed {}: {} {} -> {} {}'.format(self.path, _type_name(self.expected), _dumps(self.expected), _type_name(self.actual), _dumps(self.actual))
+        return 'changed {}: {} -> {}'.format(self.path, _dumps(self.expected), _dumps(self.actual))
+
+class JsonDiff(object):
+    '''
+    The differences between the expected and the actual result of a test, up to a maximum number.
+
+    Converted to text only when written, e.g. by the logs
+    '''
+    __slots__ = ('entries', 'count', 'complete')
+
+    def __init__(self, entries: List[DiffEntry], count: int, complete: bool = True):
+        '''
+        Initialize the diff
+
+        :param entries:  The differences kept
+        :type entries:   List[DiffEntry]
+        :param count:    The number of differences found
+        :type count:     int
+        :param complete: Whether the whole result was compared, False if the comparison stopped at the maximum number of differences
+        :type complete:  bool
+        '''
+        self.entries = entries
+        self.count = count
+        self.complete = complete
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        '''
+        Return the differences kept as JSON serializable objects
+
+        :return: The differences kept
+        :rtype:  List[Dict[str, Any]]
+        '''
+        return [e.to_dict() for e in self.entries]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __str__(self) -> str:
+        lines = ['{}{} differences{}'.format(self.count, '' if self.complete else '+', ', first {} shown'.format(len(self.entries)) if len(self.entries) < self.count else '')]
+        lines.extend('  {}'.format(e) for e in self.entries)
+        return '\n'.join(lines)
+
+def diff_result(plan: ComparisonPlan, result: Any, data: Dict[str, Any] = None, fail_fast: bool = False) -> JsonDiff:
+    '''
+    Compare a result to the expected one
+
+    :param plan:      The expected result, compiled
+    :type plan:       ComparisonPlan
+    :param result:    The actual result
+    :type result:     Any
+    :param data:      Configuration object for the diff
+    :type data:       Dict[str, Any]
+    :param fail_fast: Whether to stop comparing once the maximum number of differences is found
+    :type fail_fast:  bool
+
+    :return: The differences found
+    :rtype:  JsonDiff
+    '''
+    # maxEntries: maximum number of differences kept, None for all of them
+    max_entries = get_conf_value(data, 'maxEntries', MAX_ENTRIES)
+    mismatches = plan.check(result, max_entries if fail_fast else None)
+    complete = not fail_fast or max_entries is None or len(mismatches) < max_entries
+    return diff_mismatches(mismatches, len(mismatches), data, plan.array_keys, result, complete)
+
+def diff_mismatches(mismatches: List[Tuple[str, Any, Any]], count: int, data: Dict[str, Any] = None, array_keys: Iterable[str] = (), result: Any = None, complete: bool = True) -> JsonDiff:
+    '''
+    Build the differences from the mismatches found by a comparison plan
+
+    :param mismatches: The mismatches, as (key, expected value, actual value)
+    :type mismatches:  List[Tuple[str, Any, Any]]
+    :param count:      The total number of mismatches, some of them possibly not given
+    :type count:       int
+    :param data:       Configuration object for the diff
+    :type data:        Dict[str, Any]
+    :param array_keys: The keys of the arrays matched regardless of the order of their items
+    :type array_keys:  Iterable[str]
+    :param result:     The actual result, to tell missing keys from null ones. If None, null keys are reported as missing
+    :type result:      Any
+    :param complete:   Whether the whole result was compared
+    :type complete:    bool
+
+    :return: The differences
+    :rtype:  JsonDiff
+    '''
+    max_entries = get_conf_value(data, 'maxEntries', MAX_ENTRIES)
+    # maxValueLength: maximum length of the values of the differences
+    max_value_length = get_conf_value(data, 'maxValueLength', MAX_VALUE_LENGTH)
+    entries = []
+    for key, expected, actual in mismatches[:max_entries]:
+        kind = _classify(key, expected, actual, array_keys, result)
+        entries.append(DiffEntry(kind, key, _shorten(expected, max_value_length), _shorten(actual, max_value_length)))
+    return JsonDiff(entries, count, complete)
+
+def _classify(key: str, expected: Any, actual: Any, array_keys: Iterable[str], result: Any) -> str:
+    '''
+    Return the kind of a mismatch
+
+    :param key:        The key of the mismatch
+    :type key:         str
+    :param expected:   The expected value
+    :type expected:    Any
+    :param actual:     The actual value
+    :type actual:      Any
+    :param array_keys: The keys of the arrays matched regardless of the order of their items
+    :type array_keys:  Iterable[str]
+    :param result:     The actual result, None if not available
+    :type result:      Any
+
+    :return: The kind of difference
+    :rtype:  str
+    '''
+    if key in array_keys:
+        # items of arrays matched regardless of their order: one side is None
+        if expected is None:
+            return EXTRA
+        return MISSING if actual is None else TYPE_CHANGED
+    if actual is None:
+        if result is None or next(compile_key(key).find(result), None) is None:
+            return MISSING
+    if _type_name(expected) != _type_name(actual):
+        return TYPE_CHANGED
+    return CHANGED
+
+def _type_name(value: Any) -> str:
+    '''
+    Return the JSON type of a value
+
+    :param value: The value
+    :type value:  Any
+
+    :return: The JSON type: null, boolean, number, string, object or array
+    :rtype:  str
+    '''
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, dict):
+        return 'object'
+    if isinstance(value, list):
+        return 'array'
+    return type(value).__name__
+
+def _shorten(value: Any, max_length: int, depth: int = 0) -> Any:
+    '''
+    Return a copy of a value small enough to be reported: strings are truncated,
+    objects and arrays keep their first items and levels only
+
+    :param value:      The value
+    :type value:       Any
+    :param max_length: Maximum length of the strings
+    :type max_length:  int
+    :param depth:      Level of the value in the original one
+    :type depth:       int
+
+    :return: The shortened value
+    :rtype:  Any
+    '''
+    if isinstance(value, str):
+        return value if max_length is None or len(value) <= max_length else value[:max_length] + '...'
+    if isinstance(value, dict):
+        if depth >= _MAX_DEPTH:
+            return '{{...{} keys}}'.format(len(value))
+        short = {}
+        for i, (k, v) in enumerate(value.items()):
+            if i == _MAX_ITEMS:
+                short['...'] = '{} more keys'.format(len(value) - _MAX_ITEMS)
+                break
+            short[k] = _shorten(v, max_length, depth + 1)
+        return short
+    if isinstance(value, list):
+        if depth >= _MAX_DEPTH:
+            return '[...{} items]'.format(len(value))
+        short = [_shorten(v, max_length, depth + 1) for v in value[:_MAX_ITEMS]]
+        if len(value) > _MAX_ITEMS:
+            short.append('...{} more items'.format(len(value) - _MAX_ITEMS))
+        return short
+    return value
+
+def _dumps(value: Any) -> str:
+    '''
+    Return a shortened value as JSON text
+
+    :param value: The value
+    :type value:  Any
+
+    :return: The JSON text
+    :rtype:  str
+    '''
+    return json.dumps(value, ensure_ascii=False, default=str)
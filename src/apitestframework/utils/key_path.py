@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import re
+from functools import lru_cache
+from typing import Any, Iterator, Tuple, Union
+
+# a segment of a key path: dictionary key, list index, or slice of a list ("*" being all the items)
+PathSegment = Union[str, int, slice]
+
+# RegExp of the slice segments, as "start:stop" with optional bounds
+slice_re = re.compile(r'^(\d*):(\d*)$')
+
+# marker of a value not found
+_MISSING = object()
+
+class KeyPath(object):
+    '''
+    Key in dot notation, parsed once into typed segments.
+
+    Numeric segments are list indexes (or dictionary keys, when applied to a dictionary),
+    "*" matches all the items of a list or all the values of a dictionary and "start:stop" a slice of a list,
+    e.g. "solutions.*.segments.0:2.carrier"
+    '''
+    __slots__ = ('_key', '_steps', '_wildcard')
+
+    def __init__(self, key: str):
+        '''
+        Parse a key
+
+        :param key: The key in dot notation. I.e. "one.0.three"
+        :type key:  str
+        '''
+        self._key = key
+        steps = []
+        for part in key.split('.'):
+            steps.append((_parse_segment(part), part))
+        self._steps = tuple(steps)
+        self._wildcard = any(isinstance(s, slice) for s, _ in self._steps)
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def get(self, data: Any) -> Any:
+        '''
+        Return the value of the key in some data
+
+        :param data: The data containing the value
+        :type data:  Any
+
+        :return: The value of the key, None if not found. With wildcards or slices, the list of the values found
+        :rtype:  Any
+        '''
+        if self._wildcard:
+            return [v for _, v in self.find(data)]
+        d = data
+        for segment, part in self._steps:
+            d = _step(d, segment, part)
+            if d is _MISSING:
+                return None
+        return d
+
+    def find(self, data: Any) -> Iterator[Tuple[Tuple[Union[str, int], ...], Any]]:
+        '''
+        Return the values of the key in some data, with their actual path
+
+        :param data: The data containing the values
+        :type data:  Any
+
+        :return: The segments of the actual path of each value found, and the value
+        :rtype:  Iterator[Tuple[Tuple[Union[str, int], ...], Any]]
+        '''
+        return _find(data, self._steps, 0, ())
+
+    def set(self, data: Any, value: Any):
+        '''
+        Set the value of the key into some data. Keys whose parent is not found are ignored
+
+        :param data:  The data containing the value
+        :type data:   Any
+        :param value: The value to set for the key
+        :type value:  Any
+        '''
+        if data is None:
+            return
+        segment, part = self._steps[-1]
+        for _, parent in _find(data, self._steps[:-1], 0, ()):
+            if isinstance(segment, slice):
+                if isinstance(parent, list):
+                    for i in range(*segment.indices(len(parent))):
+                        parent[i] = value
+                elif isinstance(parent, dict) and segment == slice(None):
+                    for k in parent:
+                        parent[k] = value
+            elif isinstance(parent, dict):
+                parent[part] = value
+            elif isinstance(parent, list) and isinstance(segment, int) and -len(parent) <= segment < len(parent):
+                parent[segment] = value
+
+    def matches(self, segments: Tuple[Union[str, int], ...]) -> bool:
+        '''
+        Return whether an actual path is covered by this key
+
+        :param segments: The segments of the actual path
+        :type segments:  Tuple[Union[str, int], ...]
+
+        :return: Whether the path is covered by the key
+        :rtype:  bool
+        '''
+        if len(segments) != len(self._steps):
+            return False
+        for (segment, part), s in zip(self._steps, segments):
+            if isinstance(segment, slice):
+                if isinstance(s, int):
+                    if s < (segment.start or 0) or (segment.stop is not None and s >= segment.stop):
+                        return False
+                elif segment != slice(None):
+                    return False
+            elif s != segment and s != part:
+                return False
+        return True
+
+    # -----------------------
+    # ----- Python API ------
+    # -----------------------
+
+    def __repr__(self) -> str:
+        return 'KeyPath({!r})'.format(self._key)
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def key(self) -> str:
+        '''
+        Return the key in dot notation
+
+        :return: The key in dot notation
+        :rtype:  str
+        '''
+        return self._key
+
+    @property
+    def segments(self) -> Tuple[PathSegment, ...]:
+        '''
+        Return the typed segments of the key
+
+        :return: The segments of the key
+        :rtype:  Tuple[PathSegment, ...]
+        '''
+        return tuple(s for s, _ in self._steps)
+
+    @property
+    def wildcard(self) -> bool:
+        '''
+        Return whether the key contains wildcards or slices, matching several values
+
+        :return: Whether the key matches several values
+        :rtype:  bool
+        '''
+        return self._wildcard
+
+@lru_cache(maxsize=4096)
+def compile_key(key: str) -> KeyPath:
+    '''
+    Return the parsed form of a key, parsing each distinct key only once
+
+    :param key: The key in dot notation. I.e. "one.0.three"
+    :type key:  str
+
+    :return: The parsed key
+    :rtype:  KeyPath
+    '''
+    return KeyPath(key)
+
+def _parse_segment(part: str) -> PathSegment:
+    '''
+    Return the typed form of a segment of a key
+
+    :param part: The segment
+    :type part:  str
+
+    :return: A list index for numbers, a slice for "*" and "start:stop", the segment itself otherwise
+    :rtype:  PathSegment
+    '''
+    if part == '*':
+        return slice(None)
+    m = slice_re.match(part)
+    if m is not None:
+        return slice(int(m.group(1)) if m.group(1) else None, int(m.group(2)) if m.group(2) else None)
+    try:
+        return int(part)
+    except ValueError:
+        # not a number, just a string
+        return part
+
+def _step(data: Any, segment: Union[str, int], part: str) -> Any:
+    '''
+    Return the value of a segment in a container, _MISSING if not found
+
+    :param data:    The container
+    :type data:     Any
+    :param segment: The typed segment
+    :type segment:  Union[str, int]
+    :param part:    The segment as written in the key
+    :type part:     str
+
+    :return: The value of the segment
+    :rtype:  Any
+    '''
+    if isinstance(data, dict):
+        return data.get(part, _MISSING)
+    if isinstance(data, list) and isinstance(segment, int) and -len(data) <= segment < len(data):
+        return data[segment]
+    return _MISSING
+
+def _find(data: Any, steps: Tuple[Tuple[PathSegment, str], ...], i: int, prefix: Tuple[Union[str, int], ...]) -> Iterator[Tuple[Tuple[Union[str, int], ...], Any]]:
+    '''
+    Return the values matching the steps of a key from the i-th on, with their actual path
+
+    :param data:   The container
+    :type data:    Any
+    :param steps:  The typed segments of the key, each one with its original form
+    :type steps:   Tuple[Tuple[PathSegment, str], ...]
+    :param i:      The index of the first step to match
+    :type i:       int
+    :param prefix: The actual path of the container
+    :type prefix:  Tuple[Union[str, int], ...]
+
+    :return: The actual path of each value found, and the value
+    :rtype:  Iterator[Tuple[Tuple[Union[str, int], ...], Any]]
+    '''
+    if i == len(steps):
+        yield prefix, data
+        return
+    segment, part = steps[i]
+    if isinstance(segment, slice):
+        if isinstance(data, list):
+            for j in range(*segment.indices(len(data))):
+                yield from _find(data[j], steps, i + 1, prefix + (j,))
+        elif isinstance(data, dict) and segment == slice(None):
+            for k, v in data.items():
+                yield from _find(v, steps, i + 1, prefix + (k,))
+        return
+    value = _step(data, segment, part)
+    if value is not _MISSING:
+        yield from _find(value, steps, i + 1, prefix + (part if isinstance(data, dict) else segment,))
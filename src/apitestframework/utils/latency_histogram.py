@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+from typing import List
+
+# values are recorded in microseconds, with a relative precision better than 1%:
+# values below SUB_BUCKETS are stored exactly, above that each power of two is split in HALF_BUCKETS
+SUB_BUCKET_BITS = 8
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS >> 1
+# highest trackable value: one hour
+MAX_VALUE = 3600 * 1000 * 1000
+
+def _index(value: int) -> int:
+    '''
+    Return the bucket index of a value
+
+    :param value: The value, in microseconds
+    :type value:  int
+
+    :return: The bucket index
+    :rtype:  int
+    '''
+    if value < SUB_BUCKETS:
+        return value
+    exponent = value.bit_length() - SUB_BUCKET_BITS
+    return exponent * HALF_BUCKETS + (value >> exponent)
+
+def _value(index: int) -> int:
+    '''
+    Return the highest value stored in a bucket
+
+    :param index: The bucket index
+    :type index:  int
+
+    :return: The highest value of the bucket, in microseconds
+    :rtype:  int
+    '''
+    if index < SUB_BUCKETS:
+        return index
+    exponent = index // HALF_BUCKETS - 1
+    mantissa = index - exponent * HALF_BUCKETS
+    return ((mantissa + 1) << exponent) - 1
+
+class LatencyHistogram(object):
+    '''
+    HDR-style latency histogram.
+
+    Memory is fixed whatever the number of recorded values: values are counted in
+    log-linear buckets with a relative precision better than 1%
+    '''
+
+    def __init__(self):
+        '''
+        Initialize an empty histogram
+        '''
+        self._counts = [0] * (_index(MAX_VALUE) + 1)
+        self._count = 0
+        self._total = 0
+        self._min = None
+        self._max = 0
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def record(self, seconds: float):
+        '''
+        Record a latency
+
+        :param seconds: The latency, in seconds
+        :type seconds:  float
+        '''
+        value = min(max(int(seconds * 1000000), 0), MAX_VALUE)
+        self._counts[_index(value)] += 1
+        self._count += 1
+        self._total += value
+        if self._min is None or value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def merge(self, other: 'LatencyHistogram'):
+        '''
+        Add the values recorded by another histogram to this one
+
+        :param other: The histogram to merge
+        :type other:  LatencyHistogram
+        '''
+        for i, c in enumerate(other._counts):
+            if c > 0:
+                self._counts[i] += c
+        self._count += other._count
+        self._total += other._total
+        if other._min is not None and (self._min is None or other._min < self._min):
+            self._min = other._min
+        self._max = max(self._max, other._max)
+
+    def percentile(self, percentile: float) -> float:
+        '''
+        Return the latency below which the given percentage of values fall
+
+        :param percentile: The percentile, between 0 and 100
+        :type percentile:  float
+
+        :return: The latency, in seconds
+        :rtype:  float
+        '''
+        if self._count == 0:
+            return 0.0
+        threshold = max(1, int(round(self._count * percentile / 100.0)))
+        acc = 0
+        for i, c in enumerate(self._counts):
+            acc += c
+            if acc >= threshold:
+                return min(_value(i), self._max) / 1000000.0
+        return self._max / 1000000.0
+
+    def percentiles(self, percentiles: List[float]) -> List[float]:
+        '''
+        Return the latencies for several percentiles
+
+        :param percentiles: The percentiles, between 0 and 100
+        :type percentiles:  List[float]
+
+        :return: The latencies, in seconds
+        :rtype:  List[float]
+        '''
+        return [self.percentile(p) for p in percentiles]
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def count(self) -> int:
+        '''
+        Return the number of recorded values
+
+        :return: The number of recorded values
+        :rtype:  int
+        '''
+        return self._count
+
+    @property
+    def min(self) -> float:
+        '''
+        Return the lowest recorded latency, in seconds
+
+        :return: The lowest recorded latency
+        :rtype:  float
+        '''
+        return (self._min or 0) / 1000000.0
+
+    @property
+    def max(self) -> float:
+        '''
+        Return the highest recorded latency, in seconds
+
+        :return: The highest recorded latency
+        :rtype:  float
+        '''
+        return self._max / 1000000.0
+
+    @property
+    def mean(self) -> float:
+        '''
+        Return the mean of the recorded latencies, in seconds
+
+        :return: The mean latency
+        :rtype:  float
+        '''
+        if self._count == 0:
+            return 0.0
+        return self._total / self._count / 1000000.0
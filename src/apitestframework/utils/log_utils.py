@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import atexit
+import logging
+import multiprocessing
+import reprlib
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, List
+
+# default maximum length of the bodies written to the logs
+BODY_LOG_LENGTH = 1000
+
+_body_log_length = BODY_LOG_LENGTH
+# renders large bodies without converting them whole to text
+_body_repr = reprlib.Repr()
+_body_repr.maxlevel = 6
+_body_repr.maxdict = 20
+_body_repr.maxlist = 20
+_body_repr.maxstring = 200
+_body_repr.maxother = 200
+
+class LogBody(object):
+    '''
+    A request or response body to log, converted to text only if the record is written, and then truncated
+    '''
+    __slots__ = ('_body',)
+
+    def __init__(self, body: Any):
+        '''
+        Wrap a body
+
+        :param body: The body to log
+        :type body:  Any
+        '''
+        self._body = body
+
+    def __str__(self) -> str:
+        '''
+        Return the body as text, truncated to the maximum length
+
+        :return: The body as text
+        :rtype:  str
+        '''
+        if not _body_log_length:
+            return str(self._body)
+        if isinstance(self._body, str):
+            text = self._body
+        else:
+            text = _body_repr.repr(self._body)
+        if len(text) <= _body_log_length:
+            return text
+        size = len(self._body) if isinstance(self._body, (str, dict, list)) else None
+        unit = 'characters' if isinstance(self._body, str) else 'items'
+        return '{}... (truncated{})'.format(text[:_body_log_length], ', {} {}'.format(size, unit) if size is not None else '')
+
+def set_body_log_length(length: int):
+    '''
+    Set the maximum length of the bodies written to the logs
+
+    :param length: Maximum number of characters, 0 to write whole bodies
+    :type length:  int
+    '''
+    global _body_log_length
+    _body_log_length = length
+
+def start_log_listener(handlers: List[logging.Handler]) -> logging.Handler:
+    '''
+    Start writing log records on a background thread, stopped at exit once all records are written.
+
+    The queue is shared with the worker processes forked afterwards, so their records are written by the same thread
+
+    :param handlers: The handlers actually writing the records
+    :type handlers:  List[logging.Handler]
+
+    :return: The handler queueing the records
+    :rtype:  logging.Handler
+    '''
+    queue = multiprocessing.Queue(-1)
+    listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    handler = QueueHandler(queue)
+    # only the message is formatted here, the handlers format the rest
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
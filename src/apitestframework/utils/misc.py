@@ -22,13 +22,16 @@ import re
 from typing import Any, Dict, List
 from urllib.parse import urlparse
 
+# local imports
+from apitestframework.utils.key_path import compile_key
+
 def get_inner_key_value(data: Dict[str, Any], key: str) -> Any:
     '''
     Retrieve the value of a key nested N-levels down from a dictionary
 
     :param data: The dictionary containing the values
     :type data:  Dict[str, Any]
-    :param key:  The key in dot notation. I.e. "one.two.three"
+    :param key:  The key in dot notation. I.e. "one.two.three". See KeyPath for wildcards and slices
     :type key:   str
 
     :return: The value of the requested key
@@ -36,26 +39,7 @@ def get_inner_key_value(data: Dict[str, Any], key: str) -> Any:
     '''
     if data is None or key is None:
         return None
-    keys = key.split('.')
-    d = data
-    for k in keys:
-        try:
-            k = int(k)
-        except ValueError:
-            # not a number, just a string
-            pass
-        try:
-            if isinstance(k, int) and isinstance(d, list) and k >= len(d):
-                # index out of range
-                return None
-            d = d[k]
-        except KeyError:
-            # key not present
-            return None
-        except TypeError:
-            # wrong type of index
-            return None
-    return d
+    return compile_key(key).get(data)
 
 def set_inner_key_value(data: Dict[str, Any], key: str, value: Any):
     '''
@@ -63,37 +47,14 @@ def set_inner_key_value(data: Dict[str, Any], key: str, value: Any):
 
     :param data:  The dictionary containing the values
     :type data:   Dict[str, Any]
-    :param key:   The key in dot notation. I.e. "one.two.three"
+    :param key:   The key in dot notation. I.e. "one.two.three". See KeyPath for wildcards and slices
     :type key:    str
     :param value: The value to set for the key
     :type value:  Any
     '''
     if data is None or key is None:
         return
-    keys = key.split('.')
-    d = data
-    for k in keys[:-1]:
-        try:
-            k = int(k)
-        except ValueError:
-            # not a number, just a string
-            pass
-        try:
-            if isinstance(k, int) and isinstance(d, list) and k >= len(d):
-                # index out of range
-                return
-            d = d[k]
-        except KeyError:
-            # key not present
-            return
-        except TypeError:
-            # wrong type of index
-            return
-    try:
-        d[keys[-1]] = value
-    except TypeError:
-        # trying to assign to something that cannot be assigned
-        return
+    compile_key(key).set(data, value)
 
 def build_keys_list(data: Dict[str, Any] = None) -> List[str]:
     '''
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape, quoteattr
+
+# local imports
+from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.result_store import ResultRecord
+from apitestframework.utils.test_status import TestStatus
+
+logger = logging.getLogger(__name__)
+
+class Reporter(object):
+    '''
+    Base class of the reporters, receiving the result of each test as soon as it is done.
+
+    Reporters are called by several threads at once when tests run concurrently, so they must guard their state
+    '''
+
+    def __init__(self, data: Dict[str, Any] = None):
+        '''
+        Initialize the reporter
+
+        :param data: Configuration object for the reporter
+        :type data:  Dict[str, Any]
+        '''
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def test_done(self, suite: str, record: ResultRecord):
+        '''
+        Report the result of a test
+
+        :param suite:  Name of the suite of the test
+        :type suite:   str
+        :param record: The test result
+        :type record:  ResultRecord
+        '''
+        raise NotImplementedError()
+
+    def close(self):
+        '''
+        Complete the report and release its resources
+        '''
+        pass
+
+class FileReporter(Reporter):
+    '''
+    Reporter writing to a file, opened on the first result
+    '''
+
+    def __init__(self, data: Dict[str, Any] = None):
+        '''
+        Initialize the reporter
+
+        :param data: Configuration object for the reporter
+        :type data:  Dict[str, Any]
+        '''
+        super().__init__(data)
+        # file: path of the report
+        self._path = get_conf_value(data, 'file')
+        if self._path is None:
+            raise ValueError('Missing file for reporter {}'.format(get_conf_value(data, 'type')))
+        self._file = None
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def close(self):
+        '''
+        Close the report file
+        '''
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _open(self):
+        '''
+        Open the report file, creating its folder if needed
+        '''
+        folder = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(folder, exist_ok=True)
+        logger.debug('Writing report to {}'.format(self._path))
+        self._file = open(self._path, 'wb')
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def path(self) -> str:
+        '''
+        Return the path of the report file
+
+        :return: The path of the report file
+        :rtype:  str
+        '''
+        return self._path
+
+class JsonLinesReporter(FileReporter):
+    '''
+    Reporter writing one JSON object for each test
+    '''
+
+    def test_done(self, suite: str, record: ResultRecord):
+        '''
+        Append the result of a test to the report
+
+        :param suite:  Name of the suite of the test
+        :type suite:   str
+        :param record: The test result
+        :type record:  ResultRecord
+        '''
+        line = json.dumps({
+            'timestamp': time.time(),
+            'suite': suite,
+            'test': record.name,
+            'status': record.status.name,
+            'elapsed': record.elapsed,
+            'bytes': record.size,
+            'timings': record.timings,
+            'attempts': record.attempts,
+            'diff': record.diff.to_list() if record.diff is not None else None
+        }) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write(line.encode('utf-8'))
+            self._file.flush()
+
+class JUnitReporter(FileReporter):
+    '''
+    Reporter writing a JUnit XML report.
+
+    The closing tags are written after each test and overwritten by the following one,
+    so the file is a complete report at any time
+    '''
+
+    def __init__(self, data: Dict[str, Any] = None):
+        '''
+        Initialize the reporter
+
+        :param data: Configuration object for the reporter
+        :type data:  Dict[str, Any]
+        '''
+        super().__init__(data)
+        self._suite = None
+        self._trailer_offset = None
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def test_done(self, suite: str, record: ResultRecord):
+        '''
+        Append the result of a test to the report
+
+        :param suite:  Name of the suite of the test
+        :type suite:   str
+        :param record: The test result
+        :type record:  ResultRecord
+        '''
+        case = self._test_case(suite, record)
+        with self._lock:
+            if self._file is None:
+                self._open()
+                self._file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+                self._trailer_offset = self._file.tell()
+            self._file.seek(self._trailer_offset)
+            if suite != self._suite:
+                # tests of concurrent suites may interleave: each run of tests of a suite gets its own element
+                if self._suite is not None:
+                    self._file.write(b'  </testsuite>\n')
+                self._file.write('  <testsuite name={}>\n'.format(quoteattr(suite)).encode('utf-8'))
+                self._suite = suite
+            self._file.write(case.encode('utf-8'))
+            self._trailer_offset = self._file.tell()
+            self._file.write(b'  </testsuite>\n</testsuites>\n')
+            self._file.truncate()
+            self._file.flush()
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _test_case(self, suite: str, record: ResultRecord) -> str:
+        '''
+        Return the XML element of a test
+
+        :param suite:  Name of the suite of the test
+        :type suite:   str
+        :param record: The test result
+        :type record:  ResultRecord
+
+        :return: The testcase element
+        :rtype:  str
+        '''
+        case = '    <testcase classname={} name={} time="{:.6f}">\n'.format(quoteattr(suite), quoteattr(record.name), record.elapsed or 0.0)
+        if record.status == TestStatus.FAILURE and record.diff is not None:
+            case += '      <failure message={}>{}</failure>\n'.format(quoteattr('Content check failed: {}{} differences'.format(record.diff.count, '' if record.diff.complete else '+')), escape(str(record.diff)))
+        elif record.status == TestStatus.FAILURE:
+            case += '      <failure message="Test failed"/>\n'
+        elif record.status == TestStatus.TIMEOUT:
+            case += '      <error message="Test timed out"/>\n'
+        elif record.status == TestStatus.SKIPPED:
+            case += '      <skipped/>\n'
+        if record.size is not None:
+            case += '      <properties>\n        <property name="bytes" value="{}"/>\n      </properties>\n'.format(record.size)
+        return case + '    </testcase>\n'
+
+class PrometheusReporter(FileReporter):
+    '''
+    Reporter writing metrics in the Prometheus text format, to be read by the node exporter textfile collector.
+
+    The file is replaced atomically, at most once every flushInterval seconds and when the run ends
+    '''
+
+    def __init__(self, data: Dict[str, Any] = None):
+        '''
+        Initialize the reporter
+
+        :param data: Configuration object for the reporter
+        :type data:  Dict[str, Any]
+        '''
+        super().__init__(data)
+        # flushInterval: minimum time between two writes of the file, in seconds
+        self._flush_interval = get_conf_value(data, 'flushInterval', 5)
+        self._samples = {}
+        self._last_flush = None
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def test_done(self, suite: str, record: ResultRecord):
+        '''
+        Update the metrics of a test, writing the file if the flush interval has passed
+
+        :param suite:  Name of the suite of the test
+        :type suite:   str
+        :param record: The test result
+        :type record:  ResultRecord
+        '''
+        with self._lock:
+            # by position, as suites and tests can share a name
+            self._samples[record.index] = (suite, record.name, record.status, record.elapsed, record.size)
+            now = time.monotonic()
+            if self._last_flush is None or now - self._last_flush >= self._flush_interval:
+                self._flush()
+                self._last_flush = now
+
+    def close(self):
+        '''
+        Write the final metrics
+        '''
+        with self._lock:
+            if len(self._samples) > 0:
+                self._flush()
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _flush(self):
+        '''
+        Replace the metrics file with the current metrics
+        '''
+        lines = [
+            '# HELP apitest_success Whether the test was successful (1), failed (0) or skipped (-1).',
+            '# TYPE apitest_success gauge'
+        ]
+        durations = [
+            '# HELP apitest_duration_seconds Duration of the API call of the test.',
+            '# TYPE apitest_duration_seconds gauge'
+        ]
+        sizes = [
+            '# HELP apitest_response_bytes Size of the response body of the test.',
+            '# TYPE apitest_response_bytes gauge'
+        ]
+        seen = {}
+        for _, (suite, name, status, elapsed, size) in sorted(self._samples.items()):
+            # repeated names are numbered, so that each test has its own series
+            n = seen.get((suite, name), 0)
+            seen[(suite, name)] = n + 1
+            labels = '{{suite={},test={}}}'.format(self._label(suite), self._label(name if n == 0 else '{}#{}'.format(name, n + 1)))
+            value = 1 if status == TestStatus.SUCCESS else (-1 if status == TestStatus.SKIPPED else 0)
+            lines.append('apitest_success{} {}'.format(labels, value))
+            if elapsed is not None:
+                durations.append('apitest_duration_seconds{} {:.6f}'.format(labels, elapsed))
+            if size is not None:
+                sizes.append('apitest_response_bytes{} {}'.format(labels, size))
+        text = '\n'.join(lines + durations + sizes) + '\n'
+        folder = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(self._path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, self._path)
+
+    def _label(self, value: str) -> str:
+        '''
+        Return a label value, quoted and escaped
+
+        :param value: The label value
+        :type value:  str
+
+        :return: The quoted label value
+        :rtype:  str
+        '''
+        return '"{}"'.format(value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+
+class QueueReporter(Reporter):
+    '''
+    Reporter sending the results to a queue, to be reported by another process
+    '''
+
+    def __init__(self, queue: Any):
+        '''
+        Initialize the reporter
+
+        :param queue: The queue of the results
+        :type queue:  multiprocessing.Queue
+        '''
+        super().__init__()
+        self._queue = queue
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def test_done(self, suite: str, record: ResultRecord):
+        '''
+        Send the result of a test to the queue
+
+        :param suite:  Name of the suite of the test
+        :type suite:   str
+        :param record: The test result
+        :type record:  ResultRecord
+        '''
+        self._queue.put((suite, record))
+
+# available reporters, by type
+REPORTERS = {
+    'junit': JUnitReporter,
+    'jsonl': JsonLinesReporter,
+    'prometheus': PrometheusReporter
+}
+
+def get_reporters(data: List[Dict[str, Any]]) -> List[Reporter]:
+    '''
+    Create the reporters in configuration.
+
+    The type of a reporter is either one of the built-in ones or the path of a Reporter subclass, as "package.module:Class"
+
+    :param data: Configuration of the reporters
+    :type data:  List[Dict[str, Any]]
+
+    :return: The reporters
+    :rtype:  List[Reporter]
+    '''
+    reporters = []
+    for rc in data or []:
+        reporter_type = get_conf_value(rc, 'type', '')
+        if reporter_type in REPORTERS:
+            reporter_class = REPORTERS[reporter_type]
+        elif ':' in reporter_type:
+            module_name, class_name = reporter_type.split(':', 1)
+            reporter_class = getattr(importlib.import_module(module_name), class_name)
+        else:
+            raise ValueError('Non-valid reporter type: {}'.format(reporter_type))
+        reporters.append(reporter_class(rc))
+    return reporters
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+from typing import Any, Dict, List, Tuple
+
+# library imports
+import requests
+
+# local imports
+from apitestframework.utils.header import Header
+
+class RequestTemplate(object):
+    '''
+    The prepared request of a test, built once and then only patched where injected values change it.
+
+    requests merges the session settings, encodes URL and parameters and serializes the JSON body
+    every time a request is prepared: the template does that on the first call only, keeping the
+    serialized body until a value is injected into it. Sessions holding cookies get a full prepare
+    on each call, as their cookies may change with every response
+    '''
+
+    def __init__(self, method: str, headers: List[Header]):
+        '''
+        Initialize the template
+
+        :param method:  HTTP method of the request
+        :type method:   str
+        :param headers: Headers of the test, hidden ones included. Their values are checked on every call,
+                        as they can be shared with other tests
+        :type headers:  List[Header]
+        '''
+        self._method = method
+        self._headers = headers
+        self._session = None
+        self._prepared = None
+        self._settings = None
+        self._url = None
+        self._header_values = None
+        self._url_changed = False
+        self._body_changed = False
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def prepare(self, session: requests.Session, url: str, params: Dict[str, Any], payload: Any, verify_ssl: bool) -> Tuple[requests.PreparedRequest, Dict[str, Any]]:
+        '''
+        Return the request to send and the settings to send it with, patching the template where needed
+
+        :param session:    The session the request is sent with
+        :type session:     requests.Session
+        :param url:        The URL to call
+        :type url:         str
+        :param params:     The URL parameters
+        :type params:      Dict[str, Any]
+        :param payload:    The JSON body
+        :type payload:     Any
+        :param verify_ssl: Whether to validate the SSL certificate of the endpoint
+        :type verify_ssl:  bool
+
+        :return: The prepared request and a copy of the send settings
+        :rtype:  Tuple[requests.PreparedRequest, Dict[str, Any]]
+        '''
+        if self._prepared is None or session is not self._session or len(session.cookies) > 0:
+            self._build(session, url, params, payload, verify_ssl)
+        else:
+            url_changed = self._url_changed or url != self._url
+            values = [h.value for h in self._headers]
+            if url_changed or self._body_changed or values != self._header_values:
+                # patch a copy, as the last request may still be referenced by its response
+                self._prepared = self._prepared.copy()
+                if url_changed:
+                    self._prepared.prepare_url(url, params)
+                if self._body_changed:
+                    self._prepared.prepare_body(None, None, payload)
+                self._patch_headers(values)
+                self._url = url
+                self._url_changed = False
+                self._body_changed = False
+        return self._prepared, dict(self._settings)
+
+    def url_changed(self):
+        '''
+        Mark the URL parameters as changed: the URL is encoded again on the next call
+        '''
+        self._url_changed = True
+
+    def body_changed(self):
+        '''
+        Mark the body as changed: it is serialized again on the next call
+        '''
+        self._body_changed = True
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _build(self, session: requests.Session, url: str, params: Dict[str, Any], payload: Any, verify_ssl: bool):
+        '''
+        Prepare the whole request on a session
+
+        :param session:    The session the request is sent with
+        :type session:     requests.Session
+        :param url:        The URL to call
+        :type url:         str
+        :param params:     The URL parameters
+        :type params:      Dict[str, Any]
+        :param payload:    The JSON body
+        :type payload:     Any
+        :param verify_ssl: Whether to validate the SSL certificate of the endpoint
+        :type verify_ssl:  bool
+        '''
+        headers = {h.key: h.value for h in self._headers if not h.hide}
+        self._prepared = session.prepare_request(requests.Request(self._method, url, headers=headers, json=payload, params=params))
+        self._settings = session.merge_environment_settings(self._prepared.url, {}, True, verify_ssl, None)
+        self._session = session
+        self._url = url
+        self._header_values = [h.value for h in self._headers]
+        self._url_changed = False
+        self._body_changed = False
+
+    def _patch_headers(self, values: List[str]):
+        '''
+        Update the headers of the prepared request whose value changed since the last call
+
+        :param values: The current values of the headers
+        :type values:  List[str]
+        '''
+        for i, h in enumerate(self._headers):
+            if h.hide or (i < len(self._header_values) and values[i] == self._header_values[i]):
+                continue
+            if values[i] is None:
+                self._prepared.headers.pop(h.key, None)
+            else:
+                self._prepared.headers[h.key] = values[i]
+        self._header_values = values
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Tuple
+
+# local imports
+from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.json_diff import JsonDiff
+from apitestframework.utils.test_status import TestStatus
+
+logger = logging.getLogger(__name__)
+
+# available retention policies
+POLICIES = ('all', 'failures', 'truncate', 'spill')
+
+class ResultRecord(object):
+    '''
+    Compact summary of a test result
+    '''
+    __slots__ = ('name', 'status', 'elapsed', 'size', 'body', 'offset', 'timings', 'attempts', 'diff', 'index')
+
+    def __init__(self, name: str, status: TestStatus, elapsed: float = None, size: int = None, body: Any = None, offset: int = None, timings: Dict[str, float] = None, attempts: List[Dict[str, Any]] = None, diff: JsonDiff = None, index: Tuple[int, int] = None):
+        '''
+        Initialize the record
+
+        :param name:     Name of the test
+        :type name:      str
+        :param status:   Final status of the test
+        :type status:    TestStatus
+        :param elapsed:  Duration of the API call, in seconds
+        :type elapsed:   float
+        :param size:     Size of the response body, in bytes
+        :type size:      int
+        :param body:     Retained response body, if kept in memory
+        :type body:      Any
+        :param offset:   Position of the response body in the spill file, if spilled
+        :type offset:    int
+        :param timings:  Time spent in each phase of the test, in seconds
+        :type timings:   Dict[str, float]
+        :param attempts: The calls sent, if retried or hedged
+        :type attempts:  List[Dict[str, Any]]
+        :param diff:     The differences found by the content check, if it failed
+        :type diff:      JsonDiff
+        :param index:    Position of the test in the run, as (suite index, test index). Test names can be repeated
+        :type index:     Tuple[int, int]
+        '''
+        self.name = name
+        self.status = status
+        self.elapsed = elapsed
+        self.size = size
+        self.body = body
+        self.offset = offset
+        self.timings = timings
+        self.attempts = attempts
+        self.diff = diff
+        self.index = index
+
+class ResultStore(object):
+    '''
+    Results of the tests of a suite.
+
+    Only compact records are kept in memory; response bodies are retained according to a policy:
+    all of them, only for failures, truncated, or spilled to an append-only JSON Lines file
+    '''
+
+    def __init__(self, data: Dict[str, Any] = None):
+        '''
+        Initialize the store
+
+        :param data: Configuration object for the store
+        :type data:  Dict[str, Any]
+        '''
+        # policy: how to retain response bodies
+        self._policy = get_conf_value(data, 'policy', 'all')
+        if self._policy not in POLICIES:
+            raise ValueError('Non-valid result retention policy: {}'.format(self._policy))
+        # maxBodyLength: maximum length of the bodies kept with the "truncate" policy
+        self._max_body_length = get_conf_value(data, 'maxBodyLength', 1024)
+        # spillDir: folder of the spill file for the "spill" policy
+        self._spill_dir = get_conf_value(data, 'spillDir', tempfile.gettempdir())
+        self._spill_path = None
+        self._spill_file = None
+        self._records = []
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def add(self, name: str, status: TestStatus, body: Any = None, elapsed: float = None, size: int = None, timings: Dict[str, float] = None, attempts: List[Dict[str, Any]] = None, diff: JsonDiff = None, index: Tuple[int, int] = None):
+        '''
+        Add a test result to the store
+
+        :param name:     Name of the test
+        :type name:      str
+        :param status:   Final status of the test
+        :type status:    TestStatus
+        :param body:     Response body
+        :type body:      Any
+        :param elapsed:  Duration of the API call, in seconds
+        :type elapsed:   float
+        :param size:     Size of the response body, in bytes
+        :type size:      int
+        :param timings:  Time spent in each phase of the test, in seconds
+        :type timings:   Dict[str, float]
+        :param attempts: The calls sent, if retried or hedged
+        :type attempts:  List[Dict[str, Any]]
+        :param diff:     The differences found by the content check, if it failed
+        :type diff:      JsonDiff
+        :param index:    Position of the test in the run, as (suite index, test index)
+        :type index:     Tuple[int, int]
+        '''
+        record = ResultRecord(name, status, elapsed, size, timings=timings, attempts=attempts, diff=diff, index=index)
+        if body is not None:
+            if self._policy == 'all':
+                record.body = body
+            elif self._policy == 'failures':
+                if status.is_failure():
+                    record.body = body
+            elif self._policy == 'truncate':
+                record.body = self._truncate(body)
+            else:
+                record.offset = self._spill(name, status, body)
+        with self._lock:
+            self._records.append(record)
+
+    def adopt(self, records: List[ResultRecord], spill_path: str = None):
+        '''
+        Add the records of a store filled by another process, taking over its spill file.
+        Spilled bodies are left in the file, instead of being read back into memory
+
+        :param records:    The records
+        :type records:     List[ResultRecord]
+        :param spill_path: The path of the spill file of the other store, None if nothing was spilled
+        :type spill_path:  str
+        '''
+        with self._lock:
+            if spill_path is not None:
+                if self._spill_path is not None:
+                    raise ValueError('Result store already has a spill file: {}'.format(self._spill_path))
+                self._spill_path = spill_path
+            self._records.extend(records)
+
+    def get_body(self, record: ResultRecord) -> Any:
+        '''
+        Return the retained response body of a record
+
+        :param record: The record
+        :type record:  ResultRecord
+
+        :return: The retained response body, None if not retained
+        :rtype:  Any
+        '''
+        if record.offset is None:
+            return record.body
+        with open(self._spill_path, 'rb') as f:
+            f.seek(record.offset)
+            return json.loads(f.readline().decode('utf-8'))['body']
+
+    def close(self):
+        '''
+        Close the spill file, if open. Bodies already spilled can still be read
+        '''
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+
+    def discard(self):
+        '''
+        Close and delete the spill file, if any. Bodies already spilled can no longer be read
+        '''
+        self.close()
+        with self._lock:
+            if self._spill_path is not None:
+                try:
+                    os.remove(self._spill_path)
+                except FileNotFoundError:
+                    pass
+                self._spill_path = None
+
+    def clear(self):
+        '''
+        Remove all the results from the store
+        '''
+        with self._lock:
+            self._records = []
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _truncate(self, body: Any) -> Any:
+        '''
+        Truncate a body to the maximum length
+
+        :param body: The response body
+        :type body:  Any
+
+        :return: The body itself if short enough, its truncated JSON representation otherwise
+        :rtype:  Any
+        '''
+        text = body if isinstance(body, str) else json.dumps(body)
+        if len(text) <= self._max_body_length:
+            return body
+        return text[:self._max_body_length] + '...'
+
+    def _spill(self, name: str, status: TestStatus, body: Any) -> int:
+        '''
+        Append a body to the spill file
+
+        :param name:   Name of the test
+        :type name:    str
+        :param status: Final status of the test
+        :type status:  TestStatus
+        :param body:   Response body
+        :type body:    Any
+
+        :return: The position of the body in the spill file
+        :rtype:  int
+        '''
+        line = (json.dumps({'name': name, 'status': status.name, 'body': body}) + '\n').encode('utf-8')
+        with self._lock:
+            if self._spill_file is None:
+                if self._spill_path is None:
+                    fd, self._spill_path = tempfile.mkstemp(prefix='apitestframework-', suffix='.jsonl', dir=self._spill_dir)
+                    os.close(fd)
+                    logger.debug('Spilling response bodies to {}'.format(self._spill_path))
+                self._spill_file = open(self._spill_path, 'ab')
+            offset = self._spill_file.tell()
+            self._spill_file.write(line)
+            self._spill_file.flush()
+        return offset
+
+    # -----------------------
+    # ----- Python API ------
+    # -----------------------
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, i: int) -> Tuple[str, TestStatus, Any]:
+        record = self._records[i]
+        return (record.name, record.status, self.get_body(record))
+
+    def __iter__(self) -> Iterator[Tuple[str, TestStatus, Any]]:
+        for i in range(len(self._records)):
+            yield self[i]
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def records(self) -> List[ResultRecord]:
+        '''
+        Return the compact records of the results
+
+        :return: The compact records of the results
+        :rtype:  List[ResultRecord]
+        '''
+        return self._records
+
+    @property
+    def policy(self) -> str:
+        '''
+        Return the retention policy of response bodies
+
+        :return: The retention policy
+        :rtype:  str
+        '''
+        return self._policy
+
+    @property
+    def spill_path(self) -> str:
+        '''
+        Return the path of the spill file, None if nothing was spilled
+
+        :return: The path of the spill file
+        :rtype:  str
+        '''
+        return self._spill_path
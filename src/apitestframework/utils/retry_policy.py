@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# library imports
+import requests
+
+# local imports
+from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.latency_histogram import LatencyHistogram
+
+# methods that can be sent twice without changing the outcome
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS', 'TRACE')
+# maximum number of hedged calls in flight in a process, duplicates included
+HEDGE_WORKERS = 32
+
+class RetryPolicy(object):
+    '''
+    When and after how long to send again a call that got a transient error
+    '''
+
+    def __init__(self, data: Dict[str, Any] = None):
+        '''
+        Initialize the policy
+
+        :param data: Configuration object for the policy, None for no retries
+        :type data:  Dict[str, Any]
+        '''
+        # maxAttempts: maximum number of calls, the first one included
+        self._max_attempts = get_conf_value(data, 'maxAttempts', 3 if data is not None else 1)
+        if self._max_attempts < 1:
+            raise ValueError('Non-valid retry maxAttempts: {}'.format(self._max_attempts))
+        # statusCodes: response codes to retry on
+        self._status_codes = frozenset(get_conf_value(data, 'statusCodes', [429, 502, 503, 504]))
+        # retryErrors: whether to retry on connection errors and timeouts too
+        self._retry_errors = get_conf_value(data, 'retryErrors', True)
+        # methods: methods to retry, by default only the idempotent ones
+        self._methods = frozenset(m.upper() for m in get_conf_value(data, 'methods', IDEMPOTENT_METHODS))
+        # backoff: seconds to wait before the first retry, doubled at each one
+        self._backoff = get_conf_value(data, 'backoff', 0.1)
+        # maxBackoff: maximum seconds to wait before a retry, Retry-After included
+        self._max_backoff = get_conf_value(data, 'maxBackoff', 10)
+        # jitter: whether to wait a random time up to the backoff, so that clients do not retry all together
+        self._jitter = get_conf_value(data, 'jitter', True)
+        # retryAfter: whether to wait as long as the Retry-After header of the response asks
+        self._retry_after = get_conf_value(data, 'retryAfter', True)
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def should_retry(self, method: str, attempt: int, response: requests.Response = None, error: Exception = None) -> bool:
+        '''
+        Return whether to send a call again
+
+        :param method:   The HTTP method of the call
+        :type method:    str
+        :param attempt:  Number of the attempt just done, starting from 1
+        :type attempt:   int
+        :param response: The response of the attempt, if any
+        :type response:  requests.Response
+        :param error:    The error of the attempt, if any
+        :type error:     Exception
+
+        :return: Whether to retry
+        :rtype:  bool
+        '''
+        if attempt >= self._max_attempts or method not in self._methods:
+            return False
+        if error is not None:
+            return self._retry_errors
+        return response is not None and response.status_code in self._status_codes
+
+    def get_delay(self, attempt: int, response: requests.Response = None) -> float:
+        '''
+        Return how long to wait before the next attempt
+
+        :param attempt:  Number of the attempt just done, starting from 1
+        :type attempt:   int
+        :param response: The response of the attempt, if any
+        :type response:  requests.Response
+
+        :return: Seconds to wait
+        :rtype:  float
+        '''
+        if self._retry_after and response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self._max_backoff)
+        delay = min(self._backoff * (2 ** (attempt - 1)), self._max_backoff)
+        return random.uniform(0, delay) if self._jitter else delay
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def max_attempts(self) -> int:
+        '''
+        Return the maximum number of calls, the first one included
+
+        :return: The maximum number of calls
+        :rtype:  int
+        '''
+        return self._max_attempts
+
+class HedgePolicy(object):
+    '''
+    When to send a duplicate of a slow call, using the response that arrives first
+    '''
+
+    def __init__(self, data: Dict[str, Any]):
+        '''
+        Initialize the policy
+
+        :param data: Configuration object for the policy
+        :type data:  Dict[str, Any]
+        '''
+        # percentile: latency percentile of the previous calls after which the duplicate is sent
+        self._percentile = get_conf_value(data, 'percentile', 95)
+        # minSamples: number of previous calls needed to trust the percentile
+        self._min_samples = get_conf_value(data, 'minSamples', 20)
+        # delay: seconds after which the duplicate is sent until there are enough samples, None to not send it
+        self._delay = get_conf_value(data, 'delay')
+        # methods: methods to hedge, by default only the idempotent ones
+        self._methods = frozenset(m.upper() for m in get_conf_value(data, 'methods', IDEMPOTENT_METHODS))
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def get_delay(self, method: str, key: Tuple[str, str]) -> Optional[float]:
+        '''
+        Return after how long to send a duplicate of a call
+
+        :param method: The HTTP method of the call
+        :type method:  str
+        :param key:    Key of the latencies of the call
+        :type key:     Tuple[str, str]
+
+        :return: Seconds to wait for the response before sending the duplicate, None to not send it
+        :rtype:  Optional[float]
+        '''
+        if method not in self._methods:
+            return None
+        delay = latency_tracker.percentile(key, self._percentile, self._min_samples)
+        return delay if delay is not None else self._delay
+
+    def send(self, method: str, key: Tuple[str, str], send: Callable[[], Tuple[Any, ...]]) -> Tuple[Tuple[Any, ...], bool]:
+        '''
+        Send a call, sending a duplicate if it takes longer than the hedging delay, and record its latency
+
+        :param method: The HTTP method of the call
+        :type method:  str
+        :param key:    Key of the latencies of the call
+        :type key:     Tuple[str, str]
+        :param send:   Function sending the call, returning response, error, connection timings and latency
+        :type send:    Callable[[], Tuple[Any, ...]]
+
+        :return: The result of the call answered first, preferring responses to errors, and whether a duplicate was sent
+        :rtype:  Tuple[Tuple[Any, ...], bool]
+        '''
+        delay = self.get_delay(method, key)
+        if delay is None:
+            result = send()
+            hedged = False
+        else:
+            executor = _get_executor()
+            futures = [executor.submit(send)]
+            hedged = len(wait(futures, timeout=delay).done) == 0
+            if hedged:
+                futures.append(executor.submit(send))
+            result = None
+            pending = futures
+            while len(pending) > 0 and (result is None or result[1] is not None):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    if result is None or (result[1] is not None and f.result()[1] is None):
+                        result = f.result()
+            # the duplicate answered later is not used: release its connection
+            for f in futures:
+                f.add_done_callback(lambda f: _discard(f.result()[0], result[0]))
+        if result[0] is not None:
+            latency_tracker.record(key, result[3])
+        return result, hedged
+
+class LatencyTracker(object):
+    '''
+    Latencies of the calls of a process, by method and URL, to compute the hedging delays
+    '''
+
+    def __init__(self):
+        '''
+        Initialize the tracker
+        '''
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def record(self, key: Tuple[str, str], seconds: float):
+        '''
+        Record the latency of a call
+
+        :param key:     Method and URL of the call
+        :type key:      Tuple[str, str]
+        :param seconds: The latency, in seconds
+        :type seconds:  float
+        '''
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def percentile(self, key: Tuple[str, str], percentile: float, min_samples: int = 1) -> Optional[float]:
+        '''
+        Return a latency percentile of the calls
+
+        :param key:         Method and URL of the calls
+        :type key:          Tuple[str, str]
+        :param percentile:  The percentile, between 0 and 100
+        :type percentile:   float
+        :param min_samples: Number of calls needed to compute it
+        :type min_samples:  int
+
+        :return: The latency, in seconds, None if there are not enough calls
+        :rtype:  Optional[float]
+        '''
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None or histogram.count < min_samples:
+                return None
+            return histogram.percentile(percentile)
+
+    def clear(self):
+        '''
+        Forget all the latencies
+        '''
+        with self._lock:
+            self._histograms = {}
+
+def _get_executor() -> ThreadPoolExecutor:
+    '''
+    Return the threads sending the hedged calls of the process, starting them if needed
+
+    :return: The threads sending the hedged calls
+    :rtype:  ThreadPoolExecutor
+    '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+        return _executor
+
+def _discard(response: requests.Response, used: requests.Response):
+    '''
+    Close a response, unless it is the one used
+
+    :param response: The response
+    :type response:  requests.Response
+    :param used:     The response used
+    :type used:      requests.Response
+    '''
+    if response is not None and response is not used:
+        response.close()
+
+def parse_retry_after(value: str) -> Optional[float]:
+    '''
+    Parse the value of a Retry-After header
+
+    :param value: Seconds to wait or an HTTP date
+    :type value:  str
+
+    :return: Seconds to wait, None if missing or not valid
+    :rtype:  Optional[float]
+    '''
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# latencies shared by all the tests of the process
+latency_tracker = LatencyTracker()
+# threads sending the hedged calls, started on first use
+_executor = None
+_executor_lock = threading.Lock()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import logging
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, Tuple
+from urllib.parse import urlparse
+
+# library imports
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# local imports
+from apitestframework.utils.cassette import Cassette
+from apitestframework.utils.config import get_conf_value
+from apitestframework.utils.timing import add_connection_timing
+
+logger = logging.getLogger(__name__)
+
+class SessionPool(object):
+    '''
+    Pool of HTTP sessions, one for each host and SSL verification setting.
+
+    Each session keeps its connections alive between calls, so tests against the same host
+    do not pay for a new TCP/TLS handshake every time. Cookies are not kept between calls,
+    so that tests sharing a session stay isolated
+    '''
+
+    def __init__(self, data: Dict[str, Any] = None, cassette: Cassette = None):
+        '''
+        Initialize the session pool
+
+        :param data:     Configuration object for the pool
+        :type data:      Dict[str, Any]
+        :param cassette: Cassette to record responses to or to replay them from, if any
+        :type cassette:  Cassette
+        '''
+        # poolSize: maximum number of connections kept open for each host
+        self._pool_size = get_conf_value(data, 'poolSize', 10)
+        # keepAlive: whether to reuse connections between calls
+        self._keep_alive = get_conf_value(data, 'keepAlive', True)
+        # retries: transport level retry settings
+        self._retries = get_conf_value(data, 'retries', {})
+        self._cassette = cassette
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def session(self, url: str, verify_ssl: bool = True) -> requests.Session:
+        '''
+        Return the session to use to call the given URL, creating it if needed
+
+        :param url:        The URL to call
+        :type url:         str
+        :param verify_ssl: Whether to validate the SSL certificate of the endpoint
+        :type verify_ssl:  bool
+
+        :return: A session for the host of the URL
+        :rtype:  requests.Session
+        '''
+        key = self._get_key(url, verify_ssl)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    logger.debug('Opening HTTP session for {} (verify SSL: {})'.format(key[0], verify_ssl))
+                    session = self._new_session(verify_ssl)
+                    self._sessions[key] = session
+        return session
+
+    def close(self):
+        '''
+        Close all the sessions in the pool, releasing their connections
+        '''
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+    # ----------------------------
+    # ----- Private methods ------
+    # ----------------------------
+
+    def _get_key(self, url: str, verify_ssl: bool) -> Tuple[str, bool]:
+        '''
+        Return the key identifying the session for a URL
+
+        :param url:        The URL to call
+        :type url:         str
+        :param verify_ssl: Whether to validate the SSL certificate of the endpoint
+        :type verify_ssl:  bool
+
+        :return: The session key
+        :rtype:  Tuple[str, bool]
+        '''
+        parsed = urlparse(url)
+        return ('{}://{}'.format(parsed.scheme, parsed.netloc), verify_ssl)
+
+    def _new_session(self, verify_ssl: bool) -> requests.Session:
+        '''
+        Create a new session using the pool settings
+
+        :param verify_ssl: Whether to validate the SSL certificate of the endpoint
+        :type verify_ssl:  bool
+
+        :return: A new session
+        :rtype:  requests.Session
+        '''
+        session = requests.Session()
+        session.verify = verify_ssl
+        # pool the connections, not the cookies: a cookie set in a response is not sent with the following calls
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        if not self._keep_alive:
+            session.headers['Connection'] = 'close'
+        adapter = self._new_adapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _new_adapter(self) -> BaseAdapter:
+        '''
+        Create a new transport adapter using the pool settings
+
+        :return: A new transport adapter
+        :rtype:  BaseAdapter
+        '''
+        retry = Retry(
+            total=get_conf_value(self._retries, 'total', 0),
+            backoff_factor=get_conf_value(self._retries, 'backoffFactor', 0),
+            status_forcelist=get_conf_value(self._retries, 'statusForcelist', []),
+            raise_on_status=False
+        )
+        adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size, max_retries=retry)
+        if self._cassette is not None:
+            return self._cassette.new_adapter(adapter)
+        return adapter
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def pool_size(self) -> int:
+        '''
+        Return the maximum number of connections kept open for each host
+
+        :return: The maximum number of connections kept open for each host
+        :rtype:  int
+        '''
+        return self._pool_size
+
+class TimedHTTPConnection(HTTPConnection):
+    '''
+    HTTP connection reporting the time spent connecting
+    '''
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            add_connection_timing('connect', time.perf_counter() - start)
+
+class TimedHTTPSConnection(HTTPSConnection):
+    '''
+    HTTPS connection reporting the time spent connecting and on the TLS handshake
+    '''
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._connect_time = time.perf_counter() - start
+            add_connection_timing('connect', self._connect_time)
+
+    def connect(self):
+        self._connect_time = 0.0
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            add_connection_timing('tls', time.perf_counter() - start - self._connect_time)
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    '''
+    Transport adapter whose connections report the time spent connecting
+    '''
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+import logging
+import os
+from typing import Any, Dict, List, Tuple
+
+# local imports
+from apitestframework.utils.config import get_conf_value
+
+logger = logging.getLogger(__name__)
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    '''
+    Parse a shard definition, as "i/N" with i between 1 and N
+
+    :param value: The shard definition
+    :type value:  str
+
+    :return: The index of the shard, starting from 1, and the number of shards
+    :rtype:  Tuple[int, int]
+    '''
+    try:
+        i, n = (int(v) for v in str(value).split('/'))
+    except ValueError:
+        raise ValueError('Non-valid shard: {}'.format(value))
+    if n < 1 or i < 1 or i > n:
+        raise ValueError('Non-valid shard: {}'.format(value))
+    return i, n
+
+def load_runtimes(path: str) -> Dict[str, float]:
+    '''
+    Load the runtimes of past runs, in seconds by suite name
+
+    :param path: Path of the runtimes file
+    :type path:  str
+
+    :return: The past runtimes, empty if the file does not exist
+    :rtype:  Dict[str, float]
+    '''
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_runtimes(path: str, runtimes: Dict[str, float]):
+    '''
+    Update the runtimes file with the runtimes of the last run, keeping the ones of suites not run
+
+    :param path:     Path of the runtimes file
+    :type path:      str
+    :param runtimes: Runtimes of the last run, in seconds by suite name
+    :type runtimes:  Dict[str, float]
+    '''
+    all_runtimes = load_runtimes(path)
+    all_runtimes.update(runtimes)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(all_runtimes, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    logger.debug('Saved suite runtimes to {}'.format(path))
+
+def estimate_costs(suites: List[Dict[str, Any]], runtimes: Dict[str, float]) -> List[float]:
+    '''
+    Estimate the runtime of each suite: the past one if known,
+    otherwise its number of tests times the average runtime of a test in the known suites
+
+    :param suites:   Configuration of the suites
+    :type suites:    List[Dict[str, Any]]
+    :param runtimes: Past runtimes, in seconds by suite name
+    :type runtimes:  Dict[str, float]
+
+    :return: The estimated runtime of each suite
+    :rtype:  List[float]
+    '''
+    known_time = 0.0
+    known_tests = 0
+    for sc in suites:
+        name = get_conf_value(sc, 'name')
+        if name in runtimes:
+            known_time += runtimes[name]
+            known_tests += len(get_conf_value(sc, 'tests', []))
+    per_test = known_time / known_tests if known_tests > 0 else 1.0
+    costs = []
+    for sc in suites:
+        name = get_conf_value(sc, 'name')
+        if name in runtimes:
+            costs.append(runtimes[name])
+        else:
+            costs.append(len(get_conf_value(sc, 'tests', [])) * per_test)
+    return costs
+
+def split(costs: List[float], n: int) -> List[List[int]]:
+    '''
+    Split items into n groups of similar total cost, giving the costliest items first to the least loaded group
+    (longest processing time first). The split only depends on the costs, so it is the same on every machine
+
+    :param costs: Cost of each item
+    :type costs:  List[float]
+    :param n:     Number of groups
+    :type n:      int
+
+    :return: Indexes of the items of each group, in their original order
+    :rtype:  List[List[int]]
+    '''
+    loads = [0.0] * n
+    groups = [[] for _ in range(n)]
+    for i in sorted(range(len(costs)), key=lambda i: (-costs[i], i)):
+        g = min(range(n), key=lambda g: (loads[g], g))
+        loads[g] += costs[i]
+        groups[g].append(i)
+    return [sorted(g) for g in groups]
+
+def select_shard(suites: List[Dict[str, Any]], shard: str, runtimes: Dict[str, float]) -> List[Dict[str, Any]]:
+    '''
+    Return the suites of a shard
+
+    :param suites:   Configuration of the suites
+    :type suites:    List[Dict[str, Any]]
+    :param shard:    The shard definition, as "i/N"
+    :type shard:     str
+    :param runtimes: Past runtimes, in seconds by suite name
+    :type runtimes:  Dict[str, float]
+
+    :return: Configuration of the suites of the shard
+    :rtype:  List[Dict[str, Any]]
+    '''
+    i, n = parse_shard(shard)
+    group = split(estimate_costs(suites, runtimes), n)[i - 1]
+    logger.info('Running shard {}/{}: {} of {} suites'.format(i, n, len(group), len(suites)))
+    return [suites[j] for j in group]
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Tuple
+
+# library imports
+import requests
+try:
+    import ijson
+except ImportError:
+    # streaming checks not available
+    ijson = None
+
+# local imports
+from apitestframework.utils.comparison_plan import ComparisonPlan
+from apitestframework.utils.deadline import Deadline
+from apitestframework.utils.key_path import PathSegment, compile_key
+from apitestframework.utils.misc import _is_primitive
+
+logger = logging.getLogger(__name__)
+
+# events opening and closing containers in the parser output
+START_EVENTS = ('start_map', 'start_array')
+END_EVENTS = ('end_map', 'end_array')
+# bytes read at most at once from a response read in chunks
+CHUNK_SIZE = 64 << 10
+
+class ResponseReader(object):
+    '''
+    File-like view of a streamed HTTP response body, counting the bytes read
+    '''
+
+    def __init__(self, raw: Any, deadline: Deadline = None):
+        '''
+        Initialize the reader
+
+        :param raw:      The raw response (urllib3 response)
+        :type raw:       Any
+        :param deadline: The time limit of the run, if any: reading stops with a timeout once it passed
+        :type deadline:  Deadline
+        '''
+        self._raw = raw
+        self._deadline = deadline if deadline is not None and deadline.remaining() is not None else None
+        self._bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        '''
+        Read (decoded) bytes from the response
+
+        :param size: Maximum number of bytes to read
+        :type size:  int
+
+        :return: The bytes read
+        :rtype:  bytes
+        '''
+        if self._deadline is None:
+            data = self._raw.read(size if size >= 0 else None, decode_content=True)
+        else:
+            # read what arrived, so that the deadline is checked at least once per chunk
+            if self._deadline.expired:
+                raise requests.Timeout('Deadline passed while downloading the response')
+            data = read_chunk(self._raw, size if size > 0 else CHUNK_SIZE)
+        self._bytes_read += len(data)
+        return data
+
+    @property
+    def bytes_read(self) -> int:
+        '''
+        Return the number of bytes read so far
+
+        :return: The number of bytes read
+        :rtype:  int
+        '''
+        return self._bytes_read
+
+def read_chunk(raw: Any, size: int) -> bytes:
+    '''
+    Read the next (decoded) bytes of a raw response, returning those already arrived
+    instead of waiting for the given size when possible
+
+    :param raw:  The raw response (urllib3 response)
+    :type raw:   Any
+    :param size: Maximum number of bytes to read
+    :type size:  int
+
+    :return: The bytes read, none at the end of the response
+    :rtype:  bytes
+    '''
+    if hasattr(raw, 'read1'):
+        return raw.read1(size, decode_content=True)
+    return raw.read(size, decode_content=True)
+
+def parse_key(key: str) -> Tuple[PathSegment, ...]:
+    '''
+    Split a key in dot notation into its segments, numbers being list indexes
+
+    :param key: The key in dot notation. I.e. "one.0.three"
+    :type key:  str
+
+    :return: The segments of the key
+    :rtype:  Tuple[PathSegment, ...]
+    '''
+    return compile_key(key).segments
+
+def check_stream(stream: Any, plan: ComparisonPlan, extract: List[Dict[str, str]] = None, max_mismatches: int = 20) -> Tuple[List[Tuple[str, Any, Any]], int, Dict[str, Any]]:
+    '''
+    Check a JSON document against a comparison plan while it is being parsed.
+
+    Only the values to extract and the first mismatches are kept in memory, whatever the size of the document
+
+    :param stream:         File-like object to read the document from
+    :type stream:          Any
+    :param plan:           The expected result, compiled
+    :type plan:            ComparisonPlan
+    :param extract:        Values to extract from the document, as [{"name": ..., "key": ...}]. Keys with wildcards or slices extract the list of the values found
+    :type extract:         List[Dict[str, str]]
+    :param max_mismatches: Maximum number of mismatches to keep
+    :type max_mismatches:  int
+
+    :return: The first mismatches found as (key, expected value, actual value), the total number of mismatches and the extracted values
+    :rtype:  Tuple[List[Tuple[str, Any, Any]], int, Dict[str, Any]]
+    '''
+    # numbers as found in the document, so that integers beyond 64 bits are read by the C parsers too
+    return _check_events(ijson.basic_parse(stream, use_float=False), plan, extract, max_mismatches)
+
+def _check_events(events: Iterable[Tuple[str, Any]], plan: ComparisonPlan, extract: List[Dict[str, str]] = None, max_mismatches: int = 20) -> Tuple[List[Tuple[str, Any, Any]], int, Dict[str, Any]]:
+    '''
+    Check the parser events of a JSON document against a comparison plan
+
+    :param events:         The parser events, as (event, value)
+    :type events:          Iterable[Tuple[str, Any]]
+    :param plan:           The expected result, compiled
+    :type plan:            ComparisonPlan
+    :param extract:        Values to extract from the document, as [{"name": ..., "key": ...}]
+    :type extract:         List[Dict[str, str]]
+    :param max_mismatches: Maximum number of mismatches to keep
+    :type max_mismatches:  int
+
+    :return: The first mismatches found as (key, expected value, actual value), the total number of mismatches and the extracted values
+    :rtype:  Tuple[List[Tuple[str, Any, Any]], int, Dict[str, Any]]
+    '''
+    mismatches = []
+    count = 0
+    extracted = {}
+    to_extract = {}
+    wildcards = []
+    for e in extract or []:
+        key_path = compile_key(e['key'])
+        if key_path.wildcard:
+            extracted[e['name']] = []
+            wildcards.append((key_path, e['name']))
+        else:
+            extracted[e['name']] = None
+            to_extract[key_path.segments] = e['name']
+    extract_depths = set(len(k) for k in to_extract) | set(len(k.segments) for k, _ in wildcards)
+    seen = set()
+    # for each open container: the plan node matching it (None if out of the plan) and the current child segment
+    nodes = []
+    path = []
+    # values being built, as [builder, depth of the container, name, whether the value is one of a list]
+    # or, for arrays of the plan matched regardless of their order, [builder, depth of the container, array, None]
+    builders = []
+    for event, value in events:
+        if event == 'number' and type(value) is Decimal:
+            # decimals are compared as floats, like in the expected result
+            value = float(value)
+        for b in builders:
+            b[0].event(event, value)
+        if event == 'map_key':
+            path[-1] = value
+            continue
+        if event in END_EVENTS:
+            nodes.pop()
+            path.pop()
+            for b in [b for b in builders if b[1] > len(path)]:
+                if b[3] is None:
+                    for m in plan.check_array(b[2], b[0].value):
+                        count += 1
+                        if len(mismatches) < max_mismatches:
+                            mismatches.append(m)
+                elif b[3]:
+                    extracted[b[2]].append(b[0].value)
+                else:
+                    extracted[b[2]] = b[0].value
+                builders.remove(b)
+            continue
+        # a new value: find its position
+        if len(path) == 0:
+            node = plan.root
+        else:
+            if isinstance(path[-1], int):
+                path[-1] += 1
+            parent = nodes[-1]
+            node = parent.children.get(path[-1]) if parent is not None else None
+        if node is not None and node.leaf is not None:
+            leaf = node.leaf
+            seen.add(leaf.key)
+            actual = value if event not in START_EVENTS else ('{...}' if event == 'start_map' else '[...]')
+            if leaf.exc_type is None:
+                failed = event in START_EVENTS or actual != leaf.expected
+            else:
+                failed = event in START_EVENTS or not _is_primitive(actual)
+            if failed:
+                count += 1
+                if len(mismatches) < max_mismatches:
+                    mismatches.append((leaf.key, leaf.expected, actual))
+            node = None
+        elif node is not None and node.array is not None:
+            array = node.array
+            seen.add(array.key)
+            if event == 'start_array':
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                builders.append([builder, len(path) + 1, array, None])
+            else:
+                count += 1
+                if len(mismatches) < max_mismatches:
+                    mismatches.append((array.key, array.expected, value if event != 'start_map' else '{...}'))
+            node = None
+        if len(path) in extract_depths:
+            current = tuple(path)
+            names = [(n, True) for k, n in wildcards if k.matches(current)]
+            if current in to_extract:
+                names.append((to_extract[current], False))
+            for name, many in names:
+                if event in START_EVENTS:
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    builders.append([builder, len(path) + 1, name, many])
+                elif many:
+                    extracted[name].append(value)
+                else:
+                    extracted[name] = value
+        if event in START_EVENTS:
+            nodes.append(node)
+            path.append(None if event == 'start_map' else -1)
+    # leaves never met are missing from the document
+    for leaf in plan.root.leaves():
+        if leaf.key not in seen:
+            count += 1
+            if len(mismatches) < max_mismatches:
+                mismatches.append((leaf.key, leaf.expected, None))
+    return mismatches, count, extracted
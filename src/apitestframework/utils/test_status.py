@@ -34,6 +34,8 @@ class TestStatus(IntEnum):
     FAILURE = 3
     # test skipped
     SKIPPED = 4
+    # test stopped by a timeout, or not run before the deadline of the run
+    TIMEOUT = 5
     # unknown
     UNKNOWN = 39
 
@@ -54,5 +56,16 @@ class TestStatus(IntEnum):
             return '\N{Heavy Ballot X}'
         elif self == TestStatus.SKIPPED:
             return '\N{Fisheye}'
+        elif self == TestStatus.TIMEOUT:
+            return '\N{Alarm Clock}'
         else:
             return '\N{Question Mark}'
+
+    def is_failure(self) -> bool:
+        '''
+        Return whether the status makes the run fail
+
+        :return: Whether the status makes the run fail
+        :rtype:  bool
+        '''
+        return self in (TestStatus.FAILURE, TestStatus.TIMEOUT)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import threading
+import time
+from typing import Dict, List
+
+# phases of a test, in execution order
+PHASES = ('build', 'connect', 'tls', 'ttfb', 'backoff', 'download', 'parse', 'content_check', 'code_check')
+# phases spent on the network
+NETWORK_PHASES = ('connect', 'tls', 'ttfb', 'download')
+
+# time spent opening connections by the current thread
+_connection_local = threading.local()
+
+class PhaseTimer(object):
+    '''
+    Measure the time spent in consecutive phases
+    '''
+
+    def __init__(self):
+        '''
+        Initialize the timer, starting the first phase now
+        '''
+        self._timings = {}
+        self._last = time.perf_counter()
+
+    # ---------------------------
+    # ----- Public methods ------
+    # ---------------------------
+
+    def mark(self, phase: str, parts: Dict[str, float] = None):
+        '''
+        End the current phase, adding the time elapsed since the previous mark to it
+
+        :param phase: The name of the phase just ended
+        :type phase:  str
+        :param parts: Time, in seconds, spent during the phase that belongs to other phases instead
+        :type parts:  Dict[str, float]
+        '''
+        now = time.perf_counter()
+        elapsed = now - self._last
+        for p, t in (parts or {}).items():
+            self.add(p, t)
+            elapsed -= t
+        self.add(phase, max(elapsed, 0.0))
+        self._last = now
+
+    def add(self, phase: str, seconds: float):
+        '''
+        Add time to a phase
+
+        :param phase:   The name of the phase
+        :type phase:    str
+        :param seconds: The time to add, in seconds
+        :type seconds:  float
+        '''
+        self._timings[phase] = self._timings.get(phase, 0.0) + seconds
+
+    # -----------------------
+    # ----- Properties ------
+    # -----------------------
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        '''
+        Return the time spent in each phase, in seconds
+
+        :return: The time spent in each phase
+        :rtype:  Dict[str, float]
+        '''
+        return self._timings
+
+def start_connection_timing():
+    '''
+    Start collecting the time spent by the current thread opening connections
+    '''
+    _connection_local.timings = {'connect': 0.0, 'tls': 0.0}
+
+def stop_connection_timing() -> Dict[str, float]:
+    '''
+    Stop collecting the time spent by the current thread opening connections
+
+    :return: The time spent on TCP connections (DNS included) and on TLS handshakes, in seconds
+    :rtype:  Dict[str, float]
+    '''
+    timings = getattr(_connection_local, 'timings', None)
+    _connection_local.timings = None
+    return timings or {'connect': 0.0, 'tls': 0.0}
+
+def add_connection_timing(phase: str, seconds: float):
+    '''
+    Add time spent opening a connection by the current thread, if collecting
+
+    :param phase:   "connect" or "tls"
+    :type phase:    str
+    :param seconds: The time to add, in seconds
+    :type seconds:  float
+    '''
+    timings = getattr(_connection_local, 'timings', None)
+    if timings is not None:
+        timings[phase] += seconds
+
+def sum_timings(timings_list: List[Dict[str, float]]) -> Dict[str, float]:
+    '''
+    Sum the time spent in each phase over several tests
+
+    :param timings_list: Time spent in each phase by each test
+    :type timings_list:  List[Dict[str, float]]
+
+    :return: The total time spent in each phase, in seconds
+    :rtype:  Dict[str, float]
+    '''
+    total = {p: 0.0 for p in PHASES}
+    for timings in timings_list:
+        for p, t in (timings or {}).items():
+            total[p] = total.get(p, 0.0) + t
+    return total
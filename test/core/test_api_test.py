@@ -17,14 +17,45 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# system imports
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 # library imports
 import pytest
 import responses
 
 # local imports
 from apitestframework.core.api_test import ApiTest
+from apitestframework.core.stub_server import StubServer
+from apitestframework.utils.deadline import Deadline
+from apitestframework.utils.header_utils import get_headers_list
 from apitestframework.utils.test_status import TestStatus
 
+class _DripHandler(BaseHTTPRequestHandler):
+    '''
+    Answer with a JSON body sent one byte every 100 ms
+    '''
+
+    def do_GET(self):
+        body = json.dumps({'version': '0.3.1', 'status': 'OK'}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            for i in range(len(body)):
+                self.wfile.write(body[i:i + 1])
+                self.wfile.flush()
+                time.sleep(0.1)
+        except ConnectionError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
 class TestApiTest(object):
     '''
     Test core.api_test module
@@ -162,6 +193,11 @@ class TestApiTest(object):
             'field': 'added_path'
         })
         assert at._url == 'http://localhost:9396/added_path'
+        # injecting again replaces the value
+        at.inject_values({
+            'field': 'other_path'
+        })
+        assert at._url == 'http://localhost:9396/other_path'
 
     def test_10(self):
         at = ApiTest({
@@ -258,3 +294,182 @@ class TestApiTest(object):
             }
         })
         assert len(at._get_headers()) == 1
+
+    @responses.activate
+    def test_15(self):
+        at = ApiTest({
+            'base_url': 'http://localhost:9396'
+        }, {
+            'expected': 'config/output/goeuro-status-expected.json'
+        })
+        responses.add(responses.GET, 'http://localhost:9396',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        assert at.timings == {}
+        status, data = at.run()
+        assert status == TestStatus.SUCCESS
+        assert set(at.timings) == {'build', 'connect', 'tls', 'ttfb', 'download', 'parse', 'content_check', 'code_check'}
+        assert all(t >= 0 for t in at.timings.values())
+        assert at.elapsed == pytest.approx(at.timings['connect'] + at.timings['tls'] + at.timings['ttfb'] + at.timings['download'])
+
+    @responses.activate
+    def test_16(self):
+        tests = [ApiTest({
+            'base_url': 'http://localhost:9396'
+        }, {
+            'expected': 'config/output/goeuro-status-expected.json',
+            'enabled': i == 0
+        }) for i in range(2)]
+        responses.add(responses.GET, 'http://localhost:9396',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        # nothing parsed until the test runs
+        assert tests[0]._comparison_plan is None
+        status, data = tests[0].run()
+        assert status == TestStatus.SUCCESS
+        assert tests[1]._comparison_plan is None
+        tests[1].run()
+        # the file is shared
+        assert tests[1]._expected_result is tests[0]._expected_result
+        assert tests[1]._comparison_plan is tests[0]._comparison_plan
+
+    def test_17(self):
+        stub = StubServer({
+            'suites': [{ 'tests': [{ 'path': '/v1/status', 'expected': 'config/output/goeuro-status-expected.json' }] }]
+        }, { 'port': 0, 'latency': 300 })
+        stub.start()
+        try:
+            tests = [ApiTest({
+                'base_url': stub.url,
+                'read_timeout': 0.05
+            }, {
+                'path': '/v1/status',
+                'expected': 'config/output/goeuro-status-expected.json',
+                'stream': stream
+            }) for stream in (False, True)]
+            tests.append(ApiTest({
+                'base_url': stub.url,
+                'read_timeout': 0.05
+            }, {
+                'path': '/v1/status',
+                'expected': 'config/output/goeuro-status-expected.json',
+                'readTimeout': 2
+            }))
+            for at in tests[:2]:
+                assert at.run() == (TestStatus.TIMEOUT, None)
+                assert at.status == TestStatus.TIMEOUT
+                assert at.elapsed < 0.3
+            assert tests[2].run()[0] == TestStatus.SUCCESS
+        finally:
+            stub.stop()
+
+    @responses.activate
+    def test_18(self):
+        tests = [ApiTest({
+            'base_url': 'http://localhost:9396',
+            'retry': { 'backoff': 0.01 }
+        }, {
+            'method': method,
+            'expected': 'config/output/goeuro-status-expected.json'
+        }) for method in ('GET', 'POST')]
+        for method in (responses.GET, responses.POST):
+            responses.add(method, 'http://localhost:9396', json={}, status=503, headers={'Retry-After': '0'})
+            responses.add(method, 'http://localhost:9396', json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        status, _ = tests[0].run()
+        assert status == TestStatus.SUCCESS
+        assert [(a['attempt'], a['status'], a['hedged']) for a in tests[0].attempts] == [(1, 503, False), (2, 200, False)]
+        assert tests[0].attempts[0]['wait'] == 0
+        assert 'backoff' in tests[0].timings
+        # not idempotent: not retried
+        status, _ = tests[1].run()
+        assert status == TestStatus.FAILURE
+        assert tests[1].attempts is None
+
+    @responses.activate
+    def test_19(self):
+        at = ApiTest({
+            'base_url': 'http://localhost:9396'
+        }, {
+            'method': 'POST',
+            'payload': { 'id': 'noid' },
+            'expected': 'config/output/goeuro-status-expected.json',
+            'expected_code': 201,
+            'inject': [{
+                'name': 'field',
+                'type': 'body',
+                'key': 'id'
+            }, {
+                'name': 'field',
+                'type': 'query',
+                'key': 'q'
+            }]
+        })
+        responses.add(responses.POST, 'http://localhost:9396', json={'version': '0.3.1', 'status': 'OK'}, status=201)
+        # the request of each run carries the values injected last
+        for value in ('a', 'a', 'b'):
+            at.inject_values({ 'field': value })
+            assert at.run()[0] == TestStatus.SUCCESS
+        assert [json.loads(c.request.body)['id'] for c in responses.calls] == ['a', 'a', 'b']
+        assert [c.request.url for c in responses.calls] == ['http://localhost:9396/?q=a', 'http://localhost:9396/?q=a', 'http://localhost:9396/?q=b']
+
+    @responses.activate
+    def test_20(self):
+        at = ApiTest({
+            'base_url': 'http://localhost:9396',
+            'diff': { 'maxEntries': 1 }
+        }, {
+            'expected': 'config/output/goeuro-status-expected.json'
+        })
+        responses.add(responses.GET, 'http://localhost:9396', json={'version': '0.3.2'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9396', json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        assert at.run()[0] == TestStatus.FAILURE
+        assert at.diff.count == 2
+        assert [e.to_dict() for e in at.diff.entries] == [{'kind': 'changed', 'path': 'version', 'expected': '0.3.1', 'actual': '0.3.2'}]
+        assert at.run()[0] == TestStatus.SUCCESS
+        assert at.diff is None
+
+    @pytest.mark.parametrize('stream', [False, True])
+    def test_21(self, stream):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _DripHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        deadline = Deadline(0.5)
+        deadline.start()
+        at = ApiTest({
+            'base_url': 'http://127.0.0.1:{}'.format(server.server_address[1]),
+            'deadline': deadline
+        }, {
+            'expected': 'config/output/goeuro-status-expected.json',
+            'stream': stream
+        })
+        start = time.perf_counter()
+        try:
+            status, _ = at.run()
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            server.server_close()
+        # the download is stopped once the deadline passed, although each read is quick
+        assert status == TestStatus.TIMEOUT
+        assert elapsed < 1.0
+
+    def test_22(self):
+        '''
+        Test injecting a header shared by the suite changes only the test it is injected into
+        '''
+        shared_config = {
+            'base_url': 'http://localhost:9396',
+            'headers': get_headers_list({ 'headers': { 'Authorization': { 'value': 'Bearer {}' } } })
+        }
+        data = {
+            'expected': 'config/output/goeuro-status-expected.json',
+            'inject': [{
+                'name': 'token',
+                'type': 'header',
+                'key': 'Authorization'
+            }]
+        }
+        at0 = ApiTest(shared_config, data)
+        at1 = ApiTest(shared_config, data)
+        at0.inject_values({ 'token': 'one' })
+        at1.inject_values({ 'token': 'two' })
+        assert at0._get_headers()['Authorization'] == 'Bearer one'
+        assert at1._get_headers()['Authorization'] == 'Bearer two'
+        assert shared_config['headers'][0].value == 'Bearer {}'
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import threading
+import time
+
+# library imports
+import pytest
+import responses
+
+# local imports
+from apitestframework.core.async_engine import AsyncEngine
+from apitestframework.core.test_run import TestRun
+from apitestframework.utils.test_status import TestStatus
+
+def suite_config(name: str, base_url: str, path: str):
+    return {
+        'name': name,
+        'baseUrl': base_url,
+        'tests': [
+            {
+                'name': 'Status',
+                'path': path,
+                'expected': 'config/output/goeuro-status-expected.json'
+            },
+            {
+                'name': 'StatusNext',
+                'path': path,
+                'expected': 'config/output/goeuro-status-expected.json'
+            }
+        ]
+    }
+
+class TestAsyncEngine(object):
+    '''
+    Test core.async_engine module
+    '''
+
+    @responses.activate
+    def test_01(self):
+        tr = TestRun({
+            'engine': 'async',
+            'suites': [
+                suite_config('SUITE_01', 'http://localhost:9093', '/v1/status'),
+                suite_config('SUITE_02', 'http://localhost:9094', '/v1/status')
+            ]
+        })
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9094/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        tr.run()
+        for s in tr._suites:
+            assert [r[0] for r in s.test_results] == ['Status', 'StatusNext']
+            assert all(r[1] == TestStatus.SUCCESS for r in s.test_results)
+
+    @responses.activate
+    def test_02(self):
+        tr = TestRun({
+            'engine': 'async',
+            'suites': [
+                suite_config('SUITE_01', 'http://localhost:9093', '/v1/status'),
+                suite_config('SUITE_02', 'http://localhost:9093', '/v1/failing')
+            ]
+        })
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9093/v1/failing',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=500)
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            tr.run()
+        assert pytest_wrapped_e.value.code == 1
+        assert len(tr._suites[0].test_results) == 2
+        assert len(tr._suites[1].test_results) == 1
+
+    @responses.activate
+    def test_graph(self):
+        graph_suite = suite_config('SUITE_02', 'http://localhost:9094', '/v1/status')
+        graph_suite['scheduler'] = 'graph'
+        tr = TestRun({
+            'engine': 'async',
+            'suites': [
+                suite_config('SUITE_01', 'http://localhost:9093', '/v1/status'),
+                graph_suite
+            ]
+        })
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9094/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        tr.run()
+        assert [(r[0], r[1]) for r in tr._suites[1].test_results] == [
+            ('Status', TestStatus.SUCCESS),
+            ('StatusNext', TestStatus.SUCCESS)
+        ]
+
+    def test_03(self):
+        with pytest.raises(ValueError) as pytest_wrapped_e:
+            TestRun({
+                'engine': 'turbo'
+            })
+        assert 'non-valid engine' in str(pytest_wrapped_e.value).lower()
+
+    def test_limits(self):
+        '''
+        Test that calls against a host never exceed the configured limits
+        '''
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'max': 0}
+
+        class FakeTest(object):
+            host = 'localhost:9093'
+
+        class FakeSuite(object):
+            def call(self):
+                with lock:
+                    in_flight['now'] += 1
+                    in_flight['max'] = max(in_flight['max'], in_flight['now'])
+                time.sleep(0.02)
+                with lock:
+                    in_flight['now'] -= 1
+                return True
+
+            async def run_async(self, engine):
+                for _ in range(3):
+                    await engine.call(FakeTest.host, self.call)
+
+        AsyncEngine({'global': 8, 'perHost': 2}).run([FakeSuite() for _ in range(4)])
+        assert in_flight['max'] == 2
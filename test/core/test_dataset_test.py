@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+
+# library imports
+import pytest
+import responses
+
+# local imports
+from apitestframework.core.dataset_test import DatasetTest
+from apitestframework.utils.fixture_cache import fixture_cache
+from apitestframework.utils.test_status import TestStatus
+
+SHARED_CONFIG = {
+    'base_url': 'http://localhost:9093',
+    'workers': 3
+}
+
+def _write_rows(tmp_path, rows):
+    path = tmp_path / 'rows.jsonl'
+    path.write_text('\n'.join(json.dumps(r) for r in rows))
+    return str(path)
+
+class TestDatasetTest(object):
+    '''
+    Test core.dataset_test module
+    '''
+
+    def test_init(self, tmp_path):
+        '''
+        Test validating the dataset test on its first row
+        '''
+        dataset = _write_rows(tmp_path, [{'id': 1}])
+        t = DatasetTest(SHARED_CONFIG, {
+            'name': 'Items',
+            'path': '/v1/items/${id}',
+            'expected': 'config/output/status-expected.json',
+            'dataset': dataset
+        })
+        assert t.name == 'Items'
+        assert t.host == 'localhost:9093'
+        assert t.expected_file.endswith('status-expected.json')
+        assert t.extract_names == []
+        assert len(t.definition['dataset']) == 64
+        with pytest.raises(KeyError):
+            DatasetTest(SHARED_CONFIG, {
+                'path': '/v1/items/${missing}',
+                'expected': 'config/output/status-expected.json',
+                'dataset': dataset
+            })
+        with pytest.raises(FileNotFoundError):
+            DatasetTest(SHARED_CONFIG, {
+                'path': '/v1/items',
+                'expected': 'config/output/status-expected.json',
+                'dataset': str(tmp_path / 'missing.csv')
+            })
+
+    @responses.activate
+    def test_run(self, tmp_path):
+        '''
+        Test running the rows and aggregating their results by group
+        '''
+        rows = [{'id': i, 'kind': 'odd' if i % 2 else 'even', 'code': 404 if i == 3 else 200} for i in range(1, 7)]
+        for r in rows:
+            responses.add(responses.GET, 'http://localhost:9093/v1/items/{}'.format(r['id']),
+                json={'version': '0.0.1', 'status': 'OK'}, status=200)
+        t = DatasetTest(SHARED_CONFIG, {
+            'name': 'Items',
+            'path': '/v1/items/${id}',
+            'params': {'kind': '${kind}'},
+            'expected': 'config/output/status-expected.json',
+            'expected_code': '${code}',
+            'dataset': _write_rows(tmp_path, rows),
+            'groupBy': 'kind'
+        })
+        status, res = t.run()
+        assert status == TestStatus.FAILURE
+        assert res['rows'] == 6
+        assert res['groups']['even']['passed'] == 3
+        assert res['groups']['odd']['passed'] == 2
+        assert res['groups']['odd']['failed'] == 1
+        assert res['groups']['odd']['failedRows'] == [3]
+        assert len(responses.calls) == 6
+        assert all('kind=' in c.request.url for c in responses.calls)
+
+    @responses.activate
+    def test_csv(self, tmp_path):
+        '''
+        Test running the rows of a CSV file with injected values
+        '''
+        path = tmp_path / 'rows.csv'
+        path.write_text('id,code\n1,200\n2,200\n')
+        for i in (1, 2):
+            responses.add(responses.POST, 'http://localhost:9093/v1/items/{}'.format(i),
+                json={'version': '0.0.1', 'status': 'OK'}, status=200)
+        t = DatasetTest(SHARED_CONFIG, {
+            'name': 'Items',
+            'path': '/v1/items/${id}',
+            'method': 'POST',
+            'payload': {'id': '${id}'},
+            'expected': 'config/output/status-expected.json',
+            'expected_code': '${code}',
+            'dataset': str(path),
+            'inject': [{'name': 'token', 'type': 'body', 'key': 'token'}]
+        })
+        t.inject_values({'token': 'abc', 'other': 1})
+        status, res = t.run()
+        assert status == TestStatus.SUCCESS
+        assert res == {'rows': 2, 'groups': {'all': {'rows': 2, 'passed': 2, 'failed': 0, 'timeouts': 0, 'elapsed': res['groups']['all']['elapsed'], 'failedRows': []}}}
+        bodies = sorted((json.loads(c.request.body) for c in responses.calls), key=lambda b: b['id'])
+        assert bodies == [{'id': '1', 'token': 'abc'}, {'id': '2', 'token': 'abc'}]
+
+    @responses.activate
+    def test_expected_per_row(self, tmp_path):
+        '''
+        Test the expected files of the rows are not kept in the shared cache
+        '''
+        rows = [{'id': i} for i in range(1, 21)]
+        for r in rows:
+            (tmp_path / '{}.json'.format(r['id'])).write_text(json.dumps({'id': r['id']}))
+            responses.add(responses.GET, 'http://localhost:9093/v1/items/{}'.format(r['id']), json={'id': r['id']}, status=200)
+        fixture_cache.clear()
+        t = DatasetTest(SHARED_CONFIG, {
+            'name': 'Items',
+            'path': '/v1/items/${id}',
+            'expected': str(tmp_path / '${id}.json'),
+            'dataset': _write_rows(tmp_path, rows)
+        })
+        status, res = t.run()
+        assert status == TestStatus.SUCCESS
+        assert res['groups']['all']['passed'] == 20
+        assert len(fixture_cache) == 0
+        assert len(fixture_cache._plans) == 0
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# library imports
+import pytest
+import responses
+
+# local imports
+from apitestframework.core.load_run import LoadRun
+
+def get_config(load_config):
+    return {
+        'load': load_config,
+        'suites': [
+            {
+                'name': 'MY_SUITE',
+                'baseUrl': 'http://localhost:9093',
+                'tests': [
+                    {
+                        'name': 'Status',
+                        'path': '/v1/status',
+                        'expected': 'config/output/goeuro-status-expected.json',
+                        'extract': [
+                            {
+                                'name': 'version',
+                                'key': 'version'
+                            }
+                        ]
+                    },
+                    {
+                        'name': 'Version',
+                        'path': '/v1/version',
+                        'expected': 'config/output/goeuro-status-expected.json',
+                        'inject': [
+                            {
+                                'name': 'version',
+                                'type': 'path'
+                            }
+                        ]
+                    }
+                ]
+            },
+            {
+                'name': 'OTHER_SUITE',
+                'baseUrl': 'http://localhost:9093'
+            }
+        ]
+    }
+
+class TestLoadRun(object):
+    '''
+    Test core.load_run module
+    '''
+
+    @responses.activate
+    def test_closed(self):
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9093/v1/version/0.3.1',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        lr = LoadRun(get_config({
+            'users': 2,
+            'duration': 0.2,
+            'sample': 0.5,
+            'suites': ['MY_SUITE']
+        }))
+        assert lr.run() == True
+        status = lr._stats[(0, 0)]
+        version = lr._stats[(0, 1)]
+        assert (status.name, version.name) == ('MY_SUITE / Status', 'MY_SUITE / Version')
+        assert status.calls > 0
+        assert status.calls == version.calls == lr._iterations
+        assert status.histogram.count == status.calls
+        assert version.errors == 0
+
+    @responses.activate
+    def test_open(self):
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9093/v1/version/0.3.1',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=500)
+        lr = LoadRun(get_config({
+            'rate': 50,
+            'duration': 0.2,
+            'suites': ['MY_SUITE']
+        }))
+        assert lr.run() == False
+        assert 5 <= lr._iterations <= 11
+        assert lr._stats[(0, 1)].errors == lr._iterations
+
+    @responses.activate
+    def test_same_name(self):
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9093/v1/version/0.3.1',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=500)
+        config = get_config({
+            'users': 1,
+            'duration': 0.1,
+            'suites': ['MY_SUITE']
+        })
+        config['suites'][0]['tests'][1]['name'] = 'Status'
+        lr = LoadRun(config)
+        assert lr.run() == False
+        # tests sharing a name keep their own stats
+        assert lr._stats[(0, 0)].errors == 0
+        assert lr._stats[(0, 1)].errors == lr._iterations
+
+    def test_config(self):
+        with pytest.raises(ValueError) as pytest_wrapped_e:
+            LoadRun(get_config({
+                'rate': 10,
+                'users': 10
+            }))
+        assert 'not both' in str(pytest_wrapped_e.value)
+        with pytest.raises(ValueError) as pytest_wrapped_e:
+            LoadRun(get_config({
+                'suites': ['NO_SUITE']
+            }))
+        assert 'no test suite' in str(pytest_wrapped_e.value).lower()
+        lr = LoadRun(get_config({}))
+        assert lr._users == 1
+        assert lr._sample == 1.0
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import copy
+import json
+
+# library imports
+import pytest
+import responses
+
+# local imports
+from apitestframework.core.run_state import RunState
+from apitestframework.core.test_run import TestRun, _run_suite_process
+from apitestframework.utils.test_status import TestStatus
+
+BASE_CONFIG = {
+    'suites': [
+        {
+            'name': 'CHAIN',
+            'baseUrl': 'http://localhost:9093',
+            'exitOnFailure': False,
+            'tests': [
+                {
+                    'name': 'Status',
+                    'path': '/v1/status',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'extract': [{ 'name': 'version', 'key': 'version' }]
+                },
+                {
+                    'name': 'Versioned',
+                    'path': '/v1/versioned',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'inject': [{ 'name': 'version', 'type': 'query', 'key': 'v' }]
+                },
+                {
+                    'name': 'Other',
+                    'path': '/v1/other',
+                    'expected': 'config/output/goeuro-status-expected.json'
+                },
+                {
+                    'name': 'Disabled',
+                    'path': '/v1/disabled',
+                    'enabled': False,
+                    'expected': 'config/output/goeuro-status-expected.json'
+                }
+            ]
+        },
+        {
+            'name': 'SINGLE',
+            'baseUrl': 'http://localhost:9093',
+            'tests': [
+                {
+                    'name': 'Status',
+                    'path': '/v1/single',
+                    'expected': 'config/output/goeuro-status-expected.json'
+                }
+            ]
+        }
+    ]
+}
+
+def _run(config: dict, statuses: dict = {}) -> tuple:
+    '''
+    Run a Test Run, returning it, the paths called and whether it failed
+    '''
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        for path in ('status', 'versioned', 'other', 'single'):
+            rsps.add(responses.GET, 'http://localhost:9093/v1/{}'.format(path), json={'version': '0.3.1', 'status': 'OK'}, status=statuses.get(path, 200))
+        tr = TestRun(config)
+        try:
+            tr.run()
+            failed = False
+        except SystemExit:
+            failed = True
+        return tr, [c.request.path_url.split('?')[0] for c in rsps.calls], failed
+
+class TestRunState(object):
+    '''
+    Test core.run_state module
+    '''
+
+    def test_changed(self, tmpdir):
+        '''
+        Test running only the tests whose inputs changed or that failed
+        '''
+        state = str(tmpdir.join('state.json'))
+        with pytest.raises(ValueError):
+            TestRun(dict(BASE_CONFIG, changed=True))
+        # first run: everything runs, Other fails
+        tr, calls, failed = _run(dict(BASE_CONFIG, runState=state, changed=True), {'other': 500})
+        assert sorted(calls) == ['/v1/other', '/v1/single', '/v1/status', '/v1/versioned']
+        assert failed
+        assert json.load(open(state))['suites']['CHAIN']['Other']['status'] == 'FAILURE'
+        # the failed test runs again
+        tr, calls, failed = _run(dict(BASE_CONFIG, runState=state, changed=True))
+        assert calls == ['/v1/other']
+        assert not failed
+        assert [(r.name, r.status) for r in tr.suites[0].test_results.records] == [
+            ('Status', TestStatus.SUCCESS), ('Versioned', TestStatus.SUCCESS), ('Other', TestStatus.SUCCESS), ('Disabled', TestStatus.SKIPPED)
+        ]
+        # nothing changed
+        tr, calls, failed = _run(dict(BASE_CONFIG, runState=state, changed=True))
+        assert calls == []
+        assert not failed
+        assert len(tr.suites[1].test_results.records) == 1
+        # a test injecting a value needs the test extracting it
+        config = copy.deepcopy(BASE_CONFIG)
+        config['suites'][0]['tests'][1]['headers'] = { 'X-Trace': { 'value': '1' } }
+        tr, calls, failed = _run(dict(config, runState=state, changed=True))
+        assert calls == ['/v1/status', '/v1/versioned']
+        # a test extracting a value changes the tests injecting it
+        config['suites'][0]['tests'][0]['params'] = { 'verbose': 'true' }
+        tr, calls, failed = _run(dict(config, runState=state, changed=True))
+        assert calls == ['/v1/status', '/v1/versioned']
+        # suite headers are inputs of all the tests
+        config['suites'][1]['headers'] = { 'X-Env': { 'value': 'ci' } }
+        tr, calls, failed = _run(dict(config, runState=state, changed=True))
+        assert calls == ['/v1/single']
+
+    def test_failed_first(self, tmpdir):
+        '''
+        Test running first the suites that failed
+        '''
+        state = str(tmpdir.join('state.json'))
+        tr, calls, failed = _run(dict(BASE_CONFIG, runState=state), {'single': 500})
+        assert failed
+        tr, calls, failed = _run(dict(BASE_CONFIG, runState=state, failedFirst=True))
+        assert [s.name for s in tr.suites] == ['SINGLE', 'CHAIN']
+        assert calls[0] == '/v1/single'
+        assert len(calls) == 4
+
+    def test_workers(self, tmpdir):
+        '''
+        Test planning the suites in the processes running them
+        '''
+        state = str(tmpdir.join('state.json'))
+        _run(dict(BASE_CONFIG, runState=state), {'other': 500})
+        config = dict(BASE_CONFIG, runState=state, changed=True, workers=2)
+        tr = TestRun(config)
+        # the tests are not built by the parent process
+        assert all(s._tests is None for s in tr.suites)
+        assert all(s.reused == {} for s in tr.suites)
+        # a worker plans its suite, and hands back the inputs of its tests
+        run_state = RunState(state)
+        process_config = {k: v for k, v in config.items() if k != 'suites'}
+        with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+            rsps.add(responses.GET, 'http://localhost:9093/v1/other', json={'version': '0.3.1', 'status': 'OK'})
+            records, _, _, reused, suite_state = _run_suite_process(process_config, BASE_CONFIG['suites'][0], run_state=run_state.for_suite('CHAIN'))
+            assert [c.request.path_url for c in rsps.calls] == ['/v1/other']
+        assert sorted(reused) == [0, 1]
+        assert suite_state._suites.keys() == {'CHAIN'}
+        run_state.merge(suite_state)
+        run_state.update('CHAIN', records)
+        run_state.save()
+        assert json.load(open(state))['suites']['CHAIN']['Other']['status'] == 'SUCCESS'
+
+    def test_same_name(self, tmpdir, caplog):
+        '''
+        Test reporting the reused results of tests sharing a name
+        '''
+        state = str(tmpdir.join('state.json'))
+        config = {
+            'suites': [{
+                'name': 'DUP',
+                'baseUrl': 'http://localhost:9093',
+                'exitOnFailure': False,
+                'tests': [
+                    { 'name': 'Same', 'path': '/v1/status', 'expected': 'config/output/goeuro-status-expected.json' },
+                    { 'name': 'Same', 'path': '/v1/other', 'expected': 'config/output/goeuro-status-expected.json' }
+                ]
+            }],
+            'runState': state,
+            'changed': True
+        }
+        _run(config, {'other': 500})
+        caplog.clear()
+        with caplog.at_level('INFO'):
+            tr, calls, failed = _run(config)
+        assert calls == ['/v1/other']
+        lines = [r.getMessage() for r in caplog.records if 'Test "Same"' in r.getMessage()]
+        assert len(lines) == 2
+        assert lines[0].endswith('SUCCESS (previous result)')
+        assert lines[1].endswith('SUCCESS')
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+import os
+import pickle
+
+# library imports
+import pytest
+
+# local imports
+from apitestframework.core.snapshot import compile_snapshot, get_snapshot_path, load_snapshot
+from apitestframework.utils.fixture_cache import fixture_cache
+
+def _write_config(tmpdir):
+    expected = tmpdir.join('expected.json')
+    expected.write('{"version": "0.3.1", "status": "OK"}')
+    config = tmpdir.join('config.json')
+    config.write(json.dumps({
+        'suites': [
+            {
+                'name': 'MY_SUITE',
+                'baseUrl': 'http://localhost:9093',
+                'tests': [
+                    {
+                        'name': 'Status',
+                        'path': '/v1/status',
+                        'expected': str(expected)
+                    },
+                    {
+                        'name': 'Status again',
+                        'path': '/v1/status',
+                        'expected': str(expected),
+                        'responseCheckExceptions': [{'key': 'status', 'type': 'ignore'}]
+                    }
+                ]
+            }
+        ]
+    }))
+    return str(config), expected
+
+class TestSnapshot(object):
+    '''
+    Test core.snapshot module
+    '''
+
+    def test_compile(self, tmpdir):
+        config_file, expected = _write_config(tmpdir)
+        snapshot = compile_snapshot(config_file)
+        assert os.path.exists(get_snapshot_path(config_file))
+        assert snapshot['config']['suites'][0]['name'] == 'MY_SUITE'
+        assert sorted(snapshot['manifest']) == sorted([os.path.realpath(config_file), os.path.realpath(str(expected))])
+        assert list(snapshot['fixtures']['values'].values()) == [{'version': '0.3.1', 'status': 'OK'}]
+        assert len(snapshot['fixtures']['plans']) == 2
+
+    def test_compile_run_options(self, tmpdir):
+        config_file, expected = _write_config(tmpdir)
+        cassette = tmpdir.join('cassette.jsonl')
+        cassette.write('{"recorded": true}\n')
+        config = json.loads(open(config_file).read())
+        config['cassette'] = {'mode': 'record', 'file': str(cassette)}
+        config['shard'] = '2/2'
+        with open(config_file, 'w') as f:
+            json.dump(config, f)
+        snapshot = compile_snapshot(config_file)
+        # the cassette is left untouched and all the suites are compiled
+        assert cassette.read() == '{"recorded": true}\n'
+        assert len(snapshot['fixtures']['plans']) == 2
+        assert snapshot['config']['cassette']['mode'] == 'record'
+
+    def test_compile_invalid(self, tmpdir):
+        config_file, expected = _write_config(tmpdir)
+        expected.remove()
+        with pytest.raises(FileNotFoundError):
+            compile_snapshot(config_file)
+        assert not os.path.exists(get_snapshot_path(config_file))
+
+    def test_load(self, tmpdir):
+        config_file, expected = _write_config(tmpdir)
+        # no snapshot
+        assert load_snapshot(config_file)['suites'][0]['name'] == 'MY_SUITE'
+        compile_snapshot(config_file)
+        fixture_cache.clear()
+        config = load_snapshot(config_file)
+        assert config['suites'][0]['name'] == 'MY_SUITE'
+        # preloaded
+        assert len(fixture_cache) == 1
+        assert fixture_cache.load(str(expected)) == {'version': '0.3.1', 'status': 'OK'}
+
+    def test_load_stale(self, tmpdir):
+        config_file, expected = _write_config(tmpdir)
+        compile_snapshot(config_file)
+        # touched but unchanged
+        os.utime(str(expected), ns=(0, 0))
+        mtime = os.stat(get_snapshot_path(config_file)).st_mtime_ns
+        load_snapshot(config_file)
+        assert os.stat(get_snapshot_path(config_file)).st_mtime_ns == mtime
+        # changed
+        expected.write('{"version": "0.4.0"}')
+        fixture_cache.clear()
+        load_snapshot(config_file)
+        with open(get_snapshot_path(config_file), 'rb') as f:
+            snapshot = pickle.load(f)
+        assert list(snapshot['fixtures']['values'].values()) == [{'version': '0.4.0'}]
+        assert fixture_cache.load(str(expected)) == {'version': '0.4.0'}
+
+    def test_load_version(self, tmpdir):
+        config_file, expected = _write_config(tmpdir)
+        snapshot = compile_snapshot(config_file)
+        snapshot['version'] = (0, '0.0.0', (2, 7))
+        with open(get_snapshot_path(config_file), 'wb') as f:
+            pickle.dump(snapshot, f)
+        load_snapshot(config_file)
+        with open(get_snapshot_path(config_file), 'rb') as f:
+            assert pickle.load(f)['version'] != (0, '0.0.0', (2, 7))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import time
+
+# library imports
+import pytest
+import requests
+
+# local imports
+from apitestframework.core.stub_server import StubServer
+from apitestframework.core.test_run import TestRun
+from apitestframework.utils.test_status import TestStatus
+
+def _get_config(base_url: str) -> dict:
+    return {
+        'suites': [
+            {
+                'name': 'MY_SUITE',
+                'baseUrl': base_url + '/api',
+                'tests': [
+                    {
+                        'name': 'Status',
+                        'path': '/v1/status',
+                        'expected': 'config/output/goeuro-status-expected.json'
+                    },
+                    {
+                        'name': 'Search',
+                        'method': 'POST',
+                        'path': '/v1/search?lang=it',
+                        'payload': {'q': 1},
+                        'expected': 'config/output/goeuro-status-expected.json',
+                        'expected_code': 201
+                    }
+                ]
+            }
+        ]
+    }
+
+class TestStubServer(object):
+    '''
+    Test core.stub_server module
+    '''
+
+    def test_routes(self):
+        '''
+        Test answers of the stub server
+        '''
+        with pytest.raises(ValueError):
+            StubServer({}, {'inflate': 0.5})
+        stub = StubServer(_get_config('http://localhost:9093'), {'inflate': 2})
+        status, body = stub.answer('GET', '/api/v1/status')
+        assert status == 200
+        assert len(body) == 2 * len(open('config/output/goeuro-status-expected.json', 'rb').read())
+        assert stub.answer('GET', '/api/v1/status/42?x=1')[0] == 200
+        assert stub.answer('POST', '/api/v1/search')[0] == 201
+        assert stub.answer('GET', '/api/v1/search')[0] == 404
+        assert stub.served == 4
+
+    def test_run(self):
+        '''
+        Test running a Test Run against the stub server
+        '''
+        stub = StubServer(_get_config(''), {'port': 0, 'latency': 20, 'jitter': 5})
+        stub.start()
+        try:
+            tr = TestRun(_get_config(stub.url))
+            start = time.perf_counter()
+            tr.run()
+            assert time.perf_counter() - start >= 0.04
+            assert requests.get(stub.url + '/api/v1/other').status_code == 404
+        finally:
+            stub.stop()
+        assert [r.status for r in tr.suites[0].test_results.records] == [TestStatus.SUCCESS, TestStatus.SUCCESS]
+        assert stub.served == 3
+
+    def test_keep_alive(self):
+        '''
+        Test calls on a kept alive connection are not delayed
+        '''
+        stub = StubServer(_get_config(''), {'port': 0})
+        stub.start()
+        try:
+            with requests.Session() as session:
+                session.get(stub.url + '/api/v1/status')
+                start = time.perf_counter()
+                for _ in range(10):
+                    assert session.get(stub.url + '/api/v1/status').status_code == 200
+                assert time.perf_counter() - start < 0.2
+        finally:
+            stub.stop()
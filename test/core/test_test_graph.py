@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# local imports
+from apitestframework.core.test_graph import TestGraph, build_dependencies
+
+class FakeTest(object):
+    def __init__(self, name, extract_names=None, inject_names=None):
+        self.name = name
+        self.extract_names = extract_names or []
+        self.inject_names = inject_names or []
+
+class TestTestGraph(object):
+    '''
+    Test core.test_graph module
+    '''
+
+    def get_tests(self):
+        return [
+            FakeTest('status'),
+            FakeTest('search', ['solutionId']),
+            FakeTest('reservation', ['reservationId'], ['solutionId']),
+            FakeTest('booking', ['bookingId'], ['reservationId']),
+            FakeTest('delete', [], ['bookingId', 'solutionId']),
+            FakeTest('orphan', [], ['neverExtracted'])
+        ]
+
+    def test_build_dependencies(self):
+        '''
+        Test build_dependencies method
+        '''
+        deps = build_dependencies(self.get_tests())
+        assert deps == {0: set(), 1: set(), 2: {1}, 3: {2}, 4: {1, 3}, 5: set()}
+        # the closest previous producer wins
+        deps = build_dependencies([FakeTest('a', ['v']), FakeTest('b', ['v'], ['v']), FakeTest('c', [], ['v'])])
+        assert deps == {0: set(), 1: {0}, 2: {1}}
+
+    def test_ready(self):
+        '''
+        Test ready and complete methods
+        '''
+        graph = TestGraph(self.get_tests())
+        assert graph.ready() == [0, 1, 5]
+        assert graph.ready() == []
+        assert graph.pending == 3
+        graph.complete(0)
+        graph.complete(5)
+        assert graph.ready() == []
+        graph.complete(1)
+        assert graph.ready() == [2]
+        graph.complete(2)
+        assert graph.ready() == [3]
+        graph.complete(3)
+        assert graph.ready() == [4]
+        assert graph.dependencies(4) == [1, 3]
+        assert graph.pending == 0
+
+    def test_complete_failure(self):
+        '''
+        Test complete method on failure
+        '''
+        graph = TestGraph(self.get_tests())
+        graph.ready()
+        assert graph.complete(1, False) == [2, 3, 4]
+        assert graph.ready() == []
+        assert graph.pending == 0
@@ -17,11 +17,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# system imports
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 # library imports
+import pytest
 import responses
 
 # local imports
+from apitestframework.core.stub_server import StubServer
 from apitestframework.core.test_run import TestRun
+from apitestframework.utils.test_status import TestStatus
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({'version': '0.3.1', 'status': 'OK'}).encode('utf-8')
+        self.send_response(200 if self.path == '/v1/status' else 500)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
 
 class TestTestRun(object):
     '''
@@ -79,3 +99,168 @@ class TestTestRun(object):
             assert True
         else:
             assert False
+
+    def test_03(self, tmpdir):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+        runtimes = tmpdir.join('runtimes.json')
+        report = tmpdir.join('results.jsonl')
+        suites = []
+        for i, path in enumerate(['/v1/status', '/v1/status', '/v1/error']):
+            suites.append({
+                'name': 'SUITE_{}'.format(i),
+                'baseUrl': base_url,
+                'tests': [
+                    {
+                        'name': 'Status',
+                        'path': path,
+                        'expected': 'config/output/goeuro-status-expected.json'
+                    }
+                ]
+            })
+        tr = TestRun({
+            'workers': 2,
+            'runtimes': str(runtimes),
+            'reporters': [{ 'type': 'jsonl', 'file': str(report) }],
+            'suites': suites
+        })
+        try:
+            tr.run()
+        except SystemExit as e:
+            assert e.code == 1
+        else:
+            assert False
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert [list(s.test_results) for s in tr._suites] == [
+            [('Status', TestStatus.SUCCESS, {'version': '0.3.1', 'status': 'OK'})],
+            [('Status', TestStatus.SUCCESS, {'version': '0.3.1', 'status': 'OK'})],
+            [('Status', TestStatus.FAILURE, {'version': '0.3.1', 'status': 'OK'})]
+        ]
+        assert sorted(json.loads(l)['suite'] for l in report.readlines()) == ['SUITE_0', 'SUITE_1', 'SUITE_2']
+        assert sorted(json.loads(runtimes.read())) == ['SUITE_0', 'SUITE_1', 'SUITE_2']
+
+    def test_04(self):
+        tr = TestRun({
+            'shard': '2/2',
+            'suites': [
+                {
+                    'name': 'BIG',
+                    'baseUrl': 'http://localhost:9093',
+                    'tests': [
+                        {
+                            'path': '/v1/status',
+                            'expected': 'config/output/goeuro-status-expected.json'
+                        }
+                    ] * 3
+                },
+                {
+                    'name': 'SMALL',
+                    'baseUrl': 'http://localhost:9093',
+                    'tests': [
+                        {
+                            'path': '/v1/status',
+                            'expected': 'config/output/goeuro-status-expected.json'
+                        }
+                    ]
+                }
+            ]
+        })
+        assert [s.name for s in tr._suites] == ['SMALL']
+
+    def test_05(self):
+        tests = [
+            {
+                'name': 'Status_{}'.format(i),
+                'path': '/v1/status',
+                'expected': 'config/output/goeuro-status-expected.json'
+            } for i in range(4)
+        ]
+        stub = StubServer({ 'suites': [{ 'tests': tests }] }, { 'port': 0, 'latency': 200 })
+        stub.start()
+        tr = TestRun({
+            'deadline': 0.5,
+            'suites': [
+                {
+                    'name': 'SLOW',
+                    'baseUrl': stub.url,
+                    'tests': tests
+                },
+                {
+                    'name': 'LATE',
+                    'baseUrl': stub.url,
+                    'exitOnFailure': False,
+                    'tests': tests[:1] + [dict(tests[1], enabled=False)]
+                }
+            ]
+        })
+        try:
+            tr.run()
+        except SystemExit as e:
+            assert e.code == 1
+        else:
+            assert False
+        finally:
+            stub.stop()
+        assert [r.status for r in tr.suites[0].test_results.records] == [TestStatus.SUCCESS, TestStatus.SUCCESS, TestStatus.TIMEOUT, TestStatus.TIMEOUT]
+        assert [r.status for r in tr.suites[1].test_results.records] == [TestStatus.TIMEOUT, TestStatus.SKIPPED]
+        assert stub.served == 3
+
+    def test_06(self, tmpdir):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+        spill_dir = tmpdir.mkdir('spill')
+        tr = TestRun({
+            'workers': 2,
+            'resultRetention': { 'policy': 'spill', 'spillDir': str(spill_dir) },
+            'suites': [
+                {
+                    'name': 'SUITE_{}'.format(i),
+                    'baseUrl': base_url,
+                    'tests': [
+                        {
+                            'name': 'Status',
+                            'path': '/v1/status',
+                            'expected': 'config/output/goeuro-status-expected.json'
+                        }
+                    ]
+                } for i in range(2)
+            ]
+        })
+        try:
+            tr.run()
+        finally:
+            server.shutdown()
+            server.server_close()
+        # the bodies were left in the spill files of the workers, deleted after the run
+        for s in tr._suites:
+            record = s.test_results.records[0]
+            assert record.status == TestStatus.SUCCESS
+            assert record.body is None and record.offset is not None
+            assert s.test_results.spill_path is None
+        assert spill_dir.listdir() == []
+
+    def test_07(self):
+        suites = [
+            {
+                'name': 'SUITE_{}'.format(i),
+                'baseUrl': 'http://localhost:9093',
+                'tests': [
+                    {
+                        'name': 'Status',
+                        'path': '/v1/status',
+                        'expected': 'config/output/goeuro-status-expected.json'
+                    }
+                ]
+            } for i in range(2)
+        ]
+        with pytest.raises(ValueError) as pytest_wrapped_e:
+            TestRun({ 'engine': 'async', 'workers': 2, 'suites': suites })
+        assert 'async engine' in str(pytest_wrapped_e.value).lower()
+        # the tests of suites run by other processes are built only when needed
+        tr = TestRun({ 'workers': 2, 'suites': suites })
+        assert all(s._tests is None for s in tr.suites)
+        assert [t.name for t in tr.suites[0].tests] == ['Status']
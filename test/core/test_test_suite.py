@@ -181,3 +181,228 @@ class TestTestSuite(object):
         ts.run()
         assert len(ts.test_results) == 1
         assert ts.test_results[0] == ('Status', TestStatus.FAILURE, {'version': '0.3.1', 'status': 'OK'})
+
+    def test_09(self):
+        with pytest.raises(ValueError) as pytest_wrapped_e:
+            TestSuite({
+                'name': 'test test suite',
+                'baseUrl': 'http://localhost:9093',
+                'scheduler': 'random'
+            })
+        assert 'non-valid scheduler' in str(pytest_wrapped_e.value).lower()
+
+    @responses.activate
+    def test_10(self):
+        ts = TestSuite({
+            'name': 'test test suite',
+            'baseUrl': 'http://localhost:9093',
+            'scheduler': 'graph',
+            'tests': [
+                {
+                    'name': 'Status',
+                    'path': '/v1/status',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'extract': [
+                        {
+                            'name': 'version',
+                            'key': 'version'
+                        }
+                    ]
+                },
+                {
+                    'name': 'Other',
+                    'path': '/v1/other',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'enabled': False
+                },
+                {
+                    'name': 'Search',
+                    'path': '/v1/search',
+                    'expected': 'config/output/goeuro-status-expected.json'
+                },
+                {
+                    'name': 'StatusLater',
+                    'path': '/v1/status',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'inject': [
+                        {
+                            'name': 'version',
+                            'type': 'header',
+                            'key': 'injected_header'
+                        }
+                    ]
+                }
+            ]
+        })
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9093/v1/search',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        ts.run()
+        assert [(r[0], r[1]) for r in ts.test_results] == [
+            ('Status', TestStatus.SUCCESS),
+            ('Other', TestStatus.SKIPPED),
+            ('Search', TestStatus.SUCCESS),
+            ('StatusLater', TestStatus.SUCCESS)
+        ]
+        # the value reaches the consumer even if it is not the next test
+        assert ts._tests[3]._headers[0].key == 'injected_header'
+        assert ts._tests[3]._headers[0].value == '0.3.1'
+
+    @responses.activate
+    def test_11(self):
+        ts = TestSuite({
+            'name': 'test test suite',
+            'baseUrl': 'http://localhost:9093',
+            'scheduler': 'graph',
+            'exitOnFailure': False,
+            'tests': [
+                {
+                    'name': 'Status',
+                    'path': '/v1/status',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'extract': [
+                        {
+                            'name': 'version',
+                            'key': 'version'
+                        }
+                    ]
+                },
+                {
+                    'name': 'Search',
+                    'path': '/v1/search',
+                    'expected': 'config/output/goeuro-status-expected.json'
+                },
+                {
+                    'name': 'StatusNext',
+                    'path': '/v1/status',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'inject': [
+                        {
+                            'name': 'version',
+                            'type': 'query',
+                            'key': 'version'
+                        }
+                    ]
+                }
+            ]
+        })
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=500)
+        responses.add(responses.GET, 'http://localhost:9093/v1/search',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        ts.run()
+        assert [(r[0], r[1]) for r in ts.test_results] == [
+            ('Status', TestStatus.FAILURE),
+            ('Search', TestStatus.SUCCESS),
+            ('StatusNext', TestStatus.SKIPPED)
+        ]
+
+    @responses.activate
+    def test_12(self):
+        ts = TestSuite({
+            'name': 'test test suite',
+            'baseUrl': 'http://localhost:9093',
+            'exitOnFailure': False,
+            'resultRetention': {
+                'policy': 'failures'
+            },
+            'tests': [
+                {
+                    'name': 'Status',
+                    'path': '/v1/status',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'extract': [
+                        {
+                            'name': 'version',
+                            'key': 'version'
+                        }
+                    ]
+                },
+                {
+                    'name': 'StatusNext',
+                    'path': '/v1/statusnext',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'inject': [
+                        {
+                            'name': 'version',
+                            'type': 'query',
+                            'key': 'version'
+                        }
+                    ]
+                }
+            ]
+        }, {
+            'result_retention': {
+                'policy': 'spill'
+            }
+        })
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9093/v1/statusnext',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=500)
+        ts.run()
+        assert list(ts.test_results) == [
+            ('Status', TestStatus.SUCCESS, None),
+            ('StatusNext', TestStatus.FAILURE, {'version': '0.3.1', 'status': 'OK'})
+        ]
+        assert ts.test_results.records[0].size == len(responses.calls[0].response.content)
+        assert ts._tests[1]._params == {'version': '0.3.1'}
+        assert ts._tests[0]._output is None
+
+    @responses.activate
+    def test_13(self):
+        class ListReporter(object):
+            def __init__(self):
+                self.results = []
+            def test_done(self, suite, record):
+                self.results.append((suite, record.name, record.status, record.size))
+        reporter = ListReporter()
+        ts = TestSuite({
+            'name': 'test test suite',
+            'baseUrl': 'http://localhost:9093',
+            'tests': [
+                {
+                    'name': 'Status',
+                    'path': '/v1/status',
+                    'expected': 'config/output/goeuro-status-expected.json'
+                },
+                {
+                    'name': 'Other',
+                    'path': '/v1/other',
+                    'expected': 'config/output/goeuro-status-expected.json',
+                    'enabled': False
+                }
+            ]
+        }, { 'reporters': [reporter] })
+        responses.add(responses.GET, 'http://localhost:9093/v1/status',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        ts.run()
+        assert reporter.results == [
+            ('test test suite', 'Status', TestStatus.SUCCESS, 36),
+            ('test test suite', 'Other', TestStatus.SKIPPED, None)
+        ]
+
+    @responses.activate
+    def test_14(self, tmp_path):
+        dataset = tmp_path / 'rows.csv'
+        dataset.write_text('id\n1\n2\n3\n')
+        ts = TestSuite({
+            'name': 'test test suite',
+            'baseUrl': 'http://localhost:9093',
+            'tests': [
+                {
+                    'name': 'Items',
+                    'path': '/v1/items/${id}',
+                    'expected': 'config/output/status-expected.json',
+                    'dataset': str(dataset)
+                }
+            ]
+        })
+        for i in (1, 2, 3):
+            responses.add(responses.GET, 'http://localhost:9093/v1/items/{}'.format(i),
+                      json={'version': '0.0.1', 'status': 'OK'}, status=200)
+        ts.run()
+        assert len(ts.test_results) == 1
+        assert ts.test_results[0][1] == TestStatus.SUCCESS
+        assert ts.test_results[0][2]['groups']['all']['passed'] == 3
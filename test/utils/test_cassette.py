@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+import sys
+
+# library imports
+import pytest
+import responses
+
+# local imports
+import apitestframework.__main__ as main_module
+from apitestframework.core.test_run import TestRun
+from apitestframework.utils.cassette import Cassette, CassetteMissError
+from apitestframework.utils.session_pool import SessionPool
+from apitestframework.utils.test_status import TestStatus
+
+class TestCassette(object):
+    '''
+    Test utils.cassette module
+    '''
+
+    def test_settings(self, tmpdir):
+        '''
+        Test cassette settings
+        '''
+        with pytest.raises(ValueError):
+            Cassette({'mode': 'rewind', 'file': str(tmpdir.join('c.jsonl'))})
+        with pytest.raises(ValueError):
+            Cassette({'mode': 'record'})
+        assert Cassette({'file': 'c.jsonl'}).mode == 'replay'
+
+    @responses.activate
+    def test_record_replay(self, tmpdir):
+        '''
+        Test recording responses and replaying them without network
+        '''
+        path = str(tmpdir.join('c.jsonl'))
+        responses.add(responses.GET, 'http://localhost:9396/v1/status', json={'status': 'OK'}, status=200)
+        responses.add(responses.GET, 'http://localhost:9396/v1/status', json={'status': 'KO'}, status=503)
+        responses.add(responses.POST, 'http://localhost:9396/v1/search', body=b'\x00\xff', status=201)
+        recorder = Cassette({'mode': 'record', 'file': path})
+        recorder.reset()
+        pool = SessionPool(cassette=recorder)
+        session = pool.session('http://localhost:9396')
+        assert session.get('http://localhost:9396/v1/status').json() == {'status': 'OK'}
+        assert session.get('http://localhost:9396/v1/status').status_code == 503
+        r = session.post('http://localhost:9396/v1/search', json={'q': 1}, stream=True)
+        assert r.raw.read(10, decode_content=True) == b'\x00\xff'
+        pool.close()
+        assert len(open(path).readlines()) == 3
+        responses.reset()
+        pool = SessionPool(cassette=Cassette({'mode': 'replay', 'file': path}))
+        session = pool.session('http://localhost:9396')
+        r = session.get('http://localhost:9396/v1/status')
+        assert (r.status_code, r.json()) == (200, {'status': 'OK'})
+        assert r.headers['Content-Type'] == 'application/json'
+        for _ in range(2):
+            r = session.get('http://localhost:9396/v1/status')
+            assert (r.status_code, r.json()) == (503, {'status': 'KO'})
+        r = session.post('http://localhost:9396/v1/search', json={'q': 1})
+        assert (r.status_code, r.content) == (201, b'\x00\xff')
+        with pytest.raises(CassetteMissError):
+            session.post('http://localhost:9396/v1/search', json={'q': 2})
+        with pytest.raises(CassetteMissError):
+            session.get('http://localhost:9396/v1/status', params={'lang': 'it'})
+        pool.close()
+
+    def test_run(self, tmpdir):
+        '''
+        Test replaying a recorded test run
+        '''
+        path = str(tmpdir.join('c.jsonl'))
+        config = {
+            'suites': [
+                {
+                    'name': 'MY_SUITE',
+                    'baseUrl': 'http://localhost:9093',
+                    'tests': [
+                        {
+                            'name': 'Status',
+                            'path': '/v1/status',
+                            'expected': 'config/output/goeuro-status-expected.json'
+                        }
+                    ]
+                }
+            ]
+        }
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, 'http://localhost:9093/v1/status', json={'version': '0.3.1', 'status': 'OK'}, status=200)
+            TestRun(dict(config, cassette={'mode': 'record', 'file': path})).run()
+        assert json.loads(open(path).readline())['url'] == 'http://localhost:9093/v1/status'
+        tr = TestRun(dict(config, cassette={'mode': 'replay', 'file': path}))
+        tr.run()
+        assert list(tr.suites[0].test_results) == [('Status', TestStatus.SUCCESS, {'version': '0.3.1', 'status': 'OK'})]
+
+    def test_record_configs(self, tmpdir, monkeypatch):
+        '''
+        Test recording the runs of two configuration files to the same cassette
+        '''
+        path = tmpdir.join('c.jsonl')
+        path.write('{"key":"stale"}\n')
+        config_files = []
+        for name in ('status', 'search'):
+            config_file = tmpdir.join('{}.json'.format(name))
+            config_file.write(json.dumps({
+                'suites': [
+                    {
+                        'name': name,
+                        'baseUrl': 'http://localhost:9093',
+                        'tests': [
+                            {
+                                'name': name,
+                                'path': '/v1/{}'.format(name),
+                                'expected': 'config/output/goeuro-status-expected.json'
+                            }
+                        ]
+                    }
+                ]
+            }))
+            config_files.append(str(config_file))
+        monkeypatch.setattr(main_module, 'setup_logging', lambda config: None)
+        monkeypatch.setattr(sys, 'argv', ['apitestframework', '--record', str(path)] + config_files)
+        with responses.RequestsMock() as rsps:
+            for name in ('status', 'search'):
+                rsps.add(responses.GET, 'http://localhost:9093/v1/{}'.format(name), json={'version': '0.3.1', 'status': 'OK'}, status=200)
+            main_module.main()
+        # emptied once, then each configuration appended its responses
+        assert [json.loads(l)['url'] for l in path.readlines()] == ['http://localhost:9093/v1/status', 'http://localhost:9093/v1/search']
+        # each one without --record empties the file
+        c = Cassette({'mode': 'record', 'file': str(path), 'append': True})
+        c.start()
+        assert len(path.readlines()) == 2
+        Cassette({'mode': 'record', 'file': str(path)}).start()
+        assert path.read() == ''
+
+    def test_index(self, tmpdir):
+        '''
+        Test reading the keys of the recorded requests without decoding the lines
+        '''
+        path = tmpdir.join('c.jsonl')
+        path.write('{"key":"k0","body":not decoded}\n\n{"status":200,"key":"k1"}\n{"key":"k0","body":""}\n')
+        index = Cassette({'file': str(path)})._load_index()
+        assert index == {'k0': [0, 59], 'k1': [33]}
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import time
+
+# library imports
+import pytest
+
+# local imports
+from apitestframework.utils.comparison_plan import ComparisonPlan
+from apitestframework.utils.misc import build_keys_list
+
+EXPECTED = {
+    'currency': 'EUR',
+    'empty': None,
+    'solutions': [
+        {
+            'solutionId': 'VCC-2001-09400-59700-1567116000',
+            'price': 32.5,
+            'segments': [
+                {
+                    'carrier': 'ATVO Spa',
+                    'direct': True
+                }
+            ]
+        },
+        {
+            'solutionId': 'VCC-2001-09400-59700-1567118000',
+            'price': 40
+        }
+    ],
+    'money': {
+        'currency': 'EUR',
+        'price': 200
+    }
+}
+
+class TestComparisonPlan(object):
+    '''
+    Test utils.comparison_plan module
+    '''
+
+    def test_keys(self):
+        '''
+        Test keys and values properties
+        '''
+        plan = ComparisonPlan(EXPECTED)
+        assert plan.keys == build_keys_list(EXPECTED)
+        assert plan.values['solutions.0.segments.0.carrier'] == 'ATVO Spa'
+        assert 'empty' not in plan.values
+        assert ComparisonPlan({}).keys == []
+
+    def test_check(self):
+        '''
+        Test check method
+        '''
+        plan = ComparisonPlan(EXPECTED)
+        assert plan.check(EXPECTED) == []
+        result = {
+            'currency': 'USD',
+            'solutions': [
+                {
+                    'solutionId': 'VCC-2001-09400-59700-1567116000',
+                    'price': 32.5,
+                    'segments': 'none'
+                }
+            ],
+            'money': {
+                'currency': 'EUR',
+                'price': 200.0,
+                'extra': 1
+            }
+        }
+        assert plan.check(result) == [
+            ('currency', 'EUR', 'USD'),
+            ('solutions.0.segments.0.carrier', 'ATVO Spa', None),
+            ('solutions.0.segments.0.direct', True, None),
+            ('solutions.1.solutionId', 'VCC-2001-09400-59700-1567118000', None),
+            ('solutions.1.price', 40, None)
+        ]
+        assert len(plan.check(None)) == 9
+        assert len(plan.check(['EUR'])) == 9
+
+    def test_exceptions(self):
+        '''
+        Test check method with exceptions
+        '''
+        plan = ComparisonPlan(EXPECTED, [
+            { 'key': 'currency', 'type': 'ignore' },
+            { 'key': 'solutions.1.solutionId', 'type': 'exist' },
+            { 'key': 'solutions.1.solutionId', 'type': 'ignore' },
+            { 'key': 'money.price', 'type': 'exist' },
+            { 'key': 'not.expected', 'type': 'exist' }
+        ])
+        assert 'currency' in plan.keys
+        result = {
+            'solutions': EXPECTED['solutions'],
+            'money': {
+                'currency': 'EUR',
+                'price': 0
+            }
+        }
+        assert plan.check(result) == []
+        result['solutions'] = [EXPECTED['solutions'][0], { 'price': 40 }]
+        result['money'] = {
+            'currency': 'EUR',
+            'price': { 'amount': 0 }
+        }
+        assert plan.check(result) == [
+            ('solutions.1.solutionId', 'VCC-2001-09400-59700-1567118000', None),
+            ('money.price', 200, { 'amount': 0 })
+        ]
+
+    def test_wildcard_exceptions(self):
+        '''
+        Test check method with exceptions covering several keys
+        '''
+        plan = ComparisonPlan(EXPECTED, [
+            { 'key': 'solutions.0.price', 'type': 'exist' },
+            { 'key': 'solutions.*.price', 'type': 'ignore' },
+            { 'key': 'solutions.0:1.solutionId', 'type': 'exist' }
+        ])
+        result = {
+            'currency': 'EUR',
+            'solutions': [
+                { 'solutionId': 'other', 'price': { 'amount': 0 }, 'segments': EXPECTED['solutions'][0]['segments'] },
+                { 'solutionId': 'VCC-2001-09400-59700-1567118000', 'price': 1 }
+            ],
+            'money': EXPECTED['money']
+        }
+        # the first exception declared wins
+        assert plan.check(result) == [('solutions.0.price', 32.5, { 'amount': 0 })]
+
+    def test_unordered(self):
+        '''
+        Test check method with arrays matched regardless of the order
+        '''
+        plan = ComparisonPlan(EXPECTED, [
+            { 'key': 'solutions.*.solutionId', 'type': 'ignore' }
+        ], [
+            { 'key': 'solutions', 'mode': 'unordered' }
+        ])
+        result = {
+            'currency': 'EUR',
+            'solutions': [
+                { 'solutionId': 'x', 'price': 40.0, 'extra': 'not checked' },
+                { 'solutionId': 'y', 'price': 32.5, 'segments': [{ 'carrier': 'ATVO Spa', 'direct': True }] }
+            ],
+            'money': EXPECTED['money']
+        }
+        assert plan.check(result) == []
+        result['solutions'][0]['price'] = 41
+        result['solutions'].append({ 'price': 1 })
+        assert plan.check(result) == [
+            ('solutions', EXPECTED['solutions'][1], None),
+            ('solutions', None, result['solutions'][0]),
+            ('solutions', None, { 'price': 1 })
+        ]
+        result['solutions'] = { 'price': 40 }
+        assert plan.check(result) == [('solutions', EXPECTED['solutions'], { 'price': 40 })]
+
+    def test_subset(self):
+        '''
+        Test check method with arrays expected to contain some items
+        '''
+        expected = { 'ids': [3, 1, 1], 'items': [{ 'tags': ['a', 'b'] }, { 'tags': ['c'] }] }
+        plan = ComparisonPlan(expected, None, [
+            { 'key': 'ids', 'mode': 'subset' },
+            { 'key': 'items.*.tags', 'mode': 'unordered' },
+            { 'key': 'items', 'mode': 'subset' }
+        ])
+        assert plan.check({ 'ids': [1, 2, 3, 1], 'items': [{ 'tags': ['c'] }, { 'tags': ['b', 'a'] }, { 'tags': [] }] }) == []
+        assert plan.check({ 'ids': [1, 3, True], 'items': [{ 'tags': ['a', 'b', 'b'] }, { 'tags': ['c'] }] }) == [
+            ('ids', 1, None),
+            ('items', { 'tags': ['a', 'b'] }, None)
+        ]
+        with pytest.raises(ValueError):
+            ComparisonPlan(expected, None, [{ 'key': 'ids', 'mode': 'sorted' }])
+
+    def test_unordered_large(self):
+        '''
+        Test check method with large arrays matched regardless of the order
+        '''
+        n = 20000
+        expected = { 'items': [{ 'id': i, 'name': 'item {}'.format(i), 'tags': [i % 3, i % 5] } for i in range(n)] }
+        plan = ComparisonPlan(expected, None, [{ 'key': 'items', 'mode': 'unordered' }])
+        result = { 'items': list(reversed(expected['items'])) }
+        start = time.perf_counter()
+        assert plan.check(result) == []
+        assert time.perf_counter() - start < 5
+        result['items'][0] = { 'id': -1 }
+        assert len(plan.check(result)) == 2
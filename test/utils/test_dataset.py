@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import types
+
+# library imports
+import pytest
+
+# local imports
+from apitestframework.utils.dataset import get_dataset_format, has_placeholders, iter_rows, render
+
+class TestDataset(object):
+    '''
+    Test utils.dataset module
+    '''
+
+    def test_format(self):
+        '''
+        Test the dataset format from the file extension
+        '''
+        assert get_dataset_format('rows.csv') == 'csv'
+        assert get_dataset_format('rows.JSONL') == 'jsonl'
+        assert get_dataset_format('rows.ndjson') == 'jsonl'
+        assert get_dataset_format('rows.txt', 'csv') == 'csv'
+        with pytest.raises(ValueError):
+            get_dataset_format('rows.txt')
+        with pytest.raises(ValueError):
+            get_dataset_format('rows.csv', 'xml')
+
+    def test_iter_csv(self, tmp_path):
+        '''
+        Test reading the rows of a CSV file
+        '''
+        path = tmp_path / 'rows.csv'
+        path.write_text('id,name\n1,first\n2,"second, quoted"\n')
+        rows = iter_rows(str(path))
+        assert isinstance(rows, types.GeneratorType)
+        assert next(rows) == {'id': '1', 'name': 'first'}
+        assert list(rows) == [{'id': '2', 'name': 'second, quoted'}]
+
+    def test_iter_jsonl(self, tmp_path):
+        '''
+        Test reading the rows of a JSON Lines file
+        '''
+        path = tmp_path / 'rows.jsonl'
+        path.write_text('{"id": 1, "tags": ["a"]}\n\n{"id": 2, "tags": []}\n')
+        assert list(iter_rows(str(path))) == [{'id': 1, 'tags': ['a']}, {'id': 2, 'tags': []}]
+        path.write_text('{"id": 1}\n[2]\n')
+        with pytest.raises(ValueError) as e:
+            list(iter_rows(str(path)))
+        assert 'line 2' in str(e.value)
+
+    def test_render(self):
+        '''
+        Test filling in placeholders with row values
+        '''
+        row = {'id': 7, 'name': 'x', 'tags': ['a', 'b']}
+        assert render('/items/${id}', row) == '/items/7'
+        assert render('${id}', row) == 7
+        assert render({'q': ['${name}', '${tags}'], 'n': 3}, row) == {'q': ['x', ['a', 'b']], 'n': 3}
+        assert render('no placeholders', row) == 'no placeholders'
+        with pytest.raises(KeyError) as e:
+            render('/items/${missing}', row)
+        assert 'missing' in str(e.value)
+        assert has_placeholders({'a': [1, '/items/${id}']})
+        assert not has_placeholders({'a': [1, '/items/7']})
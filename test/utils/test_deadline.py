@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import time
+
+# library imports
+import pytest
+
+# local imports
+from apitestframework.utils.deadline import MIN_TIMEOUT, Deadline
+
+class TestDeadline(object):
+    '''
+    Test utils.deadline module
+    '''
+
+    def test_no_deadline(self):
+        '''
+        Test a run without deadline
+        '''
+        d = Deadline()
+        d.start()
+        assert d.remaining() is None
+        assert not d.expired
+        assert d.clamp((None, None)) is None
+        assert d.clamp((1, None)) == (1, None)
+
+    def test_deadline(self):
+        '''
+        Test clamping timeouts to the deadline
+        '''
+        with pytest.raises(ValueError):
+            Deadline(0)
+        d = Deadline(0.2)
+        # not started yet
+        assert d.remaining() is None
+        d.start()
+        assert 0 < d.remaining() <= 0.2
+        connect, read = d.clamp((0.01, None))
+        assert connect == 0.01
+        assert 0 < read <= 0.2
+        time.sleep(0.2)
+        assert d.expired
+        assert d.clamp((5, 5)) == (MIN_TIMEOUT, MIN_TIMEOUT)
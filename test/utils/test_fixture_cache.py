@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import copy
+import os
+import pickle
+
+# library imports
+import pytest
+
+# local imports
+from apitestframework.utils.fixture_cache import FixtureCache, FrozenDict, FrozenList, freeze
+
+class TestFixtureCache(object):
+    '''
+    Test utils.fixture_cache module
+    '''
+
+    def test_freeze(self):
+        '''
+        Test freeze function
+        '''
+        value = freeze({'a': [1, {'b': 2}], 'c': 'd'})
+        assert value == {'a': [1, {'b': 2}], 'c': 'd'}
+        assert isinstance(value, FrozenDict)
+        assert isinstance(value['a'], FrozenList)
+        assert isinstance(value['a'][1], FrozenDict)
+        with pytest.raises(TypeError):
+            value['c'] = 'e'
+        with pytest.raises(TypeError):
+            value.update({'c': 'e'})
+        with pytest.raises(TypeError):
+            value['a'].append(3)
+        with pytest.raises(TypeError):
+            value['a'][1]['b'] = 3
+        # copies are frozen too
+        assert pickle.loads(pickle.dumps(value)) == value
+        assert isinstance(copy.deepcopy(value)['a'], FrozenList)
+
+    def test_load(self, tmpdir):
+        '''
+        Test load method
+        '''
+        cache = FixtureCache()
+        f0 = tmpdir.join('f0.json')
+        f0.write('{"version": "0.3.1", "list": [1, 2]}')
+        f1 = tmpdir.join('f1.json')
+        f1.write('{"version": "0.3.1", "list": [1, 2]}')
+        v0 = cache.load(str(f0))
+        assert v0 == {'version': '0.3.1', 'list': [1, 2]}
+        assert cache.load(str(f0)) is v0
+        assert cache.load(os.path.join(str(tmpdir), '.', 'f0.json')) is v0
+        # same content, same value
+        assert cache.load(str(f1)) is v0
+        assert len(cache) == 1
+        # changed file
+        f0.write('{"version": "0.4.0"}')
+        os.utime(str(f0), ns=(0, 0))
+        assert cache.load(str(f0)) == {'version': '0.4.0'}
+        assert cache.load(str(f1)) is v0
+        assert len(cache) == 2
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_plan(self, tmpdir):
+        '''
+        Test plan method
+        '''
+        cache = FixtureCache()
+        f0 = tmpdir.join('f0.json')
+        f0.write('{"version": "0.3.1", "status": "OK"}')
+        exceptions = [{'key': 'status', 'type': 'ignore'}]
+        p0 = cache.plan(str(f0))
+        assert cache.plan(str(f0)) is p0
+        assert cache.plan(str(f0), []) is p0
+        p1 = cache.plan(str(f0), exceptions)
+        assert p1 is not p0
+        assert cache.plan(str(f0), list(exceptions)) is p1
+        assert p0.check({'version': '0.3.1', 'status': 'KO'}) == [('status', 'OK', 'KO')]
+        assert p1.check({'version': '0.3.1', 'status': 'KO'}) == []
+
+    def test_read(self, tmpdir):
+        '''
+        Test read method
+        '''
+        cache = FixtureCache()
+        f0 = tmpdir.join('f0.json')
+        f0.write('{"version": "0.3.1", "status": "OK"}')
+        exceptions = [{'key': 'status', 'type': 'ignore'}]
+        v0, p0 = cache.read(str(f0), exceptions)
+        assert v0 == {'version': '0.3.1', 'status': 'OK'}
+        assert isinstance(v0, FrozenDict)
+        assert p0.check({'version': '0.3.1', 'status': 'KO'}) == []
+        assert len(cache) == 0
+        # cached files are shared
+        v1 = cache.load(str(f0))
+        assert cache.read(str(f0), exceptions) == (v1, cache.plan(str(f0), exceptions))
+        assert cache.read(str(f0))[0] is v1
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+import math
+
+# library imports
+import pytest
+import requests
+
+# local imports
+from apitestframework.utils.json_codec import BACKENDS, JsonCodec, json_codec, msgspec, orjson
+
+# backends installed here
+INSTALLED = [b for b in BACKENDS if b == 'json' or {'orjson': orjson, 'msgspec': msgspec}[b] is not None]
+# documents whose numbers the fast backends reject or round
+EDGE_DOCUMENTS = [
+    '{"id": 123456789012345678901234567890}',
+    '[-9223372036854775809, 18446744073709551616]',
+    '[1e400, -1e400]',
+    '[1.0000000000000000000001, -0.0, -0]',
+    '{"a": 1, "a": 2}',
+    '"\\ud800"'
+]
+
+def _response(content: bytes, encoding: str) -> requests.Response:
+    r = requests.Response()
+    r._content = content
+    r.encoding = encoding
+    return r
+
+class TestJsonCodec(object):
+    '''
+    Test utils.json_codec module
+    '''
+
+    def test_backend(self):
+        '''
+        Test choosing the backend
+        '''
+        assert json_codec.backend == INSTALLED[0]
+        assert JsonCodec('json').backend == 'json'
+        with pytest.raises(ValueError):
+            JsonCodec('simplejson')
+
+    @pytest.mark.parametrize('backend', INSTALLED)
+    def test_same_numbers(self, backend):
+        '''
+        Test that every backend decodes numbers like the json module
+        '''
+        codec = JsonCodec(backend)
+        for doc in EDGE_DOCUMENTS:
+            assert repr(codec.loads(doc)) == repr(json.loads(doc))
+            assert repr(codec.loads(doc.encode('utf-8'))) == repr(json.loads(doc))
+            assert repr(codec.loads_response(_response(doc.encode('utf-8'), 'utf-8'))) == repr(json.loads(doc))
+        assert math.isnan(codec.loads('NaN'))
+
+    @pytest.mark.parametrize('backend', INSTALLED)
+    def test_errors(self, backend):
+        '''
+        Test that every backend raises the errors of the json module
+        '''
+        codec = JsonCodec(backend)
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads(b'{"a": ')
+        # byte order marks are rejected, as when reading the file as UTF-8 text
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads(b'\xef\xbb\xbf{}')
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads_response(_response(b'<html></html>', 'utf-8'))
+        # other encodings go through requests
+        assert codec.loads_response(_response('{"a": "è"}'.encode('latin-1'), 'ISO-8859-1')) == {'a': 'è'}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# local imports
+from apitestframework.utils.comparison_plan import ComparisonPlan
+from apitestframework.utils.json_diff import CHANGED, EXTRA, MISSING, TYPE_CHANGED, diff_mismatches, diff_result
+
+class TestJsonDiff(object):
+    '''
+    Test utils.json_diff module
+    '''
+
+    def test_kinds(self):
+        '''
+        Test the kinds of differences
+        '''
+        expected = {'a': 1, 'b': 'x', 'c': None, 'd': 'y', 'items': [1, 2]}
+        plan = ComparisonPlan(expected, None, [{'key': 'items', 'mode': 'unordered'}])
+        diff = diff_result(plan, {'a': 2, 'b': {'k': 'v'}, 'c': None, 'items': [1, 3]})
+        assert diff.count == 5
+        assert diff.complete
+        assert [(e.kind, e.path) for e in diff.entries] == [
+            (CHANGED, 'a'), (TYPE_CHANGED, 'b'), (MISSING, 'd'), (MISSING, 'items'), (EXTRA, 'items')
+        ]
+        assert diff.to_list()[1] == {'kind': TYPE_CHANGED, 'path': 'b', 'expected': 'x', 'actual': {'k': 'v'}, 'expectedType': 'string', 'actualType': 'object'}
+        # null instead of a value
+        diff = diff_result(plan, {'a': 1, 'b': 'x', 'd': None, 'items': [1, 2]})
+        assert [(e.kind, e.path) for e in diff.entries] == [(TYPE_CHANGED, 'd')]
+        assert len(diff_result(plan, expected)) == 0
+
+    def test_limits(self):
+        '''
+        Test the maximum number of differences and length of values
+        '''
+        expected = {'k{}'.format(i): i for i in range(50)}
+        plan = ComparisonPlan(expected)
+        actual = {'k{}'.format(i): 'v' * 100 for i in range(50)}
+        diff = diff_result(plan, actual, {'maxEntries': 5, 'maxValueLength': 10})
+        assert diff.count == 50
+        assert diff.complete
+        assert len(diff.entries) == 5
+        assert diff.entries[0].actual == 'v' * 10 + '...'
+        text = str(diff)
+        assert text.startswith('50 differences, first 5 shown')
+        assert len(text.splitlines()) == 6
+        # fail fast: stop at the maximum number of differences
+        diff = diff_result(plan, actual, {'maxEntries': 5}, fail_fast=True)
+        assert diff.count == 5
+        assert not diff.complete
+        assert str(diff).startswith('5+ differences')
+        # large values keep their first items only
+        diff = diff_mismatches([('a', 1, list(range(1000)))], 1)
+        assert diff.entries[0].actual == list(range(10)) + ['...990 more items']
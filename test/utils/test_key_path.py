@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# local imports
+from apitestframework.utils.key_path import KeyPath, compile_key
+
+DATA = {
+    'currency': 'EUR',
+    '10': 'ten',
+    'solutions': [
+        { 'id': 'a', 'segments': [{ 'carrier': 'x' }, { 'carrier': 'y' }] },
+        { 'id': 'b', 'segments': [] },
+        { 'id': 'c' }
+    ]
+}
+
+class TestKeyPath(object):
+    '''
+    Test utils.key_path module
+    '''
+
+    def test_parse(self):
+        '''
+        Test key parsing
+        '''
+        kp = KeyPath('solutions.*.segments.1:3.carrier')
+        assert kp.key == 'solutions.*.segments.1:3.carrier'
+        assert kp.segments == ('solutions', slice(None), 'segments', slice(1, 3), 'carrier')
+        assert kp.wildcard == True
+        assert KeyPath('solutions.0.id').segments == ('solutions', 0, 'id')
+        assert KeyPath('solutions.0.id').wildcard == False
+        assert KeyPath('times.10:30').segments == ('times', slice(10, 30))
+        assert KeyPath('times.a:b').segments == ('times', 'a:b')
+        assert compile_key('solutions.0.id') is compile_key('solutions.0.id')
+
+    def test_get(self):
+        '''
+        Test get method
+        '''
+        assert KeyPath('currency').get(DATA) == 'EUR'
+        assert KeyPath('10').get(DATA) == 'ten'
+        assert KeyPath('solutions.1.id').get(DATA) == 'b'
+        assert KeyPath('solutions.-1.id').get(DATA) == 'c'
+        assert KeyPath('solutions.3.id').get(DATA) is None
+        assert KeyPath('solutions.id').get(DATA) is None
+        assert KeyPath('currency.code').get(DATA) is None
+        assert KeyPath('solutions.*.id').get(DATA) == ['a', 'b', 'c']
+        assert KeyPath('solutions.1:.id').get(DATA) == ['b', 'c']
+        assert KeyPath('solutions.*.segments.*.carrier').get(DATA) == ['x', 'y']
+        assert KeyPath('solutions.0.segments.:1.carrier').get(DATA) == ['x']
+        assert KeyPath('*').get({ 'a': 1, 'b': 2 }) == [1, 2]
+        assert KeyPath('solutions.*.missing').get(DATA) == []
+
+    def test_find(self):
+        '''
+        Test find method
+        '''
+        assert list(KeyPath('solutions.*.segments.*.carrier').find(DATA)) == [
+            (('solutions', 0, 'segments', 0, 'carrier'), 'x'),
+            (('solutions', 0, 'segments', 1, 'carrier'), 'y')
+        ]
+        assert list(KeyPath('solutions.0.id').find(DATA)) == [(('solutions', 0, 'id'), 'a')]
+
+    def test_set(self):
+        '''
+        Test set method
+        '''
+        data = { 'a': { 'b': [1, 2, 3] }, 'c': [{ 'd': 1 }, { 'd': 2 }] }
+        KeyPath('a.b.1').set(data, 20)
+        assert data['a']['b'] == [1, 20, 3]
+        KeyPath('a.b.5').set(data, 50)
+        assert data['a']['b'] == [1, 20, 3]
+        KeyPath('a.e').set(data, 'e')
+        assert data['a']['e'] == 'e'
+        KeyPath('x.y').set(data, 'y')
+        assert 'x' not in data
+        KeyPath('c.*.d').set(data, 0)
+        assert data['c'] == [{ 'd': 0 }, { 'd': 0 }]
+        KeyPath('a.b.0:2').set(data, 9)
+        assert data['a']['b'] == [9, 9, 3]
+        KeyPath('a.e.f').set(data, 'f')
+        assert data['a']['e'] == 'e'
+
+    def test_matches(self):
+        '''
+        Test matches method
+        '''
+        kp = KeyPath('solutions.*.segments.1:3.carrier')
+        assert kp.matches(('solutions', 0, 'segments', 1, 'carrier')) == True
+        assert kp.matches(('solutions', 7, 'segments', 2, 'carrier')) == True
+        assert kp.matches(('solutions', 7, 'segments', 3, 'carrier')) == False
+        assert kp.matches(('solutions', 7, 'segments', 0, 'carrier')) == False
+        assert kp.matches(('solutions', 7, 'segments', 1)) == False
+        assert kp.matches(('solutions', 'x', 'segments', 1, 'carrier')) == True
+        assert KeyPath('a.0').matches(('a', '0')) == True
+        assert KeyPath('a.0').matches(('a', 0)) == True
+        assert KeyPath('a.b').matches(('a', 'c')) == False
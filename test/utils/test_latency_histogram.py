@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import random
+
+# local imports
+from apitestframework.utils.latency_histogram import MAX_VALUE, LatencyHistogram, _index, _value
+
+class TestLatencyHistogram(object):
+    '''
+    Test utils.latency_histogram module
+    '''
+
+    def test_buckets(self):
+        '''
+        Test bucket boundaries
+        '''
+        for v in list(range(0, 5000)) + [123456, 98765432, MAX_VALUE]:
+            i = _index(v)
+            assert _value(i) >= v
+            assert v == 0 or _value(i - 1) < v
+            # relative precision better than 1%
+            assert _value(i) - v <= v / 100
+
+    def test_percentile(self):
+        '''
+        Test percentile method
+        '''
+        h = LatencyHistogram()
+        assert h.percentile(50) == 0.0
+        rnd = random.Random(42)
+        values = sorted(rnd.expovariate(20) for _ in range(20000))
+        for v in values:
+            h.record(v)
+        assert h.count == 20000
+        for p in [50, 90, 99, 99.9]:
+            exact = values[int(len(values) * p / 100) - 1]
+            assert abs(h.percentile(p) - exact) <= exact / 100 + 0.000001
+        assert h.max == int(values[-1] * 1000000) / 1000000.0
+        assert h.percentile(100) == h.max
+        assert abs(h.mean - sum(values) / len(values)) < 0.001
+
+    def test_merge(self):
+        '''
+        Test merge method
+        '''
+        h0 = LatencyHistogram()
+        h1 = LatencyHistogram()
+        h0.record(0.001)
+        h1.record(0.5)
+        h1.record(7200)
+        h0.merge(h1)
+        assert h0.count == 3
+        assert h0.min == 0.001
+        assert h0.max == MAX_VALUE / 1000000.0
+        assert abs(h0.percentile(50) - 0.5) <= 0.005
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import logging
+import time
+
+# local imports
+from apitestframework.utils.log_utils import BODY_LOG_LENGTH, LogBody, set_body_log_length, start_log_listener
+
+class Collector(logging.Handler):
+    '''
+    Handler keeping the messages of the records
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+class Rendered(object):
+    '''
+    Value counting how many times it is converted to text
+    '''
+
+    def __init__(self):
+        self.count = 0
+
+    def __repr__(self):
+        self.count += 1
+        return 'rendered'
+
+class TestLogUtils(object):
+    '''
+    Test utils.log_utils module
+    '''
+
+    def test_log_body(self):
+        '''
+        Test truncating bodies
+        '''
+        set_body_log_length(50)
+        try:
+            assert str(LogBody({'a': 1})) == "{'a': 1}"
+            text = str(LogBody({'items': list(range(100000))}))
+            assert text.startswith("{'items': [0, 1, 2")
+            assert len(text) < 100
+            assert str(LogBody('x' * 100)) == 'x' * 50 + '... (truncated, 100 characters)'
+            # whole bodies
+            set_body_log_length(0)
+            assert str(LogBody('x' * 100)) == 'x' * 100
+        finally:
+            set_body_log_length(BODY_LOG_LENGTH)
+
+    def test_lazy(self):
+        '''
+        Test that bodies are converted to text only when the record is written
+        '''
+        logger = logging.getLogger('test_log_utils.lazy')
+        logger.setLevel(logging.INFO)
+        value = Rendered()
+        logger.debug('body :: %s', LogBody([value]))
+        assert value.count == 0
+
+    def test_listener(self):
+        '''
+        Test writing records on a background thread
+        '''
+        collector = Collector()
+        logger = logging.getLogger('test_log_utils.listener')
+        logger.propagate = False
+        logger.addHandler(start_log_listener([collector]))
+        logger.warning('Test %s failed', 'one')
+        for _ in range(100):
+            if len(collector.messages) > 0:
+                break
+            time.sleep(0.01)
+        assert collector.messages == ['Test one failed']
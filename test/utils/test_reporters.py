@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+import xml.etree.ElementTree as ET
+
+# library imports
+import pytest
+
+# local imports
+from apitestframework.utils.json_diff import diff_mismatches
+from apitestframework.utils.reporters import JsonLinesReporter, JUnitReporter, PrometheusReporter, Reporter, get_reporters
+from apitestframework.utils.result_store import ResultRecord
+from apitestframework.utils.test_status import TestStatus
+
+RECORDS = [
+    ('s0', ResultRecord('t0', TestStatus.SUCCESS, 0.25, 35, timings={'ttfb': 0.2}, index=(0, 0))),
+    ('s0', ResultRecord('t1', TestStatus.FAILURE, 0.5, 12, index=(0, 1))),
+    ('s1', ResultRecord('t "2"', TestStatus.SKIPPED, index=(1, 0)))
+]
+
+class DummyReporter(Reporter):
+    def test_done(self, suite, record):
+        pass
+
+class TestReporters(object):
+    '''
+    Test utils.reporters module
+    '''
+
+    def test_get_reporters(self, tmpdir):
+        '''
+        Test get_reporters function
+        '''
+        reporters = get_reporters([
+            { 'type': 'junit', 'file': str(tmpdir.join('r.xml')) },
+            { 'type': 'jsonl', 'file': str(tmpdir.join('r.jsonl')) },
+            { 'type': 'prometheus', 'file': str(tmpdir.join('r.prom')) },
+            { 'type': '{}:DummyReporter'.format(DummyReporter.__module__) }
+        ])
+        assert [type(r).__name__ for r in reporters] == ['JUnitReporter', 'JsonLinesReporter', 'PrometheusReporter', 'DummyReporter']
+        assert get_reporters(None) == []
+        with pytest.raises(ValueError):
+            get_reporters([{ 'type': 'html' }])
+        with pytest.raises(ValueError):
+            get_reporters([{ 'type': 'junit' }])
+
+    def test_jsonl(self, tmpdir):
+        '''
+        Test JSON Lines reporter
+        '''
+        path = tmpdir.join('out', 'r.jsonl')
+        reporter = JsonLinesReporter({ 'file': str(path) })
+        reporter.test_done(*RECORDS[0])
+        # written before the end of the run
+        assert len(path.readlines()) == 1
+        reporter.test_done(*RECORDS[1])
+        reporter.test_done(*RECORDS[2])
+        reporter.close()
+        lines = [json.loads(l) for l in path.readlines()]
+        assert [(l['suite'], l['test'], l['status']) for l in lines] == [('s0', 't0', 'SUCCESS'), ('s0', 't1', 'FAILURE'), ('s1', 't "2"', 'SKIPPED')]
+        assert lines[0]['elapsed'] == 0.25
+        assert lines[0]['bytes'] == 35
+        assert lines[0]['timings'] == {'ttfb': 0.2}
+
+    def test_junit(self, tmpdir):
+        '''
+        Test JUnit XML reporter
+        '''
+        path = tmpdir.join('r.xml')
+        reporter = JUnitReporter({ 'file': str(path) })
+        reporter.test_done(*RECORDS[0])
+        # the report is complete after each test
+        assert len(ET.parse(str(path)).getroot().findall('testsuite/testcase')) == 1
+        reporter.test_done(*RECORDS[1])
+        reporter.test_done(*RECORDS[2])
+        reporter.test_done(*RECORDS[0])
+        reporter.close()
+        root = ET.parse(str(path)).getroot()
+        assert [s.get('name') for s in root.findall('testsuite')] == ['s0', 's1', 's0']
+        cases = root.findall('testsuite/testcase')
+        assert [c.get('name') for c in cases] == ['t0', 't1', 't "2"', 't0']
+        assert cases[0].get('time') == '0.250000'
+        assert cases[0].find('properties/property').get('value') == '35'
+        assert cases[1].find('failure') is not None
+        assert cases[2].find('skipped') is not None
+
+    def test_diff(self, tmpdir):
+        '''
+        Test reporting the differences of a failed content check
+        '''
+        diff = diff_mismatches([('a', 1, 2)], 1)
+        record = ResultRecord('t1', TestStatus.FAILURE, 0.1, 10, diff=diff)
+        jsonl = JsonLinesReporter({ 'file': str(tmpdir.join('r.jsonl')) })
+        jsonl.test_done('s0', record)
+        jsonl.close()
+        assert json.loads(tmpdir.join('r.jsonl').read())['diff'] == [{'kind': 'changed', 'path': 'a', 'expected': 1, 'actual': 2}]
+        junit = JUnitReporter({ 'file': str(tmpdir.join('r.xml')) })
+        junit.test_done('s0', record)
+        junit.close()
+        failure = ET.parse(str(tmpdir.join('r.xml'))).getroot().find('testsuite/testcase/failure')
+        assert failure.get('message') == 'Content check failed: 1 differences'
+        assert 'changed a: 1 -> 2' in failure.text
+
+    def test_prometheus(self, tmpdir):
+        '''
+        Test Prometheus textfile reporter
+        '''
+        path = tmpdir.join('r.prom')
+        reporter = PrometheusReporter({ 'file': str(path), 'flushInterval': 3600 })
+        reporter.test_done(*RECORDS[0])
+        reporter.test_done(*RECORDS[1])
+        # second result within the flush interval
+        assert 't1' not in path.read()
+        reporter.test_done(*RECORDS[2])
+        reporter.close()
+        text = path.read()
+        assert 'apitest_success{suite="s0",test="t0"} 1\n' in text
+        assert 'apitest_success{suite="s0",test="t1"} 0\n' in text
+        assert 'apitest_success{suite="s1",test="t \\"2\\""} -1\n' in text
+        assert 'apitest_duration_seconds{suite="s0",test="t1"} 0.500000\n' in text
+        assert 'apitest_response_bytes{suite="s0",test="t0"} 35\n' in text
+        assert len(tmpdir.listdir()) == 1
+
+    def test_prometheus_same_name(self, tmpdir):
+        '''
+        Test Prometheus textfile reporter with suites and tests sharing a name
+        '''
+        path = tmpdir.join('r.prom')
+        reporter = PrometheusReporter({ 'file': str(path) })
+        # finishing out of order
+        reporter.test_done('s0', ResultRecord('t0', TestStatus.FAILURE, 0.5, index=(0, 1)))
+        reporter.test_done('s0', ResultRecord('t0', TestStatus.SUCCESS, 0.25, index=(0, 0)))
+        reporter.test_done('s0', ResultRecord('t0', TestStatus.SUCCESS, 0.75, index=(1, 0)))
+        reporter.close()
+        text = path.read()
+        assert 'apitest_success{suite="s0",test="t0"} 1\n' in text
+        assert 'apitest_success{suite="s0",test="t0#2"} 0\n' in text
+        assert 'apitest_duration_seconds{suite="s0",test="t0#3"} 0.750000\n' in text
+        assert text.count('apitest_success{') == 3
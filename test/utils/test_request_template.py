@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+
+# library imports
+import requests
+
+# local imports
+from apitestframework.utils.header import Header
+from apitestframework.utils.request_template import RequestTemplate
+
+class TestRequestTemplate(object):
+    '''
+    Test utils.request_template module
+    '''
+
+    def test_reuse(self):
+        '''
+        Test that an unchanged request is prepared once
+        '''
+        session = requests.Session()
+        rt = RequestTemplate('POST', [Header('X-Id', {'value': '1'}), Header('X-Hidden', {'value': '2', 'hide': True})])
+        payload = {'id': 1}
+        p1, s1 = rt.prepare(session, 'http://localhost:9396/a', {'q': 1}, payload, True)
+        assert p1.url == 'http://localhost:9396/a?q=1'
+        assert json.loads(p1.body) == payload
+        assert p1.headers['X-Id'] == '1'
+        assert 'X-Hidden' not in p1.headers
+        p2, s2 = rt.prepare(session, 'http://localhost:9396/a', {'q': 1}, payload, True)
+        assert p2 is p1
+        # settings are copied, so that each call can set its own timeout
+        assert s2 == s1 and s2 is not s1
+        # a new session prepares the request again
+        p3, _ = rt.prepare(requests.Session(), 'http://localhost:9396/a', {'q': 1}, payload, True)
+        assert p3 is not p1
+
+    def test_patch(self):
+        '''
+        Test patching the fields changed by injected values
+        '''
+        session = requests.Session()
+        header = Header('Authorization', {'value': 'Bearer {}', 'placeholder': '{}'})
+        rt = RequestTemplate('POST', [header])
+        payload = {'id': 1}
+        params = {'q': 1}
+        p, _ = rt.prepare(session, 'http://localhost:9396/a', params, payload, True)
+        body = p.body
+        # body is serialized again only when marked as changed
+        payload['id'] = 2
+        p, _ = rt.prepare(session, 'http://localhost:9396/a', params, payload, True)
+        assert p.body is body
+        rt.body_changed()
+        p, _ = rt.prepare(session, 'http://localhost:9396/a', params, payload, True)
+        assert json.loads(p.body) == {'id': 2}
+        assert p.headers['Content-Length'] == str(len(p.body))
+        # URL: path compared, parameters marked as changed
+        params['q'] = 2
+        rt.url_changed()
+        p, _ = rt.prepare(session, 'http://localhost:9396/a/b', params, payload, True)
+        assert p.url == 'http://localhost:9396/a/b?q=2'
+        # headers changed by any test sharing them
+        header.value = 'token'
+        p, _ = rt.prepare(session, 'http://localhost:9396/a/b', params, payload, True)
+        assert p.headers['Authorization'] == 'Bearer token'
+
+    def test_cookies(self):
+        '''
+        Test that sessions holding cookies always get a full prepare
+        '''
+        session = requests.Session()
+        rt = RequestTemplate('GET', [])
+        p1, _ = rt.prepare(session, 'http://localhost:9396/a', None, None, True)
+        session.cookies.set('sid', 'abc')
+        p2, _ = rt.prepare(session, 'http://localhost:9396/a', None, None, True)
+        assert p2 is not p1
+        assert p2.headers['Cookie'] == 'sid=abc'
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import os
+
+# library imports
+import pytest
+
+# local imports
+from apitestframework.utils.result_store import ResultStore
+from apitestframework.utils.test_status import TestStatus
+
+BODY = {'version': '0.3.1', 'status': 'OK'}
+
+class TestResultStore(object):
+    '''
+    Test utils.result_store module
+    '''
+
+    def test_all(self):
+        '''
+        Test default policy
+        '''
+        rs = ResultStore()
+        rs.add('t0', TestStatus.SUCCESS, BODY, 0.1, 35)
+        rs.add('t1', TestStatus.SKIPPED)
+        assert len(rs) == 2
+        assert rs[0] == ('t0', TestStatus.SUCCESS, BODY)
+        assert list(rs) == [('t0', TestStatus.SUCCESS, BODY), ('t1', TestStatus.SKIPPED, None)]
+        assert rs.records[0].elapsed == 0.1
+        assert rs.records[0].size == 35
+        rs.clear()
+        assert len(rs) == 0
+
+    def test_failures(self):
+        '''
+        Test "failures" policy
+        '''
+        rs = ResultStore({ 'policy': 'failures' })
+        rs.add('t0', TestStatus.SUCCESS, BODY)
+        rs.add('t1', TestStatus.FAILURE, BODY)
+        assert list(rs) == [('t0', TestStatus.SUCCESS, None), ('t1', TestStatus.FAILURE, BODY)]
+
+    def test_truncate(self):
+        '''
+        Test "truncate" policy
+        '''
+        rs = ResultStore({ 'policy': 'truncate', 'maxBodyLength': 10 })
+        rs.add('t0', TestStatus.SUCCESS, BODY)
+        rs.add('t1', TestStatus.SUCCESS, 'short')
+        assert rs[0][2] == '{"version"...'
+        assert rs[1][2] == 'short'
+
+    def test_spill(self, tmpdir):
+        '''
+        Test "spill" policy
+        '''
+        rs = ResultStore({ 'policy': 'spill', 'spillDir': str(tmpdir) })
+        rs.add('t0', TestStatus.SUCCESS, BODY)
+        rs.add('t1', TestStatus.FAILURE, 'not json è')
+        rs.add('t2', TestStatus.SKIPPED)
+        assert rs.records[0].body is None
+        assert rs.records[1].offset > 0
+        rs.close()
+        assert list(rs) == [('t0', TestStatus.SUCCESS, BODY), ('t1', TestStatus.FAILURE, 'not json è'), ('t2', TestStatus.SKIPPED, None)]
+        assert os.path.dirname(rs.spill_path) == str(tmpdir)
+        with open(rs.spill_path, 'r', encoding='utf-8') as f:
+            assert len(f.readlines()) == 2
+
+    def test_adopt(self, tmpdir):
+        '''
+        Test taking over the records and the spill file of another store
+        '''
+        other = ResultStore({ 'policy': 'spill', 'spillDir': str(tmpdir) })
+        other.add('t0', TestStatus.SUCCESS, BODY)
+        other.close()
+        rs = ResultStore({ 'policy': 'spill' })
+        rs.adopt(other.records, other.spill_path)
+        assert rs.spill_path == other.spill_path
+        assert list(rs) == [('t0', TestStatus.SUCCESS, BODY)]
+        with pytest.raises(ValueError):
+            rs.adopt([], other.spill_path)
+
+    def test_discard(self, tmpdir):
+        '''
+        Test deleting the spill file
+        '''
+        rs = ResultStore({ 'policy': 'spill', 'spillDir': str(tmpdir) })
+        rs.discard()
+        rs.add('t0', TestStatus.SUCCESS, BODY)
+        rs.discard()
+        assert rs.spill_path is None
+        assert tmpdir.listdir() == []
+
+    def test_policy(self):
+        '''
+        Test non-valid policy
+        '''
+        with pytest.raises(ValueError) as pytest_wrapped_e:
+            ResultStore({ 'policy': 'nothing' })
+        assert 'non-valid result retention policy' in str(pytest_wrapped_e.value).lower()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import io
+import time
+from email.utils import formatdate
+
+# library imports
+import pytest
+import requests
+
+# local imports
+from apitestframework.utils.retry_policy import HedgePolicy, LatencyTracker, RetryPolicy, latency_tracker, parse_retry_after
+
+def _response(status: int, retry_after: str = None) -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    if retry_after is not None:
+        r.headers['Retry-After'] = retry_after
+    return r
+
+class TestRetryPolicy(object):
+    '''
+    Test utils.retry_policy module
+    '''
+
+    def test_should_retry(self):
+        '''
+        Test should_retry method
+        '''
+        assert not RetryPolicy().should_retry('GET', 1, _response(503))
+        with pytest.raises(ValueError):
+            RetryPolicy({'maxAttempts': 0})
+        policy = RetryPolicy({})
+        assert policy.max_attempts == 3
+        assert policy.should_retry('GET', 1, _response(503))
+        assert policy.should_retry('DELETE', 2, _response(429))
+        assert policy.should_retry('GET', 1, error=requests.ConnectionError())
+        assert not policy.should_retry('GET', 3, _response(503))
+        assert not policy.should_retry('GET', 1, _response(500))
+        assert not policy.should_retry('POST', 1, _response(503))
+        policy = RetryPolicy({'methods': ['post'], 'statusCodes': [500], 'retryErrors': False})
+        assert policy.should_retry('POST', 1, _response(500))
+        assert not policy.should_retry('POST', 1, error=requests.ConnectionError())
+
+    def test_get_delay(self):
+        '''
+        Test get_delay method
+        '''
+        policy = RetryPolicy({'backoff': 0.5, 'maxBackoff': 3, 'jitter': False})
+        assert [policy.get_delay(a) for a in range(1, 5)] == [0.5, 1, 2, 3]
+        assert policy.get_delay(1, _response(503, '2')) == 2
+        assert policy.get_delay(1, _response(503, '120')) == 3
+        assert policy.get_delay(1, _response(503, 'soon')) == 0.5
+        assert RetryPolicy({'backoff': 0.5, 'retryAfter': False, 'jitter': False}).get_delay(1, _response(503, '2')) == 0.5
+        policy = RetryPolicy({'backoff': 0.5})
+        assert all(0 <= policy.get_delay(2) <= 1 for _ in range(20))
+
+    def test_parse_retry_after(self):
+        '''
+        Test parse_retry_after function
+        '''
+        assert parse_retry_after(None) is None
+        assert parse_retry_after(' 7 ') == 7
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+        assert 8 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+
+    def test_hedge(self):
+        '''
+        Test hedging delays and hedged calls
+        '''
+        tracker = LatencyTracker()
+        for i in range(1, 101):
+            tracker.record(('GET', 'u'), i / 1000.0)
+        assert tracker.percentile(('GET', 'u'), 95) == pytest.approx(0.095, rel=0.01)
+        assert tracker.percentile(('GET', 'u'), 95, 101) is None
+        assert tracker.percentile(('GET', 'v'), 95) is None
+        latency_tracker.clear()
+        policy = HedgePolicy({'delay': 0.05, 'minSamples': 2})
+        assert policy.get_delay('POST', ('POST', 'u')) is None
+        assert policy.get_delay('GET', ('GET', 'u')) == 0.05
+        calls = []
+        def send():
+            calls.append(None)
+            time.sleep(0.3 if len(calls) == 1 else 0.01)
+            r = requests.Response()
+            r.raw = io.BytesIO()
+            return r, None, {}, 0.01 * len(calls)
+        start = time.perf_counter()
+        result, hedged = policy.send('GET', ('GET', 'u'), send)
+        assert hedged
+        assert result[3] == 0.02
+        assert time.perf_counter() - start < 0.2
+        # the late answer is discarded
+        time.sleep(0.4)
+        assert len(calls) == 2
+        result, hedged = policy.send('GET', ('GET', 'u'), lambda: (requests.Response(), None, {}, 0.01))
+        assert not hedged
+        # enough samples: the percentile is used
+        assert policy.get_delay('GET', ('GET', 'u')) == pytest.approx(0.02, rel=0.01)
+        latency_tracker.clear()
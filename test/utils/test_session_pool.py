@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# library imports
+import responses
+
+# local imports
+from apitestframework.core.api_test import ApiTest
+from apitestframework.utils.session_pool import SessionPool
+
+class TestSessionPool(object):
+    '''
+    Test utils.session_pool module
+    '''
+
+    def test_session(self):
+        '''
+        Test session method
+        '''
+        pool = SessionPool()
+        s0 = pool.session('http://localhost:9396/v1/status')
+        assert pool.session('http://localhost:9396/v1/search') is s0
+        assert pool.session('http://localhost:9396/v1/search', False) is not s0
+        assert pool.session('http://localhost:9397/v1/search') is not s0
+        assert pool.session('https://localhost:9396/v1/search') is not s0
+        assert s0.verify == True
+        assert pool.session('http://localhost:9396', False).verify == False
+        pool.close()
+        assert pool.session('http://localhost:9396/v1/status') is not s0
+
+    def test_settings(self):
+        '''
+        Test pool settings
+        '''
+        pool = SessionPool({
+            'poolSize': 4,
+            'keepAlive': False,
+            'retries': {
+                'total': 3,
+                'backoffFactor': 0.1,
+                'statusForcelist': [502, 503]
+            }
+        })
+        assert pool.pool_size == 4
+        session = pool.session('http://localhost:9396')
+        assert session.headers['Connection'] == 'close'
+        adapter = session.get_adapter('http://localhost:9396')
+        assert adapter.max_retries.total == 3
+        assert 503 in adapter.max_retries.status_forcelist
+        assert SessionPool().session('http://localhost:9396').headers['Connection'] == 'keep-alive'
+
+    @responses.activate
+    def test_borrowed_session(self):
+        '''
+        Test ApiTest borrowing sessions from a shared pool
+        '''
+        pool = SessionPool()
+        shared_config = {
+            'base_url': 'http://localhost:9396',
+            'session_pool': pool
+        }
+        at_01 = ApiTest(shared_config, {
+            'expected': 'config/output/goeuro-status-expected.json'
+        })
+        at_02 = ApiTest(shared_config, {
+            'expected': 'config/output/goeuro-status-expected.json'
+        })
+        responses.add(responses.GET, 'http://localhost:9396',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200)
+        at_01.run()
+        at_02.run()
+        assert len(pool._sessions) == 1
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_cookies(self):
+        '''
+        Test cookies are not shared by the tests borrowing a session
+        '''
+        pool = SessionPool()
+        shared_config = {
+            'base_url': 'http://localhost:9396',
+            'session_pool': pool
+        }
+        responses.add(responses.GET, 'http://localhost:9396',
+                  json={'version': '0.3.1', 'status': 'OK'}, status=200, headers={'Set-Cookie': 'sid=42; Path=/'})
+        for _ in range(2):
+            ApiTest(shared_config, {
+                'expected': 'config/output/goeuro-status-expected.json'
+            }).run()
+        assert len(pool.session('http://localhost:9396').cookies) == 0
+        assert 'Cookie' not in responses.calls[1].request.headers
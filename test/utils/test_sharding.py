@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import json
+
+# library imports
+import pytest
+
+# local imports
+from apitestframework.utils.sharding import estimate_costs, load_runtimes, parse_shard, save_runtimes, select_shard, split
+
+SUITES = [
+    { 'name': 's0', 'tests': [{}] * 10 },
+    { 'name': 's1', 'tests': [{}] * 2 },
+    { 'name': 's2', 'tests': [{}] * 4 },
+    { 'name': 's3', 'tests': [{}] * 4 }
+]
+
+class TestSharding(object):
+    '''
+    Test utils.sharding module
+    '''
+
+    def test_parse_shard(self):
+        '''
+        Test parse_shard function
+        '''
+        assert parse_shard('2/3') == (2, 3)
+        for value in ('0/3', '4/3', '1', 'a/b', '1/0'):
+            with pytest.raises(ValueError):
+                parse_shard(value)
+
+    def test_runtimes(self, tmpdir):
+        '''
+        Test load_runtimes and save_runtimes functions
+        '''
+        path = str(tmpdir.join('runtimes.json'))
+        assert load_runtimes(path) == {}
+        assert load_runtimes(None) == {}
+        save_runtimes(path, {'s0': 1.0, 's1': 2.0})
+        save_runtimes(path, {'s1': 3.0})
+        assert load_runtimes(path) == {'s0': 1.0, 's1': 3.0}
+        assert len(tmpdir.listdir()) == 1
+
+    def test_estimate_costs(self):
+        '''
+        Test estimate_costs function
+        '''
+        # no history: number of tests
+        assert estimate_costs(SUITES, {}) == [10, 2, 4, 4]
+        # unknown suites cost as much per test as the known ones
+        assert estimate_costs(SUITES, {'s0': 5.0, 's1': 1.0}) == [5.0, 1.0, 2.0, 2.0]
+
+    def test_split(self):
+        '''
+        Test split function
+        '''
+        assert split([10, 2, 4, 4], 2) == [[0], [1, 2, 3]]
+        assert split([1, 1, 1], 2) == [[0, 2], [1]]
+        assert split([1], 3) == [[0], [], []]
+        # every item in exactly one group
+        groups = split([3, 1, 4, 1, 5, 9, 2, 6], 3)
+        assert sorted(i for g in groups for i in g) == list(range(8))
+
+    def test_select_shard(self):
+        '''
+        Test select_shard function
+        '''
+        runtimes = {'s0': 1.0, 's1': 1.0, 's2': 8.0, 's3': 1.0}
+        assert [s['name'] for s in select_shard(SUITES, '1/2', runtimes)] == ['s2']
+        assert [s['name'] for s in select_shard(SUITES, '2/2', runtimes)] == ['s0', 's1', 's3']
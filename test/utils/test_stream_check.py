@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import io
+import json
+import random
+
+# library imports
+import pytest
+import responses
+
+# local imports
+from apitestframework.core.api_test import ApiTest
+from apitestframework.utils.comparison_plan import ComparisonPlan
+from apitestframework.utils.stream_check import ResponseReader, check_stream, parse_key
+from apitestframework.utils.test_status import TestStatus
+
+ijson = pytest.importorskip('ijson')
+
+EXPECTED = {
+    'currency': 'EUR',
+    'solutions': [
+        {
+            'solutionId': 'VCC-2001-09400-59700-1567116000',
+            'price': 32.5,
+            'segments': [
+                {
+                    'carrier': 'ATVO Spa',
+                    'direct': True
+                }
+            ]
+        },
+        {
+            'solutionId': 'VCC-2001-09400-59700-1567118000',
+            'price': 40
+        }
+    ]
+}
+
+def as_stream(data):
+    return io.BytesIO(json.dumps(data).encode('utf-8'))
+
+def random_doc(rnd, depth=0):
+    r = rnd.random()
+    if depth > 3 or r < 0.4:
+        return rnd.choice(['a', 'b', 1, 2, 2.5, True, False, None])
+    if r < 0.7:
+        return [random_doc(rnd, depth + 1) for _ in range(rnd.randint(0, 3))]
+    return {rnd.choice(['x', 'y', 'z']): random_doc(rnd, depth + 1) for _ in range(rnd.randint(0, 3))}
+
+class TestStreamCheck(object):
+    '''
+    Test utils.stream_check module
+    '''
+
+    def test_parse_key(self):
+        '''
+        Test parse_key method
+        '''
+        assert parse_key('solutions.0.solutionId') == ('solutions', 0, 'solutionId')
+        assert parse_key('currency') == ('currency',)
+        assert parse_key('solutions.*.segments.0:2') == ('solutions', slice(None), 'segments', slice(0, 2))
+
+    def test_check_stream_wildcards(self):
+        '''
+        Test check_stream method extracting keys with wildcards
+        '''
+        plan = ComparisonPlan(EXPECTED)
+        extract = [
+            { 'name': 'ids', 'key': 'solutions.*.solutionId' },
+            { 'name': 'first', 'key': 'solutions.0:1' },
+            { 'name': 'carriers', 'key': 'solutions.*.segments.*.carrier' },
+            { 'name': 'none', 'key': 'solutions.5:.price' }
+        ]
+        _, count, extracted = check_stream(as_stream(EXPECTED), plan, extract)
+        assert count == 0
+        assert extracted == {
+            'ids': ['VCC-2001-09400-59700-1567116000', 'VCC-2001-09400-59700-1567118000'],
+            'first': [EXPECTED['solutions'][0]],
+            'carriers': ['ATVO Spa'],
+            'none': []
+        }
+
+    def test_check_stream(self):
+        '''
+        Test check_stream method
+        '''
+        plan = ComparisonPlan(EXPECTED, [{ 'key': 'solutions.1.solutionId', 'type': 'exist' }])
+        extract = [
+            { 'name': 'id', 'key': 'solutions.0.solutionId' },
+            { 'name': 'segments', 'key': 'solutions.0.segments' },
+            { 'name': 'missing', 'key': 'solutions.5' }
+        ]
+        mismatches, count, extracted = check_stream(as_stream(EXPECTED), plan, extract)
+        assert (mismatches, count) == ([], 0)
+        assert extracted == {
+            'id': 'VCC-2001-09400-59700-1567116000',
+            'segments': [{ 'carrier': 'ATVO Spa', 'direct': True }],
+            'missing': None
+        }
+        result = {
+            'currency': { 'code': 'EUR' },
+            'solutions': [
+                {
+                    'solutionId': 'VCC-2001-09400-59700-1567116000',
+                    'price': 32.5
+                },
+                {
+                    'solutionId': 'other',
+                    'price': 40.0
+                }
+            ]
+        }
+        mismatches, count, _ = check_stream(as_stream(result), plan, max_mismatches=2)
+        assert count == 3
+        assert mismatches == [
+            ('currency', 'EUR', '{...}'),
+            ('solutions.0.segments.0.carrier', 'ATVO Spa', None)
+        ]
+
+    def test_check_stream_unordered(self):
+        '''
+        Test check_stream method with arrays matched regardless of the order
+        '''
+        plan = ComparisonPlan(EXPECTED, None, [{ 'key': 'solutions', 'mode': 'unordered' }])
+        result = dict(EXPECTED, solutions=list(reversed(EXPECTED['solutions'])))
+        assert check_stream(as_stream(result), plan)[:2] == ([], 0)
+        result['solutions'] = result['solutions'][:1]
+        mismatches, count, _ = check_stream(as_stream(result), plan)
+        assert count == 1
+        assert mismatches == plan.check(result) == [('solutions', EXPECTED['solutions'][0], None)]
+        result['solutions'] = 'none'
+        assert check_stream(as_stream(result), plan)[:2] == ([('solutions', EXPECTED['solutions'], 'none')], 1)
+        del result['solutions']
+        assert check_stream(as_stream(result), plan)[:2] == ([('solutions', EXPECTED['solutions'], None)], 1)
+
+    def test_same_as_plan(self):
+        '''
+        Test that check_stream finds the same mismatches as ComparisonPlan.check
+        '''
+        rnd = random.Random(7)
+        for _ in range(300):
+            expected = { 'root': random_doc(rnd) }
+            result = { 'root': random_doc(rnd) } if rnd.random() < 0.7 else expected
+            plan = ComparisonPlan(expected)
+            _, count, _ = check_stream(as_stream(result), plan, max_mismatches=0)
+            assert count == len(plan.check(result))
+
+    def test_response_reader(self):
+        '''
+        Test ResponseReader
+        '''
+        class Raw(object):
+            def __init__(self):
+                self._data = io.BytesIO(b'{"a": 1}')
+            def read(self, size=None, decode_content=False):
+                return self._data.read(size)
+        reader = ResponseReader(Raw())
+        assert reader.read(3) == b'{"a'
+        assert reader.read(4) == b'": 1'
+        assert reader.bytes_read == 7
+        assert reader.read() == b'}'
+        assert reader.read() == b''
+        assert reader.bytes_read == 8
+
+    def test_check_stream_big_int(self):
+        '''
+        Test check_stream method with integers beyond 64 bits
+        '''
+        doc = { 'id': 2 ** 70, 'solutions': [{ 'price': -(2 ** 80) }] }
+        extract = [{ 'name': 'id', 'key': 'id' }]
+        mismatches, count, extracted = check_stream(as_stream(doc), ComparisonPlan(doc), extract)
+        assert (mismatches, count) == ([], 0)
+        assert extracted == { 'id': 2 ** 70 }
+        mismatches, count, _ = check_stream(as_stream(doc), ComparisonPlan({ 'id': 1 }))
+        assert (mismatches, count) == ([('id', 1, 2 ** 70)], 1)
+        # decimals are read as floats
+        doc = { 'price': 0.1, 'rate': 1e-7, 'values': [2.5, 3] }
+        extract = [{ 'name': 'values', 'key': 'values' }]
+        mismatches, count, extracted = check_stream(as_stream(doc), ComparisonPlan(doc), extract)
+        assert (mismatches, count) == ([], 0)
+        assert extracted == { 'values': [2.5, 3] }
+        assert type(extracted['values'][0]) is float
+
+    @responses.activate
+    def test_api_test(self):
+        '''
+        Test streaming in ApiTest
+        '''
+        at = ApiTest({
+            'base_url': 'http://localhost:9396'
+        }, {
+            'expected': 'config/output/goeuro-status-expected.json',
+            'stream': True,
+            'extract': [{
+                'name': 'extvrs',
+                'key': 'version'
+            }]
+        })
+        responses.add(responses.GET, 'http://localhost:9396',
+                  json={'version': '0.3.1', 'status': 'OK', 'big': list(range(1000))}, status=200)
+        status, data = at.run()
+        assert status == TestStatus.SUCCESS
+        assert data['mismatches'] == 0
+        assert data['bytes'] > 1000
+        assert at.extract_values() == { 'extvrs': '0.3.1' }
+        # integers beyond 64 bits are accepted, as without streaming
+        responses.replace(responses.GET, 'http://localhost:9396',
+                  body='{"version": "0.3.1", "status": "OK", "big": 123456789012345678901234567890}', status=200)
+        status, data = at.run()
+        assert status == TestStatus.SUCCESS
+        assert at.extract_values() == { 'extvrs': '0.3.1' }
+        responses.replace(responses.GET, 'http://localhost:9396', body='{"version": "0.3.1", "status"', status=200)
+        status, data = at.run()
+        assert status == TestStatus.FAILURE
+        assert data is None
@@ -34,4 +34,11 @@ class TestTestStatus(object):
         assert TestStatus.SUCCESS.icon() == '✔'
         assert TestStatus.FAILURE.icon() == '✘'
         assert TestStatus.SKIPPED.icon() == '◉'
+        assert TestStatus.TIMEOUT.icon() == '⏰'
         assert TestStatus.UNKNOWN.icon() == '?'
+
+    def test_is_failure(self):
+        '''
+        Test is_failure method
+        '''
+        assert [s for s in TestStatus if s.is_failure()] == [TestStatus.FAILURE, TestStatus.TIMEOUT]
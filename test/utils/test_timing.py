@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 JMatica Srl
+#
+# This file is part of apitestframework.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# system imports
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# local imports
+from apitestframework.utils.session_pool import SessionPool
+from apitestframework.utils.timing import PHASES, PhaseTimer, add_connection_timing, start_connection_timing, stop_connection_timing, sum_timings
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+class TestTiming(object):
+    '''
+    Test utils.timing module
+    '''
+
+    def test_phase_timer(self):
+        '''
+        Test PhaseTimer class
+        '''
+        timer = PhaseTimer()
+        time.sleep(0.01)
+        timer.mark('build')
+        assert timer.timings['build'] >= 0.01
+        time.sleep(0.01)
+        timer.mark('ttfb', {'connect': 0.004})
+        assert timer.timings['connect'] == 0.004
+        assert 0.005 <= timer.timings['ttfb'] < timer.timings['build'] + 0.01
+        timer.add('build', 1.0)
+        assert timer.timings['build'] > 1.0
+
+    def test_connection_timing(self):
+        '''
+        Test connection timing functions
+        '''
+        # not collecting
+        add_connection_timing('connect', 1.0)
+        assert stop_connection_timing() == {'connect': 0.0, 'tls': 0.0}
+        start_connection_timing()
+        add_connection_timing('connect', 1.0)
+        add_connection_timing('tls', 0.5)
+        add_connection_timing('connect', 1.0)
+        assert stop_connection_timing() == {'connect': 2.0, 'tls': 0.5}
+
+    def test_sum_timings(self):
+        '''
+        Test sum_timings function
+        '''
+        total = sum_timings([{'build': 1.0, 'ttfb': 2.0}, None, {'build': 0.5}])
+        assert tuple(total) == PHASES
+        assert total['build'] == 1.5
+        assert total['ttfb'] == 2.0
+        assert total['tls'] == 0.0
+
+    def test_timed_adapter(self):
+        '''
+        Test the connection time is reported by sessions of the pool
+        '''
+        server = HTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+        pool = SessionPool()
+        try:
+            start_connection_timing()
+            pool.session(url).get(url)
+            first = stop_connection_timing()
+            assert first['connect'] > 0
+            assert first['tls'] == 0
+            # the connection is reused
+            start_connection_timing()
+            pool.session(url).get(url)
+            assert stop_connection_timing()['connect'] == 0
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()